@@ -0,0 +1,6 @@
+from .tardiness import tardiness_report, rule_summary
+from .line_balancing import balance_workstations, balancing_report, reallocation_report
+from .robustness import robustness_report
+from .critical_path import critical_path_report
+
+__all__ = ['tardiness_report', 'rule_summary', 'balance_workstations', 'balancing_report', 'reallocation_report', 'robustness_report', 'critical_path_report']
@@ -0,0 +1,211 @@
+from typing import Dict, List, Optional
+import numpy as np
+from models.batch import Batch
+from storage.schedule_diff import encode_strings
+
+
+def wait_causes(table: Dict[str, np.ndarray], batches: List[Batch]) -> Dict[str, np.ndarray]:
+    """
+    每筆排程記錄的等待原因（向量化）
+    模擬器的開始時間 = max(車輛就緒時間, 工位可用時間)，兩者由排程記錄即可還原:
+      ready_at      : 前一關卡完成時間（第一關卡為批次開始時間 + 換線時間）
+      ws_free_at    : 同一工位前一筆工作的完成時間（工位第一筆工作為 0）
+      wait_workstation : start - ready_at，車輛已就緒但等待工位（工位忙碌）
+      wait_upstream    : start - ws_free_at，工位空閒等待車輛從上游到達（第一筆工作不計）
+      pred          : 決定開始時間的前一筆記錄（上游關卡或同工位前一筆工作），-1 表示起點
+    table: storage.schedule_diff.schedule_table 的欄位陣列
+    """
+    n = table["vehicle_id"].size
+    start = table["start_time"]
+    finish = table["finish_time"]
+    stage = table["stage_number"]
+
+    # 同一車輛的前一關卡
+    vehicle = encode_strings(table["vehicle_id"], {})
+    batch_index = {b.batch_id: i for i, b in enumerate(batches)}
+    batch = encode_strings(table["batch_id"], batch_index)
+    batch_ready = np.zeros(len(batch_index), dtype=np.int64)
+    for b in batches:
+        batch_ready[batch_index[b.batch_id]] = (b.start_time or 0) + (b.setup_time or 0)
+
+    ready_at = batch_ready[batch]
+    pred_upstream = np.full(n, -1, dtype=np.int64)
+    order = np.lexsort((stage, vehicle))
+    same = vehicle[order[1:]] == vehicle[order[:-1]]
+    current, previous = order[1:][same], order[:-1][same]
+    ready_at[current] = finish[previous]
+    pred_upstream[current] = previous
+
+    # 同一工位的前一筆工作
+    workstation = encode_strings(table["workstation_id"], {})
+    ws_free_at = np.zeros(n, dtype=np.int64)
+    pred_workstation = np.full(n, -1, dtype=np.int64)
+    order = np.lexsort((start, workstation))
+    same = workstation[order[1:]] == workstation[order[:-1]]
+    current, previous = order[1:][same], order[:-1][same]
+    ws_free_at[current] = finish[previous]
+    pred_workstation[current] = previous
+
+    # 同時滿足時視為上游決定（關鍵路徑留在同一車輛）
+    upstream_bound = start <= ready_at
+    return {
+        "ready_at": ready_at,
+        "ws_free_at": ws_free_at,
+        "wait_workstation": np.maximum(start - ready_at, 0),
+        "wait_upstream": np.where(pred_workstation >= 0, np.maximum(start - ws_free_at, 0), 0),
+        "pred": np.where(upstream_bound, pred_upstream, pred_workstation),
+        "batch": batch,
+    }
+
+
+def _chain_sums(pred: np.ndarray, values: np.ndarray):
+    """
+    指標倍增: 每筆記錄沿 pred 鏈（含自身）的 values 總和、記錄數與起點
+    O(n log n) 全向量化
+    """
+    n = pred.size
+    total = values.copy()
+    count = np.ones(n, dtype=np.int64)
+    root = np.arange(n)
+    ptr = pred.copy()
+    while True:
+        linked = np.flatnonzero(ptr >= 0)
+        if linked.size == 0:
+            break
+        target = ptr[linked]
+        total[linked] += total[target]
+        count[linked] += count[target]
+        root[linked] = root[target]
+        ptr[linked] = ptr[target]
+    return total, count, root
+
+
+def critical_path_report(table: Dict[str, np.ndarray],
+                         batches: List[Batch],
+                         batch_id: Optional[str] = None) -> Dict:
+    """
+    關鍵路徑與阻塞分析
+    每個批次從最後完成的記錄沿 pred 回溯到起點即為關鍵路徑（路徑上每段都緊接前一段開始），
+    路徑時間依關卡 / 檢修廠彙總；另依關卡與檢修廠×關卡彙總等待工位與工位空等的分鐘數，
+    依等待工位時間排出瓶頸
+    batch_id: 指定時附上該批次關鍵路徑的逐筆記錄
+    """
+    n = table["vehicle_id"].size
+    if n == 0:
+        return {"stages": [], "bottlenecks": [], "batches": []}
+
+    causes = wait_causes(table, batches)
+    stage = table["stage_number"]
+    duration = table["finish_time"] - table["start_time"]
+    stage_numbers = np.unique(stage)
+    stage_col = np.searchsorted(stage_numbers, stage)
+    station_index: Dict[str, int] = {}
+    station = encode_strings(table["station_name"], station_index)
+    station_names = list(station_index)
+
+    # 每筆記錄沿關鍵鏈的各關卡 / 各檢修廠時間
+    values = np.zeros((n, stage_numbers.size + len(station_names)), dtype=np.int64)
+    rows = np.arange(n)
+    values[rows, stage_col] = duration
+    values[rows, stage_numbers.size + station] = duration
+    chain, chain_rows, root = _chain_sums(causes["pred"], values)
+
+    # 各批次最後完成的記錄
+    batch = causes["batch"]
+    order = np.lexsort((table["finish_time"], batch))
+    last = order[np.r_[batch[order[1:]] != batch[order[:-1]], True]]
+
+    batch_rows = []
+    for r in last:
+        path_start = int(table["start_time"][root[r]])
+        stage_time = {int(s): int(t) for s, t in zip(stage_numbers, chain[r, :stage_numbers.size])}
+        station_time = {
+            name: int(t) for name, t in zip(station_names, chain[r, stage_numbers.size:]) if t
+        }
+        in_batch = batch == batch[r]
+        batch_rows.append({
+            "batch_id": table["batch_id"][r],
+            "station_name": table["station_name"][r],
+            "finish_time": int(table["finish_time"][r]),
+            "critical_path": {
+                "start_time": path_start,
+                "start_batch_id": table["batch_id"][root[r]],
+                "length": int(table["finish_time"][r]) - path_start,
+                "records": int(chain_rows[r]),
+                "stage_time": stage_time,
+                "station_time": station_time,
+                "bottleneck_stage": max(stage_time, key=stage_time.get),
+            },
+            "wait_workstation": int(causes["wait_workstation"][in_batch].sum()),
+            "wait_by_stage": {
+                int(s): int(t) for s, t in zip(
+                    stage_numbers,
+                    np.bincount(stage_col[in_batch], weights=causes["wait_workstation"][in_batch],
+                                minlength=stage_numbers.size)
+                )
+            },
+        })
+    batch_rows.sort(key=lambda row: -row["finish_time"])
+
+    # 關卡與檢修廠×關卡的阻塞彙總
+    def totals(codes, size):
+        return (
+            np.bincount(codes, weights=duration, minlength=size),
+            np.bincount(codes, weights=causes["wait_workstation"], minlength=size),
+            np.bincount(codes, weights=causes["wait_upstream"], minlength=size),
+        )
+
+    busy, wait_ws, wait_up = totals(stage_col, stage_numbers.size)
+    stages = [
+        {
+            "stage_number": int(s),
+            "busy": int(busy[i]),
+            "wait_workstation": int(wait_ws[i]),
+            "wait_upstream": int(wait_up[i]),
+            "critical_time": sum(row["critical_path"]["stage_time"][int(s)] for row in batch_rows),
+        }
+        for i, s in enumerate(stage_numbers)
+    ]
+
+    pair = station * stage_numbers.size + stage_col
+    busy, wait_ws, wait_up = totals(pair, len(station_names) * stage_numbers.size)
+    ranked = np.argsort(-wait_ws, kind="stable")
+    bottlenecks = [
+        {
+            "station_name": station_names[i // stage_numbers.size],
+            "stage_number": int(stage_numbers[i % stage_numbers.size]),
+            "busy": int(busy[i]),
+            "wait_workstation": int(wait_ws[i]),
+            "wait_upstream": int(wait_up[i]),
+        }
+        for i in ranked if busy[i] > 0
+    ]
+
+    report = {"stages": stages, "bottlenecks": bottlenecks, "batches": batch_rows}
+    if batch_id is not None:
+        report["path"] = _trace_path(table, causes, last, batch_id)
+    return report
+
+
+def _trace_path(table: Dict[str, np.ndarray], causes: Dict[str, np.ndarray],
+                last: np.ndarray, batch_id: str) -> Optional[List[Dict]]:
+    """指定批次的關鍵路徑逐筆記錄（由起點到完成）"""
+    ends = [r for r in last if table["batch_id"][r] == batch_id]
+    if not ends:
+        return None
+    path = []
+    r = ends[0]
+    while r >= 0:
+        path.append({
+            "vehicle_id": table["vehicle_id"][r],
+            "batch_id": table["batch_id"][r],
+            "stage_number": int(table["stage_number"][r]),
+            "workstation_id": table["workstation_id"][r],
+            "start_time": int(table["start_time"][r]),
+            "finish_time": int(table["finish_time"][r]),
+            # 決定開始時間的原因: upstream（前一關卡 / 批次就緒）或 workstation（等待同工位前一筆工作）
+            "bound_by": "upstream" if table["start_time"][r] <= causes["ready_at"][r] else "workstation",
+        })
+        r = causes["pred"][r]
+    path.reverse()
+    return path
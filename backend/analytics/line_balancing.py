@@ -0,0 +1,153 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from models.batch import Batch
+from models.vehicle import VehicleMaster
+from simulator.evaluator import build_batch_plans, evaluate_station, evaluate_station_flexible
+
+
+def cycle_times(stage_times: np.ndarray, workstations: np.ndarray) -> np.ndarray:
+    """
+    有效節拍時間 = max(關卡時間 / 工位數)
+    stage_times, workstations: (車型數, 關卡數)
+    """
+    return (stage_times / workstations).max(axis=1)
+
+
+def balance_workstations(stage_times: np.ndarray, budget) -> np.ndarray:
+    """
+    在工位預算下分配各關卡的整數工位數，使有效節拍時間最小（整個目錄一次向量化計算）
+
+    每關卡從 1 個工位開始，每一輪對所有尚有預算的車型同時把一個工位加到
+    目前的瓶頸關卡（stage_time / workstations 最大者）。
+    瓶頸只會因加工位而下降，貪婪加到瓶頸即為最小化最大值的最佳解
+
+    budget: 每個車型的工位總數上限（整數或每車型一個值），不足關卡數時以關卡數計
+    返回: (車型數, 關卡數) 的工位數
+    """
+    stage_times = np.asarray(stage_times, dtype=np.float64)
+    model_count, stage_count = stage_times.shape
+    budgets = np.maximum(np.broadcast_to(np.asarray(budget, dtype=np.int64), (model_count,)), stage_count)
+
+    workstations = np.ones((model_count, stage_count), dtype=np.int64)
+    rows = np.arange(model_count)
+    for step in range(int(budgets.max(initial=stage_count)) - stage_count):
+        active = rows[budgets - stage_count > step]
+        bottleneck = np.argmax(stage_times[active] / workstations[active], axis=1)
+        workstations[active, bottleneck] += 1
+    return workstations
+
+
+def balancing_report(vehicles_master: Dict[Tuple[str, str], VehicleMaster],
+                     budget: Optional[int] = None) -> Dict:
+    """
+    比較目錄中每個車型的現行工位配置（calculate_workstations）與平衡配置的產能
+    budget: 每個檢修廠的工位預算；未指定時使用各車型現行配置的工位總數（同預算比較）
+    產能以每小時完成車輛數 = 60 / 有效節拍時間 計算
+    """
+    vehicles = list(vehicles_master.values())
+    if not vehicles:
+        return {"budget": budget, "summary": {"models": 0}, "models": []}
+
+    stage_times = np.array([v.inspection_times for v in vehicles], dtype=np.float64)
+    current = np.array([v.calculate_workstations() for v in vehicles], dtype=np.int64)
+    balanced = balance_workstations(stage_times, current.sum(axis=1) if budget is None else budget)
+
+    current_cycle = cycle_times(stage_times, current)
+    balanced_cycle = cycle_times(stage_times, balanced)
+    current_throughput = 60.0 / current_cycle
+    balanced_throughput = 60.0 / balanced_cycle
+    gain = balanced_throughput / current_throughput - 1.0
+
+    models = [
+        {
+            "manufacturer": v.manufacturer,
+            "model": v.model,
+            "inspection_times": list(v.inspection_times),
+            "current_config": current[i].tolist(),
+            "current_total": int(current[i].sum()),
+            "current_cycle_time": round(float(current_cycle[i]), 2),
+            "current_throughput": round(float(current_throughput[i]), 3),
+            "balanced_config": balanced[i].tolist(),
+            "balanced_total": int(balanced[i].sum()),
+            "balanced_cycle_time": round(float(balanced_cycle[i]), 2),
+            "balanced_throughput": round(float(balanced_throughput[i]), 3),
+            "throughput_gain": round(float(gain[i]), 4),
+        }
+        for i, v in enumerate(vehicles)
+    ]
+    models.sort(key=lambda m: -m["throughput_gain"])
+
+    return {
+        "budget": budget,
+        "summary": {
+            "models": len(vehicles),
+            "improved_models": int((gain > 1e-9).sum()),
+            "mean_throughput_gain": round(float(gain.mean()), 4),
+            "max_throughput_gain": round(float(gain.max()), 4),
+            "current_workstations": int(current.sum()),
+            "balanced_workstations": int(balanced.sum()),
+        },
+        "models": models,
+    }
+
+
+def reallocation_report(batches: List[Batch],
+                        station_configs: Dict[str, List[int]],
+                        vehicles_master: Dict[Tuple[str, str], VehicleMaster],
+                        move_time: int = 0) -> Dict:
+    """
+    比較固定工位配置與換線時調動人員的產出
+    每個檢修廠總人數固定為現行配置的工位總數；人員調動時，每個批次開始前
+    依該車型在此人數下的平衡配置（balance_workstations）重新分配各關卡人數
+    產能以每小時完成車輛數 = 車輛數 * 60 / 檢修廠完工時間 計算
+    實際排程使用相同的調動規則: FlowShopSimulator(flexible_staff=True)
+    """
+    stations = []
+    static_makespan = 0
+    flexible_makespan = 0
+    total_moves = 0
+    total_vehicles = 0
+    batch_gains = []
+    for station_name, plans in build_batch_plans(batches, vehicles_master).items():
+        config = station_configs[station_name]
+        budget = sum(config)
+        stage_times = np.array([plan.stage_times for plan in plans], dtype=np.float64)
+        batch_configs = balance_workstations(stage_times, budget).tolist()
+
+        static_finish = evaluate_station(plans, config)
+        flexible_finish, moves = evaluate_station_flexible(plans, config, batch_configs, move_time)
+        station_static = max(static_finish.values())
+        station_flexible = max(flexible_finish.values())
+        vehicles = sum(plan.quantity for plan in plans)
+
+        stations.append({
+            "station_name": station_name,
+            "workstations": budget,
+            "static_config": list(config),
+            "batches": len(plans),
+            "vehicles": vehicles,
+            "moves": moves,
+            "static_makespan": station_static,
+            "flexible_makespan": station_flexible,
+            "static_throughput": round(vehicles * 60 / station_static, 3) if station_static else 0.0,
+            "flexible_throughput": round(vehicles * 60 / station_flexible, 3) if station_flexible else 0.0,
+            "throughput_gain": round(station_static / station_flexible - 1, 4) if station_flexible else 0.0,
+        })
+        batch_gains.extend(static_finish[p.batch_id] - flexible_finish[p.batch_id] for p in plans)
+        static_makespan = max(static_makespan, station_static)
+        flexible_makespan = max(flexible_makespan, station_flexible)
+        total_moves += moves
+        total_vehicles += vehicles
+
+    return {
+        "move_time": move_time,
+        "summary": {
+            "vehicles": total_vehicles,
+            "moves": total_moves,
+            "static_makespan": static_makespan,
+            "flexible_makespan": flexible_makespan,
+            "throughput_gain": round(static_makespan / flexible_makespan - 1, 4) if flexible_makespan else 0.0,
+            "mean_batch_finish_saving": round(float(np.mean(batch_gains)), 1) if batch_gains else 0.0,
+        },
+        "stations": stations,
+    }
@@ -0,0 +1,109 @@
+from typing import List, Dict
+import numpy as np
+from models.batch import Batch
+from scheduler.clock import SimulationClock
+
+
+def tardiness_report(batches: List[Batch], clock: SimulationClock) -> Dict:
+    """
+    批次延遲報表（向量化計算）
+    lateness = 完成時間 - 交期（分鐘），tardiness = max(lateness, 0)
+    無交期的批次視為準時，不計入延遲統計
+    """
+    batches = [b for b in batches if b.assigned_station and b.finish_time is not None]
+    finish = np.fromiter((b.finish_time for b in batches), dtype=np.float64, count=len(batches))
+    due, lateness, tardiness, on_time, quantity = _lateness_arrays(batches, finish, clock)
+    has_due = ~np.isnan(due)
+    station_names, station_codes = np.unique(
+        np.array([b.assigned_station for b in batches], dtype=str),
+        return_inverse=True
+    )
+
+    station_count = len(station_names)
+    per_station_batches = np.bincount(station_codes, minlength=station_count)
+    per_station_on_time = np.bincount(station_codes, weights=on_time, minlength=station_count)
+    per_station_on_time_vehicles = np.bincount(
+        station_codes, weights=quantity * on_time, minlength=station_count
+    )
+    per_station_tardiness = np.bincount(station_codes, weights=tardiness, minlength=station_count)
+    per_station_max_tardiness = np.zeros(station_count)
+    np.maximum.at(per_station_max_tardiness, station_codes, tardiness)
+
+    batch_rows = []
+    for i, batch in enumerate(batches):
+        batch_rows.append({
+            "batch_id": batch.batch_id,
+            "station_name": batch.assigned_station,
+            "quantity": batch.quantity,
+            "finish_time": batch.finish_time,
+            "finish_at": clock.to_datetime(batch.finish_time).isoformat(),
+            "due_time": None if not has_due[i] else int(due[i]),
+            "lateness": None if not has_due[i] else int(lateness[i]),
+            "tardiness": int(tardiness[i]),
+            "on_time": bool(on_time[i]),
+        })
+
+    station_rows = [
+        {
+            "station_name": str(name),
+            "batches": int(per_station_batches[j]),
+            "on_time_batches": int(per_station_on_time[j]),
+            "on_time_vehicles": int(per_station_on_time_vehicles[j]),
+            "total_tardiness": int(per_station_tardiness[j]),
+            "max_tardiness": int(per_station_max_tardiness[j]),
+        }
+        for j, name in enumerate(station_names)
+    ]
+
+    return {
+        "origin": clock.origin.isoformat(),
+        "summary": summarize(on_time, tardiness, lateness, quantity),
+        "stations": station_rows,
+        "batches": batch_rows,
+    }
+
+
+def rule_summary(finish_times: Dict[str, int], batches: List[Batch], clock: SimulationClock) -> Dict:
+    """
+    以批次完成時間字典計算延遲摘要
+    用於比較不同派工規則（完成時間由快速評估器計算）
+    """
+    finish = np.fromiter((finish_times[b.batch_id] for b in batches), dtype=np.float64, count=len(batches))
+    _, lateness, tardiness, on_time, quantity = _lateness_arrays(batches, finish, clock)
+    summary = summarize(on_time, tardiness, lateness, quantity)
+    summary["makespan"] = int(finish.max()) if finish.size else 0
+    return summary
+
+
+def summarize(on_time: np.ndarray,
+              tardiness: np.ndarray,
+              lateness: np.ndarray,
+              quantity: np.ndarray) -> Dict:
+    """延遲統計摘要"""
+    has_due = ~np.isnan(lateness)
+    return {
+        "batches": int(on_time.size),
+        "on_time_batches": int(on_time.sum()),
+        "on_time_vehicles": int(quantity[on_time].sum()),
+        "total_vehicles": int(quantity.sum()),
+        "total_tardiness": int(tardiness.sum()),
+        "max_tardiness": int(tardiness.max()) if tardiness.size else 0,
+        "mean_lateness": float(lateness[has_due].mean()) if has_due.any() else 0.0,
+    }
+
+
+def _lateness_arrays(batches: List[Batch], finish: np.ndarray, clock: SimulationClock):
+    """
+    返回: (交期, lateness, tardiness, 是否準時, 車輛數) 陣列
+    無交期的批次交期與 lateness 為 NaN
+    """
+    count = len(batches)
+    due = np.fromiter(
+        (np.nan if b.due_date is None else clock.to_minutes(b.due_date) for b in batches),
+        dtype=np.float64, count=count
+    )
+    quantity = np.fromiter((b.quantity for b in batches), dtype=np.int64, count=count)
+    lateness = finish - due
+    tardiness = np.nan_to_num(np.maximum(lateness, 0.0), nan=0.0)
+    on_time = tardiness <= 0
+    return due, lateness, tardiness, on_time, quantity
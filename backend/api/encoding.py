@@ -0,0 +1,148 @@
+import json
+from typing import Dict, Iterable, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+
+# 回應格式
+#   json     : 原有 JSON（預設）
+#   columnar : 欄式 JSON，字串欄位以共用字串字典的索引表示
+#   msgpack  : 與 columnar 相同的結構，以 MessagePack 編碼
+FORMATS = ("json", "columnar", "msgpack")
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columnar": "application/vnd.schedule.columnar+json",
+    "msgpack": "application/msgpack",
+}
+_ACCEPT_FORMATS = {
+    "application/json": "json",
+    "application/vnd.schedule.columnar+json": "columnar",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+}
+
+
+def negotiate_format(accept: Optional[str], requested: Optional[str] = None) -> str:
+    """
+    決定回應格式
+    requested（?format=）優先，其次為 Accept 中第一個支援的媒體類型，預設 json
+    """
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"不支援的格式: {requested}")
+        return requested
+    for item in (accept or "").split(","):
+        fmt = _ACCEPT_FORMATS.get(item.split(";", 1)[0].strip().lower())
+        if fmt:
+            return fmt
+    return "json"
+
+
+class StringDictionary:
+    """字串字典（字串 → 索引），None 以 -1 表示"""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        idx = self.index.get(value)
+        if idx is None:
+            idx = len(self.strings)
+            self.index[value] = idx
+            self.strings.append(value)
+        return idx
+
+
+def to_table(records: Iterable[Dict], dictionary: StringDictionary) -> Dict:
+    """
+    記錄列表 → 欄式表格 {"rows", "columns", "coded"}
+    只含字串（或 None）的欄位改存字典索引，欄名列於 coded
+    """
+    records = list(records)
+    keys: Dict[str, None] = {}
+    for record in records:
+        keys.update(dict.fromkeys(record))
+
+    columns = {}
+    coded = []
+    for key in keys:
+        values = [record.get(key) for record in records]
+        if any(isinstance(v, str) for v in values) and all(v is None or isinstance(v, str) for v in values):
+            columns[key] = [dictionary.code(v) for v in values]
+            coded.append(key)
+        else:
+            columns[key] = values
+    return {"rows": len(records), "columns": columns, "coded": coded}
+
+
+def columnar_result(payload: Dict[str, List[Dict]]) -> Dict:
+    """/api/result 內容（batches / vehicles / schedules / stations）轉為欄式"""
+    dictionary = StringDictionary()
+    tables = {name: to_table(jsonable_encoder(records), dictionary) for name, records in payload.items()}
+    return {"dictionary": dictionary.strings, **tables}
+
+
+def columnar_stations(stations: Dict[str, Dict]) -> Dict:
+    """
+    狀態中的 stations 轉為欄式: 檢修廠表與工位表
+    工位表的 station 欄為檢修廠表的列索引
+    """
+    dictionary = StringDictionary()
+    station_rows = []
+    workstation_rows = []
+    for station_idx, station in enumerate(stations.values()):
+        station_rows.append({
+            "name": station["name"],
+            "status": station["status"],
+            "current_batch": station["current_batch"],
+        })
+        for stage in station["stages"]:
+            for ws in stage["workstations"]:
+                workstation_rows.append({
+                    "station": station_idx,
+                    "stage_number": stage["stage_number"],
+                    "stage_name": stage["stage_name"],
+                    "workstation_id": ws["workstation_id"],
+                    "ws_number": ws["ws_number"],
+                    "status": ws["status"],
+                    "current_vehicle": ws["current_vehicle"],
+                })
+    stations_table = to_table(station_rows, dictionary)
+    workstations_table = to_table(workstation_rows, dictionary)
+    return {
+        "dictionary": dictionary.strings,
+        "stations": stations_table,
+        "workstations": workstations_table,
+    }
+
+
+def encode(payload: Dict, fmt: str) -> bytes:
+    """編碼為 JSON（緊湊格式）或 MessagePack"""
+    if fmt == "msgpack":
+        import msgpack
+        return msgpack.packb(payload, use_bin_type=True)
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def prepend_fields(body: bytes, fmt: str, fields: Dict) -> bytes:
+    """
+    在已編碼的物件（map）前加入欄位，不需重新編碼整個內容
+    用於把時間等每次不同的欄位加到快取的狀態內容
+    """
+    if not fields:
+        return body
+    if fmt == "msgpack":
+        import msgpack
+        count = body[0] & 0x0F
+        if (body[0] & 0xF0) != 0x80 or count + len(fields) > 15:
+            return encode({**fields, **msgpack.unpackb(body, raw=False)}, fmt)
+        return (bytes([0x80 | (count + len(fields))])
+                + b"".join(msgpack.packb(k) + msgpack.packb(v) for k, v in fields.items())
+                + body[1:])
+    head = encode(fields, fmt)[:-1]
+    if body == b"{}":
+        return head + b"}"
+    return head + b"," + body[1:]
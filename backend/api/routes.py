@@ -1,10 +1,24 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Header, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse
+from typing import List, Optional
+from pathlib import Path
+from datetime import datetime
 from pydantic import BaseModel
+import asyncio
+import json
+import os
 
-from data_loader import DataLoader
+from data_loader import DataLoader, NDJSON_SUFFIXES
 from scheduler.greedy_scheduler import GreedyScheduler
-from simulator.flow_shop_simulator import FlowShopSimulator
+from scheduler.clock import SimulationClock
+from scheduler.dispatch import DispatchRule
+from models.batch import Batch
+from models.planning import CapacityPlan, AssignmentResult
+from api.state_cache import StateCache
+from api.encoding import MEDIA_TYPES, negotiate_format, columnar_result, encode
+
+# 模擬器、線上排程、分析與欄式儲存（numpy）於端點內延遲載入，縮短冷啟動時間
 
 router = APIRouter(prefix="/api", tags=["scheduling"])
 
@@ -12,11 +26,106 @@ router = APIRouter(prefix="/api", tags=["scheduling"])
 _scheduler = None
 _simulator = None
 _current_result = None
+_columns = None  # 由欄式檔載入的排程（記憶體映射）
+_clock = None  # 工單時間 ↔ 模擬分鐘
+_online = None  # 線上排程（新批次隨時到達）
+_state_cache = StateCache()  # /api/state/{time} 回應快取
+_shared_store = None  # 多 worker 共享結果儲存（啟用時建立）
+_shared = None  # 採用中的共享排程（由其他 worker 發布）
+_shared_version = None  # 本行程目前結果對應的共享版本
+_result_file = None  # 預先序列化的 /api/result 回應檔
+_encoded_results = ("", {})  # (狀態快取版本, {格式: 精簡格式的 /api/result 內容})
+_published_schedules = None  # 最近發布的排程記錄
+_previous_schedules = None  # 前一次發布的排程記錄（/api/diff 預設的比較基準）
+_publish_handle = None  # 延遲發布的計時器（線上排程新批次）
+
+# 專案根目錄（backend的上一層）與欄式排程檔目錄
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+EXPORT_DIR = Path(os.environ.get("SCHEDULE_EXPORT_DIR", PROJECT_ROOT / "exports"))
+# 多 worker 共享排程結果的目錄（預設 EXPORT_DIR/shared，SCHEDULE_SHARED_DIR=off 停用）
+# uvicorn --workers 不會設定 WEB_CONCURRENCY，無法得知 worker 數，因此預設啟用
+SHARED_DIR = os.environ.get("SCHEDULE_SHARED_DIR", str(EXPORT_DIR / "shared"))
+if SHARED_DIR.lower() in ("", "off"):
+    SHARED_DIR = None
+# 線上排程新批次的發布間隔（秒）: 期間內的變更合併為一次發布，不在請求內寫檔
+SHARED_PUBLISH_INTERVAL = float(os.environ.get("SCHEDULE_PUBLISH_INTERVAL", "1.0"))
+# 分配最佳化的搜尋時間上限（秒）: 搜尋在執行緒池中執行，但仍佔用一個執行緒與 GIL
+OPTIMIZE_TIME_LIMIT_MAX = float(os.environ.get("SCHEDULE_OPTIMIZE_TIME_LIMIT_MAX", "30.0"))
 
 
 class ScheduleRequest(BaseModel):
     """排程請求"""
-    order_file: str  # 例如: "test_orders_001.json"
+    order_file: str  # 例如: "test_orders_001.json" 或 NDJSON 工單 "orders.ndjson"
+    minimize_changeover: bool = False  # 檢修廠內重排批次以減少換線
+    dispatch_rule: DispatchRule = DispatchRule.PRIORITY  # 派工規則: priority / edd / atc / slack
+    start_hour: int = SimulationClock.DEFAULT_START_HOUR  # 模擬時間 0 對應的開工時刻
+    decompose: bool = False  # 大型工單: 依偏好檢修廠分群分配（結果與一般分配相同）
+    flexible_staff: bool = False  # 換線時依車型的平衡配置在關卡間調動人員（總人數不變）
+    move_time: int = 0  # 人員調動到其他關卡所需時間（分鐘，flexible_staff）
+
+
+class HorizonScheduleRequest(BaseModel):
+    """多日排程請求"""
+    order_files: Optional[List[str]] = None  # 依日期排程的工單；未指定時使用所有測試工單
+    dispatch_rule: DispatchRule = DispatchRule.PRIORITY
+    start_hour: int = SimulationClock.DEFAULT_START_HOUR  # 每日開工時刻
+
+
+class DispatchCompareRequest(BaseModel):
+    """派工規則比較請求"""
+    order_file: str
+    start_hour: int = SimulationClock.DEFAULT_START_HOUR
+
+
+class CapacityPlanRequest(BaseModel):
+    """產能規劃請求"""
+    order_file: str
+    start_hour: int = SimulationClock.DEFAULT_START_HOUR  # 模擬時間 0 對應的開工時刻
+    max_workstations: int = 20  # 每關卡工位數上限
+
+
+class AssignmentOptimizeRequest(BaseModel):
+    """檢修廠分配最佳化請求（分支定界，適用數十個批次以內的工單）"""
+    order_file: str
+    dispatch_rule: DispatchRule = DispatchRule.PRIORITY
+    start_hour: int = SimulationClock.DEFAULT_START_HOUR
+    time_limit: float = 10.0  # 搜尋時間上限（秒，不可超過 OPTIMIZE_TIME_LIMIT_MAX）
+    node_limit: int = 500000  # 搜尋節點上限
+
+
+class StreamSimulateRequest(BaseModel):
+    """串流模擬請求（排程記錄直接寫入檔案，不保留於記憶體，也不改變目前的排程結果）"""
+    order_file: str
+    sinks: List[str] = ["ndjson"]  # ndjson / sqlite / columnar；KPI 摘要一律返回
+    file_name: Optional[str] = None  # 輸出檔名（不含副檔名），存放於 EXPORT_DIR；預設為工單檔名
+    dispatch_rule: DispatchRule = DispatchRule.PRIORITY
+    start_hour: int = SimulationClock.DEFAULT_START_HOUR
+    # 逐筆讀取工單，依檔案順序分配並模擬（記憶體與工單大小無關；不排序，不可指定派工規則）
+    stream_orders: bool = False
+    order_date: Optional[str] = None  # stream_orders 時計算交期延遲的工單日期（YYYY-MM-DD），未提供則不計算
+
+
+class OnlineStartRequest(BaseModel):
+    """線上排程啟動請求"""
+    order_file: Optional[str] = None  # 開始時已知的工單（於時間 0 排入）
+    start_hour: int = SimulationClock.DEFAULT_START_HOUR
+    horizon: int = 480  # 排程時域（分鐘），同 OnlineScheduler.DEFAULT_HORIZON
+
+
+class OnlineBatchesRequest(BaseModel):
+    """線上排程新批次到達"""
+    current_time: int  # 目前模擬時間（分鐘）
+    batches: List[Batch]
+
+
+class OnlineAdvanceRequest(BaseModel):
+    """線上排程時間推進"""
+    current_time: int  # 目前模擬時間（分鐘）
+
+
+class ColumnarFileRequest(BaseModel):
+    """欄式排程檔請求"""
+    file_name: Optional[str] = None  # 預設: schedule.schcol，存放於 EXPORT_DIR
 
 
 class ScheduleResponse(BaseModel):
@@ -26,6 +135,13 @@ class ScheduleResponse(BaseModel):
     total_batches: int
     total_vehicles: int
     total_time: int
+    sequencing: Optional[dict] = None  # 換線排序前後的模擬總完工時間與產能（minimize_changeover）
+    staff_moves: Optional[int] = None  # 人員調動人次（flexible_staff）
+
+
+class HorizonScheduleResponse(ScheduleResponse):
+    """多日排程響應"""
+    days: List[dict] = []  # 每日摘要（批次數、完成時間、延續到隔日的分鐘數）
 
 
 @router.post("/schedule", response_model=ScheduleResponse)
@@ -34,40 +150,92 @@ async def create_schedule(request: ScheduleRequest):
     創建排程
     讀取工單並執行排程計算
     """
-    global _scheduler, _simulator, _current_result
+    global _scheduler, _simulator, _current_result, _clock, _online, _shared
+    from scheduler.sequencer import ChangeoverSequencer
+    from simulator.flow_shop_simulator import FlowShopSimulator
+    
+    if request.move_time < 0:
+        raise HTTPException(status_code=400, detail="調動時間不可為負")
     
     try:
+        _online = None
+        _shared = None
+        
         # 載入數據 - 數據文件在項目根目錄（backend的上一層）
-        import os
-        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        project_root = os.path.dirname(backend_dir)
-        loader = DataLoader(base_path=project_root)
+        loader = DataLoader(base_path=PROJECT_ROOT)
         vehicles_master = loader.load_vehicles_master()
-        order = loader.load_order(request.order_file)
+        station_names = loader.load_station_names()
+        
+        # 載入批次（NDJSON 工單逐段解析，只限制解析時的記憶體；批次仍全部載入以排序與模擬）
+        if request.order_file.lower().endswith(NDJSON_SUFFIXES):
+            order_id = request.order_file
+            batches = list(loader.iter_order_batches(request.order_file))
+            _clock = SimulationClock.from_batches(batches, request.start_hour)
+        else:
+            order = loader.load_order(request.order_file)
+            order_id = order.order_id
+            batches = order.batches
+            _clock = SimulationClock.from_order(order, request.start_hour)
         
-        # 初始化排程器
-        _scheduler = GreedyScheduler(vehicles_master)
+        # 批次分配（兩種格式使用相同的派工規則與分配方式）
+        if request.decompose:
+            from scheduler.decomposition import DecomposedScheduler
+            scheduler_class = DecomposedScheduler
+        else:
+            scheduler_class = GreedyScheduler
+        _scheduler = scheduler_class(
+            vehicles_master, station_names,
+            dispatch_rule=request.dispatch_rule,
+            clock=_clock
+        )
+        assigned_batches = _scheduler.assign_batches_to_stations(batches)
         
-        # 批次分配
-        assigned_batches = _scheduler.assign_batches_to_stations(order.batches)
+        # 換線排序：同車型批次相鄰，省去換線時間
+        sequencer = None
+        if request.minimize_changeover:
+            sequencer = ChangeoverSequencer(vehicles_master)
+            station_configs = {name: st.workstation_config for name, st in _scheduler.stations.items()}
+            makespan_before = sequencer.makespan(assigned_batches, station_configs)
+            assigned_batches = sequencer.sequence(assigned_batches)
         
         # 初始化模擬器
-        _simulator = FlowShopSimulator(vehicles_master, _scheduler.stations)
+        _simulator = FlowShopSimulator(
+            vehicles_master, _scheduler.stations,
+            flexible_staff=request.flexible_staff,
+            move_time=request.move_time
+        )
         
         # 模擬流水線
         _current_result = _simulator.simulate_all_batches(assigned_batches)
         
+        _publish_result()
+        
         # 計算總時間
         max_time = 0
         if _current_result["schedules"]:
             max_time = max(s.finish_time for s in _current_result["schedules"])
+        total_vehicles = sum(b.quantity for b in assigned_batches)
+        
+        sequencing = None
+        if sequencer is not None:
+            # 產能: 每小時完成車輛數
+            sequencing = {
+                "changeovers_skipped": sequencer.changeovers_skipped,
+                "makespan_before": makespan_before,
+                "makespan_after": max_time,
+                "makespan_delta": max_time - makespan_before,
+                "throughput_before": round(total_vehicles * 60 / makespan_before, 2) if makespan_before else 0.0,
+                "throughput_after": round(total_vehicles * 60 / max_time, 2) if max_time else 0.0,
+            }
         
         return ScheduleResponse(
             success=True,
-            message=f"排程完成: {order.order_id}",
+            message=f"排程完成: {order_id}",
             total_batches=len(assigned_batches),
-            total_vehicles=sum(b.quantity for b in assigned_batches),
-            total_time=max_time
+            total_vehicles=total_vehicles,
+            total_time=max_time,
+            sequencing=sequencing,
+            staff_moves=_simulator.staff_moves if request.flexible_staff else None
         )
     
     except FileNotFoundError:
@@ -76,38 +244,671 @@ async def create_schedule(request: ScheduleRequest):
         raise HTTPException(status_code=500, detail=f"排程失敗: {str(e)}")
 
 
+@router.post("/schedule/horizon", response_model=HorizonScheduleResponse)
+async def create_horizon_schedule(request: HorizonScheduleRequest):
+    """
+    多日排程
+    多張工單依日期在同一時域排程，隔日沿用前一日的工位可用時間與檢修廠配置
+    """
+    global _scheduler, _simulator, _current_result, _clock, _online, _shared
+    from scheduler.horizon_scheduler import HorizonScheduler
+    
+    try:
+        loader = DataLoader(base_path=PROJECT_ROOT)
+        if request.order_files:
+            orders = [loader.load_order(order_file) for order_file in request.order_files]
+        else:
+            orders = loader.load_all_orders()
+        
+        horizon = HorizonScheduler(
+            loader.load_vehicles_master(),
+            loader.load_station_names(),
+            dispatch_rule=request.dispatch_rule,
+            start_hour=request.start_hour
+        )
+        result = horizon.schedule(orders)
+        days = result.pop("days")
+        
+        _online = None
+        _shared = None
+        _scheduler = horizon.scheduler
+        _simulator = horizon.simulator
+        _clock = horizon.clock
+        _current_result = result
+        _publish_result()
+        
+        return HorizonScheduleResponse(
+            success=True,
+            message=f"多日排程完成: {', '.join(d['order_id'] for d in days)}",
+            total_batches=len(result["batches"]),
+            total_vehicles=sum(b.quantity for b in result["batches"]),
+            total_time=max((s.finish_time for s in result["schedules"]), default=0),
+            days=days
+        )
+    
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"找不到工單文件: {Path(e.filename).name}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"多日排程失敗: {str(e)}")
+
+
+@router.post("/online/start")
+async def start_online_schedule(request: OnlineStartRequest):
+    """
+    啟動線上排程
+    之後以 /api/online/batches 在任意時間點加入新批次
+    """
+    global _scheduler, _simulator, _current_result, _clock, _online, _shared
+    from scheduler.online_scheduler import OnlineScheduler
+    
+    try:
+        loader = DataLoader(base_path=PROJECT_ROOT)
+        vehicles_master = loader.load_vehicles_master()
+        online = OnlineScheduler(vehicles_master, loader.load_station_names(), request.horizon)
+        
+        stats = None
+        if request.order_file:
+            order = loader.load_order(request.order_file)
+            _clock = SimulationClock.from_order(order, request.start_hour)
+            stats = online.add_batches(order.batches, 0)
+        else:
+            _clock = None
+        
+        _online = online
+        _scheduler = online.scheduler
+        _simulator = None
+        _shared = None
+        _current_result = online.result()
+        _publish_result()
+        return {"success": True, "horizon": online.horizon, "update": stats}
+    
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"找不到工單文件: {request.order_file}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"線上排程啟動失敗: {str(e)}")
+
+
+@router.post("/online/batches")
+async def add_online_batches(request: OnlineBatchesRequest):
+    """
+    新批次到達
+    凍結已開工的工作，只重排新批次與尚未開工的批次
+    """
+    global _current_result, _clock, _online
+    
+    if _online is None:
+        raise HTTPException(status_code=404, detail="尚未啟動線上排程")
+    
+    try:
+        stats = _online.add_batches(request.batches, request.current_time)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"線上排程失敗: {str(e)}")
+    
+    if _clock is None:
+        _clock = SimulationClock.from_batches(_online.batches.values())
+    _current_result = _online.result()
+    _publish_result(defer=True)
+    return stats
+
+
+@router.post("/online/advance")
+async def advance_online_schedule(request: OnlineAdvanceRequest):
+    """
+    推進線上排程的時間（沒有新批次）
+    凍結已開工的工作，重排未開工的車輛與先前延後的批次
+    """
+    global _current_result
+    
+    if _online is None:
+        raise HTTPException(status_code=404, detail="尚未啟動線上排程")
+    
+    try:
+        stats = _online.advance(request.current_time)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"線上排程失敗: {str(e)}")
+    
+    _current_result = _online.result()
+    _publish_result(defer=True)
+    return stats
+
+
+@router.post("/dispatch/compare")
+async def compare_dispatch_rules(request: DispatchCompareRequest):
+    """
+    比較派工規則
+    以各規則排程工單並快速評估，依準時車輛數（其次總延遲）排序
+    """
+    from simulator.evaluator import build_batch_plans, evaluate_station
+    from analytics.tardiness import rule_summary
+    
+    try:
+        loader = DataLoader(base_path=PROJECT_ROOT)
+        vehicles_master = loader.load_vehicles_master()
+        station_names = loader.load_station_names()
+        order = loader.load_order(request.order_file)
+        clock = SimulationClock.from_order(order, request.start_hour)
+        
+        results = []
+        for rule in DispatchRule:
+            scheduler = GreedyScheduler(vehicles_master, station_names, dispatch_rule=rule, clock=clock)
+            batches = scheduler.assign_batches_to_stations([b.model_copy() for b in order.batches])
+            
+            finish_times = {}
+            for station_name, plans in build_batch_plans(batches, vehicles_master).items():
+                config = scheduler.stations[station_name].workstation_config
+                finish_times.update(evaluate_station(plans, config))
+            
+            summary = rule_summary(finish_times, batches, clock)
+            summary["rule"] = rule.value
+            results.append(summary)
+        
+        results.sort(key=lambda r: (-r["on_time_vehicles"], r["total_tardiness"], r["makespan"]))
+        return {
+            "order_id": order.order_id,
+            "best_rule": results[0]["rule"],
+            "rules": results
+        }
+    
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"找不到工單文件: {request.order_file}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"派工規則比較失敗: {str(e)}")
+
+
+@router.post("/capacity-plan", response_model=CapacityPlan)
+async def create_capacity_plan(request: CapacityPlanRequest):
+    """
+    產能規劃
+    依工單交期找出各檢修廠能準時完成的最少工位配置
+    """
+    from scheduler.capacity_planner import CapacityPlanner
+    
+    try:
+        loader = DataLoader(base_path=PROJECT_ROOT)
+        vehicles_master = loader.load_vehicles_master()
+        order = loader.load_order(request.order_file)
+        
+        scheduler = GreedyScheduler(vehicles_master, loader.load_station_names())
+        assigned_batches = scheduler.assign_batches_to_stations(order.batches)
+        
+        planner = CapacityPlanner(
+            vehicles_master,
+            SimulationClock.from_order(order, request.start_hour),
+            max_workstations=request.max_workstations
+        )
+        return planner.plan(assigned_batches, scheduler.stations)
+    
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"找不到工單文件: {request.order_file}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"產能規劃失敗: {str(e)}")
+
+
+@router.post("/optimize/assignment", response_model=AssignmentResult)
+def optimize_assignment(request: AssignmentOptimizeRequest):
+    """
+    檢修廠分配最佳化
+    計算總完工時間下界，以分支定界搜尋最佳分配，並回報貪婪排程與最佳解 / 下界的差距
+    （不改變目前的排程結果）
+    搜尋為 CPU 密集運算，以一般函式宣告由執行緒池執行，不阻塞事件迴圈與 WebSocket
+    """
+    from scheduler.branch_and_bound import AssignmentSolver
+    
+    if not 0 < request.time_limit <= OPTIMIZE_TIME_LIMIT_MAX:
+        raise HTTPException(status_code=400, detail=f"time_limit 須介於 0 與 {OPTIMIZE_TIME_LIMIT_MAX} 秒之間")
+    if request.node_limit <= 0:
+        raise HTTPException(status_code=400, detail="node_limit 須為正數")
+    
+    try:
+        loader = DataLoader(base_path=PROJECT_ROOT)
+        order = loader.load_order(request.order_file)
+        solver = AssignmentSolver(
+            loader.load_vehicles_master(),
+            loader.load_station_names(),
+            dispatch_rule=request.dispatch_rule,
+            clock=SimulationClock.from_order(order, request.start_hour),
+            time_limit=request.time_limit,
+            node_limit=request.node_limit
+        )
+        return solver.solve(order.batches)
+    
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"找不到工單文件: {request.order_file}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"分配最佳化失敗: {str(e)}")
+
+
+@router.post("/simulate/stream")
+async def simulate_stream(request: StreamSimulateRequest):
+    """
+    串流模擬
+    分配批次後逐筆產生排程記錄並寫入指定的輸出（NDJSON / SQLite / 欄式檔），
+    記憶體只保留批次與 KPI 彙總，適合很長的排程時域
+    stream_orders: 工單逐筆解析（NDJSON 或 JSON 的 batches 陣列）、分配後立即模擬，
+                   記憶體不隨工單大小成長；批次依檔案順序處理，
+                   每個批次以分配當下的工位配置模擬（之後批次擴充的工位不回溯）
+    """
+    from simulator.flow_shop_simulator import FlowShopSimulator
+    from simulator.sinks import NDJSONSink, SQLiteSink, ColumnarSink, KPISink, MultiSink
+    
+    unknown = set(request.sinks) - {"ndjson", "sqlite", "columnar"}
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"不支援的輸出: {', '.join(sorted(unknown))}")
+    clock = None
+    if request.stream_orders:
+        if "dispatch_rule" in request.model_fields_set:
+            raise HTTPException(status_code=400, detail="串流工單依檔案順序處理，不支援派工規則")
+        if request.order_date:
+            try:
+                clock = SimulationClock.from_date(request.order_date, request.start_hour)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"工單日期格式錯誤: {request.order_date}")
+    elif request.order_date:
+        raise HTTPException(status_code=400, detail="order_date 只用於 stream_orders")
+    
+    try:
+        loader = DataLoader(base_path=PROJECT_ROOT)
+        vehicles_master = loader.load_vehicles_master()
+        if request.stream_orders:
+            order_id = None
+            scheduler = GreedyScheduler(vehicles_master, loader.load_station_names(), clock=clock)
+            batches = scheduler.assign_batch_stream(loader.iter_order_batches(request.order_file))
+        else:
+            order = loader.load_order(request.order_file)
+            order_id = order.order_id
+            clock = SimulationClock.from_order(order, request.start_hour)
+            scheduler = GreedyScheduler(
+                vehicles_master, loader.load_station_names(),
+                dispatch_rule=request.dispatch_rule, clock=clock
+            )
+            batches = scheduler.assign_batches_to_stations(order.batches)
+        
+        stem = Path(request.file_name or Path(request.order_file).stem).name
+        factories = {
+            "ndjson": lambda: NDJSONSink(EXPORT_DIR / f"{stem}.ndjson"),
+            "sqlite": lambda: SQLiteSink(EXPORT_DIR / f"{stem}.sqlite"),
+            "columnar": lambda: ColumnarSink(EXPORT_DIR / f"{stem}.schcol", scheduler.stations),
+        }
+        sink = MultiSink(KPISink(clock), *(factories[name]() for name in dict.fromkeys(request.sinks)))
+        simulator = FlowShopSimulator(vehicles_master, scheduler.stations)
+        return {"order_id": order_id, **simulator.simulate_to_sink(batches, sink)}
+    
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"找不到工單文件: {request.order_file}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"串流模擬失敗: {str(e)}")
+
+
 @router.get("/result")
-async def get_schedule_result():
+async def get_schedule_result(accept: Optional[str] = Header(None),
+                              format: Optional[str] = Query(None)):
     """
     獲取排程結果
+    依 Accept 或 ?format= 回傳 JSON（預設）、欄式 JSON 或 MessagePack
     """
-    global _current_result
+    global _current_result, _encoded_results
     
-    if not _current_result:
+    fmt = _response_format(accept, format)
+    _sync_shared()
+    if _result_file is None and not _current_result and _columns is None:
         raise HTTPException(status_code=404, detail="尚未執行排程")
     
-    # 轉換為可序列化的格式
+    if fmt == "json":
+        if _result_file is not None:
+            # 已發布的結果直接回傳預先序列化的檔案
+            return FileResponse(_result_file, media_type="application/json", headers={"Vary": "Accept"})
+        if not _current_result:
+            # 由 /api/import 載入的欄式檔還原
+            return _columns.result_payload()
+        return _result_payload(_current_result)
+    
+    version, encoded = _encoded_results
+    if version != _state_cache.version:
+        encoded = {}
+        _encoded_results = (_state_cache.version, encoded)
+    content = encoded.get(fmt)
+    if content is None:
+        if _current_result:
+            payload = _result_payload(_current_result)
+        elif _result_file is not None:
+            payload = json.loads(_result_file.read_bytes())
+        else:
+            payload = jsonable_encoder(_columns.result_payload())
+        content = encode(columnar_result(payload), fmt)
+        encoded[fmt] = content
+    return Response(content=content, media_type=MEDIA_TYPES[fmt], headers={"Vary": "Accept"})
+
+
+def _response_format(accept: Optional[str], requested: Optional[str]) -> str:
+    """回應格式協商（msgpack 需安裝 msgpack 套件）"""
+    try:
+        fmt = negotiate_format(accept, requested)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if fmt == "msgpack":
+        try:
+            import msgpack  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=406, detail="伺服器未安裝 msgpack")
+    return fmt
+
+
+def _result_payload(result: dict) -> dict:
+    """轉換為可序列化的格式"""
     return {
-        "batches": [b.model_dump() for b in _current_result["batches"]],
-        "vehicles": [v.model_dump() for v in _current_result["vehicles"]],
-        "schedules": [s.model_dump() for s in _current_result["schedules"]],
-        "stations": [st.model_dump() for st in _current_result["stations"]]
+        "batches": [b.model_dump() for b in result["batches"]],
+        "vehicles": [v.model_dump() for v in result["vehicles"]],
+        "schedules": [s.model_dump() for s in result["schedules"]],
+        "stations": [st.model_dump() for st in result["stations"]]
     }
 
 
+@router.get("/analytics/tardiness")
+async def get_tardiness_report():
+    """
+    交期達成報表
+    每批次與每檢修廠的 lateness / tardiness 與準時產出
+    """
+    global _current_result, _clock
+    from analytics.tardiness import tardiness_report
+    
+    batches, _ = _assigned_batches_and_configs()
+    return tardiness_report(batches, _clock or SimulationClock.from_batches(batches))
+
+
+@router.get("/analytics/line-balancing")
+async def get_line_balancing_report(budget: Optional[int] = None):
+    """
+    工位平衡報表
+    比較各車型現行工位配置與在工位預算下節拍時間最小的配置之產能
+    budget: 每個檢修廠的工位預算（未指定時與現行配置的工位總數相同）
+    """
+    from analytics.line_balancing import balancing_report
+    
+    if budget is not None and budget < 1:
+        raise HTTPException(status_code=400, detail="工位預算必須大於 0")
+    
+    loader = DataLoader(base_path=PROJECT_ROOT)
+    return balancing_report(loader.load_vehicles_master(), budget)
+
+
+def _assigned_batches_and_configs():
+    """目前排程的批次與各檢修廠工位配置（本行程結果或共享結果）"""
+    _sync_shared()
+    if _current_result:
+        batches = _current_result["batches"]
+        station_configs = {st.station_name: st.workstation_config for st in _current_result["stations"]}
+    elif _shared is not None:
+        batches = _shared.batches
+        station_configs = {
+            st["name"]: [len(stage["workstations"]) for stage in st["stages"]]
+            for st in _shared.columns.stations
+        }
+    elif _columns is not None:
+        batches = [Batch.model_validate(b) for b in _columns.batches]
+        station_configs = {
+            st["name"]: [len(stage["workstations"]) for stage in st["stages"]]
+            for st in _columns.stations
+        }
+    else:
+        raise HTTPException(status_code=404, detail="尚未執行排程")
+    return batches, station_configs
+
+
+@router.get("/analytics/staff-reallocation")
+async def get_staff_reallocation_report(move_time: int = 0):
+    """
+    人員調動分析
+    各檢修廠總人數不變，換線時依新批次車型的平衡配置在關卡間調動人員，
+    與固定工位配置比較完工時間與產能
+    move_time: 人員調動到其他關卡所需時間（分鐘）
+    """
+    from analytics.line_balancing import reallocation_report
+    
+    if move_time < 0:
+        raise HTTPException(status_code=400, detail="調動時間不可為負")
+    
+    batches, station_configs = _assigned_batches_and_configs()
+    loader = DataLoader(base_path=PROJECT_ROOT)
+    return reallocation_report(batches, station_configs, loader.load_vehicles_master(), move_time)
+
+
+@router.get("/analytics/robustness")
+async def get_robustness_report(replications: int = 1000, cv: float = 0.1, seed: Optional[int] = None):
+    """
+    排程穩健度分析
+    關卡時間加入隨機變異（對數常態，變異係數 cv），固定目前的分配與工位配置模擬多次，
+    返回總完工時間與每批次完成時間的 P50 / P90 / P99 及準時機率
+    """
+    from analytics.robustness import robustness_report
+    
+    if not 1 <= replications <= 20000:
+        raise HTTPException(status_code=400, detail="模擬次數必須介於 1 到 20000")
+    if not 0 <= cv <= 1:
+        raise HTTPException(status_code=400, detail="變異係數必須介於 0 到 1")
+    
+    batches, station_configs = _assigned_batches_and_configs()
+    loader = DataLoader(base_path=PROJECT_ROOT)
+    return robustness_report(
+        batches, station_configs, loader.load_vehicles_master(),
+        _clock or SimulationClock.from_batches(batches),
+        replications=replications, cv=cv, seed=seed
+    )
+
+
+@router.get("/analytics/critical-path")
+async def get_critical_path_report(batch_id: Optional[str] = None):
+    """
+    關鍵路徑與阻塞分析
+    由排程記錄還原每筆工作的等待原因（工位忙碌 / 等待上游），
+    返回各批次的關鍵路徑組成與各關卡、檢修廠×關卡的阻塞時間
+    batch_id: 指定時附上該批次關鍵路徑的逐筆記錄
+    """
+    from analytics.critical_path import critical_path_report
+    
+    batches, _ = _assigned_batches_and_configs()
+    report = critical_path_report(_schedule_table("current"), batches, batch_id)
+    if batch_id is not None and report.get("path") is None:
+        raise HTTPException(status_code=404, detail=f"找不到批次: {batch_id}")
+    return report
+
+
 @router.get("/state/{time}")
-async def get_state_at_time(time: int):
+async def get_state_at_time(time: int,
+                            if_none_match: Optional[str] = Header(None),
+                            accept: Optional[str] = Header(None),
+                            format: Optional[str] = Query(None)):
     """
     獲取指定時間點的狀態
     用於視覺化
+    相同事件區間內的時間點共用快取，並支援 ETag / If-None-Match
+    依 Accept 或 ?format= 回傳 JSON（預設）、欄式 JSON 或 MessagePack
     """
-    global _simulator
+    fmt = _response_format(accept, format)
+    _sync_shared()
+    source = _state_source()
+    if source is None:
+        raise HTTPException(status_code=404, detail="尚未執行排程")
     
-    if not _simulator:
+    etag = _state_cache.etag(time, fmt)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    content = _state_cache.get(time, source.get_state_at_time, fmt)
+    return Response(content=content, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+@router.get("/vehicles/{vehicle_id}/timeline")
+async def get_vehicle_timeline(vehicle_id: str, time: Optional[int] = None):
+    """
+    車輛各關卡排程
+    指定 time 時附上該時間點所在的關卡與工位
+    """
+    _sync_shared()
+    source = _state_source()
+    if source is None:
         raise HTTPException(status_code=404, detail="尚未執行排程")
     
-    state = _simulator.get_state_at_time(time)
-    return state
+    timeline = source.index.vehicle_timeline(vehicle_id, time)
+    if timeline is None:
+        raise HTTPException(status_code=404, detail=f"找不到車輛: {vehicle_id}")
+    return timeline
+
+
+@router.get("/batches/{batch_id}/progress")
+async def get_batch_progress(batch_id: str, time: Optional[int] = None):
+    """
+    批次進度與累積完成曲線
+    指定 time 時附上該時間點已完成 / 進行中 / 等待中的車輛數
+    """
+    _sync_shared()
+    source = _state_source()
+    if source is None:
+        raise HTTPException(status_code=404, detail="尚未執行排程")
+    
+    progress = source.index.batch_progress(batch_id, time)
+    if progress is None:
+        raise HTTPException(status_code=404, detail=f"找不到批次: {batch_id}")
+    if _clock is not None:
+        progress["finish_at"] = _clock.to_datetime(progress["finish_time"]).isoformat()
+    return progress
+
+
+def encoded_state(time: int, fmt: str = "json") -> Optional[bytes]:
+    """
+    指定時間點的狀態（已編碼，經狀態快取）
+    供 WebSocket 推送使用；尚未排程時返回 None
+    """
+    _sync_shared()
+    source = _state_source()
+    if source is None:
+        return None
+    return _state_cache.get(time, source.get_state_at_time, fmt)
+
+
+def _state_source():
+    """目前提供狀態查詢的來源（模擬器、線上排程、共享排程或欄式檔）"""
+    if _simulator:
+        return _simulator
+    if _online is not None:
+        return _online
+    if _shared is not None:
+        return _shared
+    return _columns
+
+
+def _reset_state_cache():
+    """排程變更後更新狀態快取的版本與事件邊界"""
+    source = _state_source()
+    if source is None:
+        return
+    if source is _columns or source is _shared:
+        columns = source.columns
+        event_times = columns["start_time"].tolist() + columns["finish_time"].tolist()
+    else:
+        event_times = [t for s in source.schedules for t in (s.start_time, s.finish_time)]
+    _state_cache.reset(event_times, _shared_version if _result_file is not None else None)
+
+
+def _get_shared_store():
+    """多 worker 共享結果儲存（未啟用、平台不支援或目錄無法建立時返回 None）"""
+    global _shared_store, SHARED_DIR
+    if _shared_store is None and SHARED_DIR:
+        from storage.shared_store import SharedResultStore
+        try:
+            _shared_store = SharedResultStore(SHARED_DIR)
+        except (ImportError, OSError):
+            # Windows（無 fcntl）、唯讀檔案系統等: 停用共享，結果只由本行程提供
+            SHARED_DIR = None
+    return _shared_store
+
+
+def _publish_result(defer: bool = False):
+    """
+    排程變更後更新狀態快取，並發布結果給其他 worker（啟用共享時）
+    回應以 FastAPI 相同的 JSON 格式預先序列化，之後 /api/result 直接回傳檔案
+    defer: 延遲 SHARED_PUBLISH_INTERVAL 秒於事件迴圈中發布，期間內的變更只寫檔一次
+    """
+    global _result_file, _published_schedules, _previous_schedules, _publish_handle
+    
+    _previous_schedules = _published_schedules
+    _published_schedules = _current_result["schedules"]
+    # 發布前 /api/result 由記憶體中的結果回應
+    _result_file = None
+    
+    store = _get_shared_store()
+    if store is not None:
+        if not defer:
+            _cancel_publish()
+            _write_shared(store)
+        elif _publish_handle is None:
+            _publish_handle = asyncio.get_running_loop().call_later(SHARED_PUBLISH_INTERVAL, _flush_publish)
+    _reset_state_cache()
+
+
+def _write_shared(store):
+    """寫入共享儲存的新版本"""
+    global _shared_version, _result_file
+    content = json.dumps(
+        jsonable_encoder(_result_payload(_current_result)),
+        ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+    _shared_version = store.publish(
+        _current_result["schedules"],
+        _current_result["batches"],
+        _current_result["stations"],
+        content,
+        _clock.origin.isoformat() if _clock else None
+    )
+    _result_file = store.result_path(_shared_version)
+
+
+def _flush_publish():
+    """延遲發布: 寫入期間內最後的結果（結果已被其他來源取代時略過）"""
+    global _publish_handle
+    _publish_handle = None
+    store = _get_shared_store()
+    if store is None or not _current_result:
+        return
+    _write_shared(store)
+    _reset_state_cache()
+
+
+def _cancel_publish():
+    """取消尚未執行的延遲發布"""
+    global _publish_handle
+    if _publish_handle is not None:
+        _publish_handle.cancel()
+        _publish_handle = None
+
+
+def _sync_shared():
+    """其他 worker 發布了較新的共享排程時，改由共享排程提供查詢"""
+    global _scheduler, _simulator, _current_result, _columns, _online, _clock
+    global _shared, _shared_version, _result_file
+    
+    store = _get_shared_store()
+    if store is None:
+        return
+    shared = store.current()
+    if shared is None or (_shared_version is not None and shared.version <= _shared_version):
+        return
+    
+    _scheduler = None
+    _simulator = None
+    _online = None
+    _current_result = None
+    _columns = None
+    _shared = shared
+    _shared_version = shared.version
+    _result_file = shared.result_path
+    _clock = SimulationClock(datetime.fromisoformat(shared.clock_origin)) if shared.clock_origin else None
+    _reset_state_cache()
 
 
 @router.get("/stations")
@@ -120,3 +921,143 @@ async def get_stations():
     
     stations = _scheduler.get_all_stations()
     return [s.model_dump() for s in stations]
+
+
+def _columnar_path(file_name: Optional[str]) -> Path:
+    """欄式排程檔路徑（僅允許 EXPORT_DIR 下的檔名）"""
+    return EXPORT_DIR / Path(file_name or "schedule.schcol").name
+
+
+@router.post("/export")
+async def export_schedule(request: ColumnarFileRequest):
+    """
+    匯出排程結果為欄式二進位檔
+    供重啟後或其他行程以記憶體映射重新載入
+    """
+    global _current_result
+    from storage.columnar import write_schedule_columns
+    
+    if not _current_result:
+        raise HTTPException(status_code=404, detail="尚未執行排程")
+    
+    path = write_schedule_columns(
+        _columnar_path(request.file_name),
+        _current_result["schedules"],
+        _current_result["batches"],
+        _current_result["stations"]
+    )
+    return {
+        "file_name": path.name,
+        "size": path.stat().st_size,
+        "rows": len(_current_result["schedules"])
+    }
+
+
+def _schedule_table(source: str):
+    """
+    來源的排程表（欄位陣列）
+    current: 目前的排程
+    previous: 本行程前一次發布的排程；目前排程來自其他 worker 時為共享儲存中的前一個版本
+    其他: EXPORT_DIR 下的欄式排程檔
+    """
+    from storage.schedule_diff import schedule_table
+    
+    if source == "previous":
+        _sync_shared()
+        if _shared is None and _previous_schedules is not None:
+            return schedule_table(_previous_schedules)
+        version = None
+        if _shared is not None:
+            version = _shared.version - 1
+        elif _current_result and _shared_version is not None:
+            # 本行程的排程: 已發布時比較前一個版本，尚未發布時比較最近發布的版本
+            version = _shared_version - 1 if _result_file is not None else _shared_version
+        store = _get_shared_store()
+        if store is None or not version:
+            raise HTTPException(status_code=404, detail="沒有前一版排程")
+        return _columnar_table(store.columnar_path(version), "沒有前一版排程")
+    if source == "current":
+        _sync_shared()
+        if _current_result:
+            return schedule_table(_current_result["schedules"])
+        columns = _columns if _columns is not None else (_shared.columns if _shared is not None else None)
+        if columns is None:
+            raise HTTPException(status_code=404, detail="尚未執行排程")
+        return schedule_table(columns)
+    
+    path = _columnar_path(source)
+    return _columnar_table(path, f"找不到排程檔: {path.name}")
+
+
+def _columnar_table(path: Path, missing_detail: str):
+    """欄式排程檔的排程表（檔案不存在時回應 404）"""
+    from storage.columnar import ScheduleColumns
+    from storage.schedule_diff import schedule_table
+    
+    try:
+        columns = ScheduleColumns(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=missing_detail)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return schedule_table(columns)
+    finally:
+        columns.close()
+
+
+@router.get("/diff")
+async def diff_schedule(base: str = "previous", target: str = "current", limit: Optional[int] = 1000):
+    """
+    比較兩個排程版本
+    依 (vehicle_id, stage_number) 合併，只返回改變的分配、時間位移與批次完成時間差
+    base / target: current、previous（多 worker 時可為其他 worker 發布的前一個共享版本）
+                   或 EXPORT_DIR 下的欄式排程檔名
+    limit: 每個列表最多返回的筆數
+    """
+    from storage.schedule_diff import diff_schedules
+    
+    if limit is not None and limit < 0:
+        raise HTTPException(status_code=400, detail="limit 不可為負")
+    result = diff_schedules(_schedule_table(base), _schedule_table(target), limit)
+    return {"base": base, "target": target, **result}
+
+
+@router.post("/import")
+async def import_schedule(request: ColumnarFileRequest):
+    """
+    以記憶體映射載入欄式排程檔
+    載入後 /api/state/{time} 直接由映射欄位提供
+    """
+    global _scheduler, _simulator, _current_result, _columns, _online
+    global _shared, _shared_version, _result_file
+    from storage.columnar import ScheduleColumns
+    
+    path = _columnar_path(request.file_name)
+    try:
+        columns = ScheduleColumns(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"找不到排程檔: {path.name}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if _columns is not None:
+        _columns.close()
+    _online = None
+    _scheduler = None
+    _simulator = None
+    _shared = None
+    _current_result = None
+    _result_file = None
+    _columns = columns
+    # 之後只採用比載入當下更新的共享排程
+    store = _get_shared_store()
+    latest = store.current() if store is not None else None
+    if latest is not None:
+        _shared_version = latest.version
+    _reset_state_cache()
+    return {
+        "file_name": path.name,
+        "rows": columns.row_count,
+        "total_time": columns.max_time
+    }
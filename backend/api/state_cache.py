@@ -0,0 +1,81 @@
+import os
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from api.encoding import encode, columnar_stations, prepend_fields
+
+
+class StateCache:
+    """
+    /api/state/{time} 回應快取（LRU）
+
+    狀態只在排程事件（任一工序開始或結束）時改變，
+    因此以 (排程版本, 時間所在的事件區間, 格式) 為鍵快取序列化後的 stations 內容；
+    同一區間內的任何時間點共用同一份 bytes，ETag 亦相同
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.version = ""
+        self._resets = 0
+        # 行程識別（容器重啟後 PID 可能相同，因此使用隨機值）
+        self._instance = os.urandom(4).hex()
+        self._boundaries: List[int] = []
+        self._entries: "OrderedDict[Tuple[str, int, str], bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def reset(self, event_times: Iterable[int], shared_version: Optional[int] = None):
+        """
+        排程變更：更新版本與事件邊界並清除快取
+        shared_version: 多 worker 共享結果的版本號，各 worker 對同一版本產生相同的 ETag；
+                        未共享時以行程識別區分，避免不同 worker 或重啟前後的版本號相撞
+        """
+        self._resets += 1
+        if shared_version is None:
+            self.version = f"{self._instance}.{self._resets}"
+        else:
+            self.version = f"s{shared_version}"
+        self._boundaries = sorted(set(event_times))
+        self._entries.clear()
+
+    def interval(self, time: int) -> int:
+        """時間點所在的事件區間編號"""
+        return bisect_right(self._boundaries, time)
+
+    def etag(self, time: int, fmt: str = "json") -> str:
+        suffix = "" if fmt == "json" else f"-{fmt}"
+        return f'W/"{self.version}-{self.interval(time)}{suffix}"'
+
+    def get(self, time: int, build: Callable[[int], Dict], fmt: str = "json") -> bytes:
+        """
+        取得指定時間點狀態的編碼內容（格式見 api.encoding）
+        快取未命中時呼叫 build(time) 產生狀態
+        """
+        key = (self.version, self.interval(time), fmt)
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            stations = build(time)["stations"]
+            if fmt == "json":
+                body = encode({"stations": stations}, fmt)
+            else:
+                body = encode(columnar_stations(stations), fmt)
+            self._entries[key] = body
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+        return prepend_fields(body, fmt, {"time": time})
+
+    def stats(self) -> Dict:
+        return {
+            "version": self.version,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,116 @@
+"""
+冷啟動效能測試
+啟動 uvicorn 子行程，量測從行程啟動到第一次 /api/schedule 成功回應的時間，
+比較有無車型目錄快照（CATALOG_SNAPSHOT=0 停用）；
+另量測 import main 的時間，並列出應於端點內延遲載入卻在啟動時載入的模組
+
+執行: cd backend && python -m benchmarks.bench_cold_start [重複次數]
+"""
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from catalog_snapshot import build_catalog_snapshot
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = BACKEND_DIR.parent
+ORDER_FILE = "test_orders_001.json"
+STARTUP_TIMEOUT = 60.0  # 秒
+POLL_INTERVAL = 0.01  # 秒
+# 應於端點內延遲載入的模組（啟動時不應出現）
+DEFERRED_MODULES = ("numpy", "simulator.flow_shop_simulator", "simulator.evaluator",
+                    "scheduler.sequencer", "scheduler.capacity_planner", "scheduler.branch_and_bound",
+                    "scheduler.online_scheduler", "storage", "analytics")
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+prefixes = tuple(json.loads(sys.argv[1]))
+loaded = sorted(m for m in sys.modules if m in prefixes or m.startswith(tuple(p + "." for p in prefixes)))
+print(json.dumps({"import": elapsed, "loaded": loaded}))
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def first_schedule_time(use_snapshot: bool) -> dict:
+    """
+    啟動伺服器並反覆呼叫 /api/schedule 直到成功
+    返回: 到第一次成功回應的總時間與第一次排程請求本身的耗時（秒）
+    """
+    port = free_port()
+    env = dict(os.environ, CATALOG_SNAPSHOT="1" if use_snapshot else "0")
+    body = json.dumps({"order_file": ORDER_FILE}).encode()
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < STARTUP_TIMEOUT:
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn 啟動失敗")
+            request = urllib.request.Request(
+                f"http://127.0.0.1:{port}/api/schedule", data=body,
+                headers={"Content-Type": "application/json"}, method="POST",
+            )
+            sent = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=STARTUP_TIMEOUT) as response:
+                    response.read()
+            except (ConnectionError, urllib.error.URLError):
+                time.sleep(POLL_INTERVAL)
+                continue
+            finished = time.perf_counter()
+            return {"ready": finished - started, "first_request": finished - sent}
+        raise RuntimeError("等待 /api/schedule 逾時")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def import_time() -> dict:
+    """新行程中 import main 的時間（秒）與已載入的延遲模組"""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE, json.dumps(DEFERRED_MODULES)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    path = build_catalog_snapshot(PROJECT_ROOT)
+    print(f"車型目錄快照: {path.name} ({path.stat().st_size} bytes)")
+    print(f"重複 {repeats} 次，取中位數\n")
+
+    probes = [import_time() for _ in range(repeats)]
+    print(f"import main: {statistics.median(p['import'] for p in probes) * 1000:.1f} ms")
+    print(f"啟動時載入的延遲模組: {', '.join(probes[-1]['loaded']) or '無'}\n")
+    print(f"{'模式':<10}{'啟動到首次排程 (ms)':>22}{'首次排程請求 (ms)':>20}")
+
+    for label, use_snapshot in [("JSON", False), ("快照", True)]:
+        runs = [first_schedule_time(use_snapshot) for _ in range(repeats)]
+        ready = statistics.median(r["ready"] for r in runs) * 1000
+        first_request = statistics.median(r["first_request"] for r in runs) * 1000
+        print(f"{label:<10}{ready:>22.1f}{first_request:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
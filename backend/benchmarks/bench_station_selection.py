@@ -0,0 +1,103 @@
+"""
+檢修廠選擇效能測試
+比較 heap 選擇與原本線性掃描在 5 / 50 / 500 個檢修廠下的分配時間，並驗證兩者結果一致
+
+執行: cd backend && python -m benchmarks.bench_station_selection [批次數]
+"""
+import random
+import sys
+import time
+from typing import Dict, List
+
+from models.batch import Batch
+from models.vehicle import VehicleMaster
+from scheduler.greedy_scheduler import GreedyScheduler
+
+
+STATION_COUNTS = [5, 50, 500]
+MODEL_COUNT = 200
+
+
+def build_catalog(station_names: List[str], rng: random.Random) -> Dict:
+    """
+    產生合成車型主數據，每個車型隨機指定 2 個偏好檢修廠
+    其中一成車型的偏好檢修廠不在清單中，需從所有檢修廠挑選
+    """
+    vehicles = {}
+    for i in range(MODEL_COUNT):
+        if i % 10 == 0:
+            preferred = ["停用檢修廠_A", "停用檢修廠_B"]
+        else:
+            preferred = rng.sample(station_names, 2)
+        vehicle = VehicleMaster(
+            manufacturer="BENCH",
+            model=f"M{i:03d}",
+            inspection_times=[rng.randint(5, 60) for _ in range(5)],
+            preferred_stations=preferred,
+        )
+        vehicles[(vehicle.manufacturer, vehicle.model)] = vehicle
+    return vehicles
+
+
+def build_batches(count: int, rng: random.Random) -> List[Batch]:
+    return [
+        Batch(
+            batch_id=f"B{i:06d}",
+            manufacturer="BENCH",
+            model=f"M{rng.randrange(MODEL_COUNT):03d}",
+            quantity=rng.randint(5, 20),
+            system="其他",
+        )
+        for i in range(count)
+    ]
+
+
+class LinearScanScheduler(GreedyScheduler):
+    """原本的線性掃描選擇（每個候選檢修廠重新估算處理時間）"""
+
+    def _select_best_station(self, batch, vehicle, workstation_config, setup_time):
+        candidate_stations = [
+            self.stations[name] for name in vehicle.preferred_stations if name in self.stations
+        ]
+        if not candidate_stations:
+            candidate_stations = list(self.stations.values())
+
+        scores = {}
+        for station in candidate_stations:
+            estimated_time = self._estimate_process_time(vehicle, batch.quantity, workstation_config)
+            finish_time = setup_time + estimated_time
+            preference_bonus = 1.0 if station.station_name in vehicle.preferred_stations else 1.2
+            load_penalty = 1.0 + (station.total_batches * 0.1)
+            scores[station.station_name] = finish_time * preference_bonus * load_penalty
+        return self.stations[min(scores, key=scores.get)]
+
+
+def run(scheduler_cls, vehicles, station_names, batches):
+    scheduler = scheduler_cls(vehicles, station_names)
+    batches = [b.model_copy() for b in batches]
+    start = time.perf_counter()
+    scheduler.assign_batches_to_stations(batches)
+    elapsed = time.perf_counter() - start
+    return elapsed, [b.assigned_station for b in batches]
+
+
+def main():
+    batch_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"批次數: {batch_count}")
+    print(f"{'檢修廠數':>8} {'heap (s)':>10} {'線性 (s)':>10} {'µs/批次':>10} {'結果一致':>8}")
+
+    for station_count in STATION_COUNTS:
+        rng = random.Random(station_count)
+        station_names = [f"檢修廠_{i:03d}" for i in range(station_count)]
+        vehicles = build_catalog(station_names, rng)
+        batches = build_batches(batch_count, rng)
+
+        heap_time, heap_result = run(GreedyScheduler, vehicles, station_names, batches)
+        linear_time, linear_result = run(LinearScanScheduler, vehicles, station_names, batches)
+
+        print(f"{station_count:>8} {heap_time:>10.3f} {linear_time:>10.3f} "
+              f"{heap_time / batch_count * 1e6:>10.1f} {str(heap_result == linear_result):>8}")
+
+
+if __name__ == "__main__":
+    main()
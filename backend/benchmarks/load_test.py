@@ -0,0 +1,253 @@
+"""
+API 與 WebSocket 負載測試
+於本機啟動 FastAPI（uvicorn 執行於背景執行緒與獨立事件迴圈），同時驅動:
+  - 排程者: 反覆 POST /api/schedule
+  - 看板: 輪詢 GET /api/state/{time}
+  - 模擬播放: /ws/simulation 連線，反覆 seek + play 並等待對應時間的狀態推送
+回報各操作的延遲百分位數、吞吐量、錯誤率與伺服器事件迴圈延遲；
+超過門檻（--max-p99-ms / --max-error-rate / --max-loop-lag-ms）時以非 0 結束，可用於部署前檢查
+
+需安裝 httpx: pip install httpx（websockets 已列於 requirements.txt）
+
+執行: cd backend && python -m benchmarks.load_test --planners 2 --viewers 20 --ws 10 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from typing import Dict, List
+
+import numpy as np
+import uvicorn
+
+from main import app
+
+
+LAG_INTERVAL = 0.01  # 事件迴圈延遲取樣間隔（秒）
+REQUEST_TIMEOUT = 30.0  # 秒
+
+
+class Recorder:
+    """各操作的延遲與錯誤統計"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, operation: str, seconds: float):
+        self.latencies.setdefault(operation, []).append(seconds)
+
+    def error(self, operation: str):
+        self.errors[operation] = self.errors.get(operation, 0) + 1
+
+    def summary(self, elapsed: float) -> List[Dict]:
+        rows = []
+        for operation in sorted(set(self.latencies) | set(self.errors)):
+            latencies = np.array(self.latencies.get(operation, []), dtype=np.float64) * 1000
+            errors = self.errors.get(operation, 0)
+            total = latencies.size + errors
+            rows.append({
+                "operation": operation,
+                "count": int(latencies.size),
+                "errors": errors,
+                "error_rate": errors / total if total else 0.0,
+                "throughput": latencies.size / elapsed,
+                **_percentiles(latencies),
+            })
+        return rows
+
+
+def _percentiles(values_ms: np.ndarray) -> Dict[str, float]:
+    if values_ms.size == 0:
+        return {"p50_ms": 0.0, "p90_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    p50, p90, p99 = np.percentile(values_ms, [50, 90, 99])
+    return {"p50_ms": float(p50), "p90_ms": float(p90), "p99_ms": float(p99), "max_ms": float(values_ms.max())}
+
+
+class ServerThread:
+    """
+    在背景執行緒以獨立事件迴圈執行 uvicorn
+    同一迴圈上另有延遲監測工作: 每次 sleep(LAG_INTERVAL) 實際多睡的時間即為迴圈被阻塞的時間
+    """
+
+    def __init__(self, port: int):
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+        self.server = uvicorn.Server(config)
+        self.lags: List[float] = []
+        self.measuring = False
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True)
+
+    async def _serve(self):
+        monitor = asyncio.create_task(self._monitor_lag())
+        try:
+            await self.server.serve()
+        finally:
+            monitor.cancel()
+
+    async def _monitor_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            if self.measuring:
+                self.lags.append(max(0.0, loop.time() - started - LAG_INTERVAL))
+
+    def start(self):
+        self._thread.start()
+        deadline = time.perf_counter() + REQUEST_TIMEOUT
+        while not self.server.started:
+            if not self._thread.is_alive() or time.perf_counter() > deadline:
+                raise RuntimeError("uvicorn 啟動失敗")
+            time.sleep(0.01)
+
+    def stop(self):
+        self.server.should_exit = True
+        self._thread.join()
+
+
+async def planner(client, recorder: Recorder, order_files: List[str], stop: float):
+    """排程者: 輪流以不同工單重新排程"""
+    i = 0
+    while time.perf_counter() < stop:
+        body = {"order_file": order_files[i % len(order_files)]}
+        started = time.perf_counter()
+        try:
+            response = await client.post("/api/schedule", json=body)
+            response.raise_for_status()
+            recorder.record("POST /api/schedule", time.perf_counter() - started)
+        except Exception:
+            recorder.error("POST /api/schedule")
+        i += 1
+
+
+async def viewer(client, recorder: Recorder, max_time: int, interval: float, stop: float, rng: random.Random):
+    """看板: 以固定間隔查詢隨機時間點的狀態"""
+    while time.perf_counter() < stop:
+        started = time.perf_counter()
+        try:
+            response = await client.get(f"/api/state/{rng.randrange(max_time)}")
+            response.raise_for_status()
+            recorder.record("GET /api/state", time.perf_counter() - started)
+        except Exception:
+            recorder.error("GET /api/state")
+        await asyncio.sleep(interval)
+
+
+async def ws_session(url: str, recorder: Recorder, max_time: int, stop: float, rng: random.Random):
+    """
+    模擬播放: 反覆 seek + play，量測送出 seek 到收到該時間狀態推送的延遲
+    （播放到結尾會自動暫停，因此每次 seek 後都再送 play）
+    """
+    import websockets
+
+    try:
+        async with websockets.connect(url) as ws:
+            await ws.send(json.dumps({"command": "set_max_time", "value": max_time}))
+            await ws.send(json.dumps({"command": "speed", "value": 4}))
+            while time.perf_counter() < stop:
+                target = rng.randrange(max_time - 10)
+                started = time.perf_counter()
+                await ws.send(json.dumps({"command": "seek", "time": target}))
+                await ws.send(json.dumps({"command": "play"}))
+                try:
+                    while json.loads(await asyncio.wait_for(ws.recv(), REQUEST_TIMEOUT)).get("time") != target:
+                        pass
+                except asyncio.TimeoutError:
+                    recorder.error("WS seek")
+                    continue
+                recorder.record("WS seek", time.perf_counter() - started)
+    except Exception:
+        recorder.error("WS seek")
+
+
+async def run_load(args, port: int, recorder: Recorder, server: ServerThread) -> float:
+    import httpx
+
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=args.planners + args.viewers + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=REQUEST_TIMEOUT, limits=limits) as client:
+        # 先排程一次，看板查詢才有資料
+        response = await client.post("/api/schedule", json={"order_file": args.order_files[0]})
+        response.raise_for_status()
+        max_time = max(response.json()["total_time"], 20)
+
+        rng = random.Random(args.seed)
+        server.measuring = True
+        started = time.perf_counter()
+        stop = started + args.duration
+        tasks = [planner(client, recorder, args.order_files, stop) for _ in range(args.planners)]
+        tasks += [
+            viewer(client, recorder, max_time, args.poll_interval, stop, random.Random(rng.random()))
+            for _ in range(args.viewers)
+        ]
+        tasks += [
+            ws_session(f"ws://127.0.0.1:{port}/ws/simulation", recorder, max_time, stop, random.Random(rng.random()))
+            for _ in range(args.ws)
+        ]
+        await asyncio.gather(*tasks)
+        server.measuring = False
+        return time.perf_counter() - started
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="API 與 WebSocket 負載測試")
+    parser.add_argument("--planners", type=int, default=2, help="同時排程的客戶端數")
+    parser.add_argument("--viewers", type=int, default=20, help="輪詢狀態的看板數")
+    parser.add_argument("--ws", type=int, default=5, help="WebSocket 播放連線數")
+    parser.add_argument("--duration", type=float, default=10.0, help="測試時間（秒）")
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="看板輪詢間隔（秒）")
+    parser.add_argument("--order-files", nargs="+", default=["test_orders_001.json", "test_orders_002.json"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="任一操作 p99 延遲上限")
+    parser.add_argument("--max-error-rate", type=float, default=0.0, help="任一操作錯誤率上限")
+    parser.add_argument("--max-loop-lag-ms", type=float, default=None, help="事件迴圈延遲 p99 上限")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    port = free_port()
+    recorder = Recorder()
+    server = ServerThread(port)
+    server.start()
+    try:
+        elapsed = asyncio.run(run_load(args, port, recorder, server))
+    finally:
+        server.stop()
+
+    print(f"排程者 {args.planners}、看板 {args.viewers}、WebSocket {args.ws}，測試 {elapsed:.1f} 秒\n")
+    print(f"{'操作':<22}{'次數':>8}{'錯誤率':>8}{'次/秒':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  (ms)")
+    rows = recorder.summary(elapsed)
+    for row in rows:
+        print(f"{row['operation']:<22}{row['count']:>8}{row['error_rate']:>8.1%}{row['throughput']:>9.1f}"
+              f"{row['p50_ms']:>9.1f}{row['p90_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}")
+
+    lag = _percentiles(np.array(server.lags, dtype=np.float64) * 1000)
+    print(f"\n事件迴圈延遲 (ms): p50 {lag['p50_ms']:.1f}  p90 {lag['p90_ms']:.1f}  "
+          f"p99 {lag['p99_ms']:.1f}  max {lag['max_ms']:.1f}")
+
+    failures = []
+    for row in rows:
+        if row["error_rate"] > args.max_error_rate:
+            failures.append(f"{row['operation']} 錯誤率 {row['error_rate']:.1%}")
+        if args.max_p99_ms is not None and row["p99_ms"] > args.max_p99_ms:
+            failures.append(f"{row['operation']} p99 {row['p99_ms']:.1f} ms")
+    if args.max_loop_lag_ms is not None and lag["p99_ms"] > args.max_loop_lag_ms:
+        failures.append(f"事件迴圈延遲 p99 {lag['p99_ms']:.1f} ms")
+    if failures:
+        print("\n超過門檻: " + "；".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+車型目錄快照
+部署建置時把 vehicles_data.json 編譯成 marshal 二進位快照（含預先計算的工位配置），
+啟動時以 model_construct 直接建立 VehicleMaster，省去 JSON 解析與 pydantic 驗證
+
+建置: cd backend && python catalog_snapshot.py [專案根目錄]
+"""
+import hashlib
+import marshal
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from models.vehicle import VehicleMaster
+
+
+SNAPSHOT_FILE = "vehicles_data.snapshot"
+SOURCE_FILE = "vehicles_data.json"
+SNAPSHOT_MAGIC = b"SCHCAT01"
+# 設為 0 時停用快照（例如比較冷啟動時間）
+SNAPSHOT_ENV = "CATALOG_SNAPSHOT"
+
+# 已載入的快照: {快照路徑: (來源 SHA-256, 車型字典)}，車型主數據唯讀，可跨請求共用
+_loaded: Dict[Path, Tuple[str, Dict[Tuple[str, str], VehicleMaster]]] = {}
+
+
+def build_catalog_snapshot(base_path: Path) -> Path:
+    """
+    由 vehicles_data.json 建立快照
+    每個車型存為 (manufacturer, model, inspection_times, preferred_stations, system, workstations)，
+    並記錄來源檔的 SHA-256 供載入時檢查是否過期
+    """
+    from data_loader import DataLoader
+
+    base_path = Path(base_path)
+    source = (base_path / SOURCE_FILE).read_bytes()
+    vehicles = DataLoader(base_path).load_vehicles_master(use_snapshot=False)
+
+    payload = {
+        "source_sha256": hashlib.sha256(source).hexdigest(),
+        "vehicles": [
+            (
+                v.manufacturer,
+                v.model,
+                list(v.inspection_times),
+                list(v.preferred_stations),
+                v.system,
+                v.calculate_workstations(),
+            )
+            for v in vehicles.values()
+        ],
+    }
+
+    path = base_path / SNAPSHOT_FILE
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        marshal.dump(payload, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_catalog_snapshot(base_path: Path) -> Optional[Dict[Tuple[str, str], VehicleMaster]]:
+    """
+    載入車型目錄快照
+    快照不存在、格式不符（含 Python 版本不同）或來源檔已變更時返回 None，
+    由呼叫端改從 JSON 載入；同一行程內來源未變更時直接共用已建立的車型
+    """
+    if os.environ.get(SNAPSHOT_ENV, "1") == "0":
+        return None
+
+    base_path = Path(base_path)
+    snapshot_path = base_path / SNAPSHOT_FILE
+    try:
+        source = (base_path / SOURCE_FILE).read_bytes()
+        source_sha256 = hashlib.sha256(source).hexdigest()
+        cached = _loaded.get(snapshot_path)
+        if cached is not None and cached[0] == source_sha256:
+            return dict(cached[1])
+        data = snapshot_path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+    if not data.startswith(SNAPSHOT_MAGIC):
+        return None
+    try:
+        payload = marshal.loads(data[len(SNAPSHOT_MAGIC):])
+    except (EOFError, ValueError, TypeError):
+        return None
+    if payload.get("source_sha256") != source_sha256:
+        return None
+
+    vehicles = {}
+    for manufacturer, model, inspection_times, preferred_stations, system, workstations in payload["vehicles"]:
+        vehicle = VehicleMaster.model_construct(
+            manufacturer=manufacturer,
+            model=model,
+            inspection_times=inspection_times,
+            preferred_stations=preferred_stations,
+            system=system,
+        )
+        vehicle._workstations = workstations
+        vehicles[(manufacturer, model)] = vehicle
+    _loaded[snapshot_path] = (source_sha256, vehicles)
+    return dict(vehicles)
+
+
+if __name__ == "__main__":
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parents[1]
+    path = build_catalog_snapshot(root)
+    print(f"已建立車型目錄快照: {path} ({path.stat().st_size} bytes)")
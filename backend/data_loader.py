@@ -1,8 +1,20 @@
 import json
-from typing import List, Dict
+from typing import List, Dict, Iterator, TextIO, Optional
 from pathlib import Path
+from pydantic import TypeAdapter
 from models.vehicle import VehicleMaster
 from models.batch import Order, Batch
+from catalog_snapshot import load_catalog_snapshot
+
+
+# 串流載入時每次驗證的批次數量
+STREAM_CHUNK_SIZE = 500
+# 串流讀檔的緩衝區大小（字元）
+STREAM_READ_SIZE = 64 * 1024
+# NDJSON 工單副檔名
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+
+_batch_list_adapter = TypeAdapter(List[Batch])
 
 
 class DataLoader:
@@ -11,11 +23,17 @@ class DataLoader:
     def __init__(self, base_path: str = "."):
         self.base_path = Path(base_path)
     
-    def load_vehicles_master(self) -> Dict[str, VehicleMaster]:
+    def load_vehicles_master(self, use_snapshot: bool = True) -> Dict[str, VehicleMaster]:
         """
         載入車輛主數據
+        有最新的目錄快照時直接由快照建立（不經 pydantic 驗證）
         返回: {(manufacturer, model): VehicleMaster}
         """
+        if use_snapshot:
+            vehicles = load_catalog_snapshot(self.base_path)
+            if vehicles is not None:
+                return vehicles
+        
         file_path = self.base_path / "vehicles_data.json"
         
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -28,6 +46,21 @@ class DataLoader:
         
         return vehicles
     
+    def load_station_names(self) -> Optional[List[str]]:
+        """
+        載入檢修廠清單（stations_data.json）
+        檔案不存在時返回 None，由排程器使用預設檢修廠
+        """
+        file_path = self.base_path / "stations_data.json"
+        
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        
+        return list(data.get('stations', [])) or None
+    
     def load_order(self, order_file: str) -> Order:
         """
         載入工單
@@ -40,6 +73,32 @@ class DataLoader:
         
         return Order(**data)
     
+    def iter_order_batches(self, order_file: str,
+                           chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Batch]:
+        """
+        串流載入工單批次
+        支援 NDJSON（每行一個批次）與原有 JSON 格式（增量解析 batches 陣列），
+        每累積 chunk_size 筆才驗證一次；解析時不需將整份檔案載入記憶體，
+        但呼叫端保留所有批次時（如 /api/schedule 的排序與模擬），記憶體仍隨批次數成長；
+        /api/simulate/stream 的 stream_orders 模式逐筆分配與模擬，記憶體不隨工單大小成長
+        """
+        file_path = self.base_path / order_file
+        
+        with open(file_path, 'r', encoding='utf-8') as f:
+            if file_path.suffix.lower() in NDJSON_SUFFIXES:
+                records = _iter_ndjson_batches(f)
+            else:
+                records = _iter_json_array_items(f, 'batches')
+            
+            chunk = []
+            for record in records:
+                chunk.append(record)
+                if len(chunk) >= chunk_size:
+                    yield from _batch_list_adapter.validate_python(chunk)
+                    chunk = []
+            if chunk:
+                yield from _batch_list_adapter.validate_python(chunk)
+    
     def load_all_orders(self) -> List[Order]:
         """載入所有測試工單"""
         orders = []
@@ -54,6 +113,109 @@ class DataLoader:
         return orders
 
 
+def _iter_ndjson_batches(f: TextIO) -> Iterator[dict]:
+    """
+    逐行解析 NDJSON 工單
+    空行略過；沒有 batch_id 的行視為工單表頭（order_id 等）
+    """
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"NDJSON 第 {line_number} 行格式錯誤: {e.msg}") from e
+        if 'batch_id' in record:
+            yield record
+
+
+def _iter_json_array_items(f: TextIO, key: str) -> Iterator[dict]:
+    """
+    增量解析 JSON 文件中頂層 key 對應的陣列
+    緩衝區只保留尚未解析的部分，逐一產出陣列元素；找不到該陣列時拋出 ValueError
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    
+    def fill(keep_from: int) -> bool:
+        """讀入下一段資料，丟棄 keep_from 之前已解析的內容"""
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        data = f.read(STREAM_READ_SIZE)
+        if not data:
+            eof = True
+            return False
+        buffer = buffer[keep_from:] + data
+        pos -= keep_from
+        return True
+    
+    # 1. 掃描頂層物件，找到 "key": [ 的位置
+    depth = 0
+    string_start = None
+    escaped = False
+    last_string = None
+    current_key = None
+    while True:
+        if pos >= len(buffer):
+            keep_from = string_start if string_start is not None else pos
+            if not fill(keep_from):
+                raise ValueError(f"JSON 格式錯誤: 找不到頂層 {key} 陣列")
+            if string_start is not None:
+                string_start = 0
+            continue
+        ch = buffer[pos]
+        if string_start is not None:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                if depth == 1:
+                    last_string = json.loads(buffer[string_start:pos + 1])
+                string_start = None
+        elif ch == '"':
+            string_start = pos
+        elif ch == ':' and depth == 1:
+            current_key = last_string
+        elif ch == '[' and depth == 1 and current_key == key:
+            pos += 1
+            break
+        elif ch in '{[':
+            depth += 1
+        elif ch in '}]':
+            depth -= 1
+        elif ch == ',' and depth == 1:
+            current_key = None
+        pos += 1
+    
+    # 2. 逐一解碼陣列元素
+    while True:
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= len(buffer):
+            if not fill(pos):
+                raise ValueError(f"JSON 格式錯誤: {key} 陣列未結束")
+            continue
+        if buffer[pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # 元素尚未完整讀入，繼續讀取
+            if not fill(pos):
+                raise
+            continue
+        if end >= len(buffer) and fill(pos):
+            # 元素剛好位於緩衝區結尾，讀入更多資料後重新解碼
+            continue
+        pos = end
+        yield item
+
+
 def get_vehicle_master(vehicles_dict: Dict[str, VehicleMaster], 
                        manufacturer: str, 
                        model: str) -> VehicleMaster:
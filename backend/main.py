@@ -1,11 +1,12 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import asyncio
 import json
 from typing import List
 
-from api.routes import router as api_router
-from simulator.flow_shop_simulator import FlowShopSimulator
+from api.routes import router as api_router, encoded_state
+from api.encoding import FORMATS, encode, prepend_fields
 
 app = FastAPI(title="車輛檢修排程系統 API")
 
@@ -24,6 +25,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 大型回應（排程結果、狀態）以 gzip 壓縮
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # 註冊路由
 app.include_router(api_router)
 
@@ -58,11 +62,28 @@ async def root():
     }
 
 
+async def send_state(websocket: WebSocket, fmt: str, current_time: int, is_playing: bool, speed):
+    """推送附帶檢修廠狀態的訊息（狀態內容取自 /api/state 的快取）"""
+    fields = {"type": "state_update", "is_playing": is_playing, "speed": speed}
+    state = encoded_state(current_time, fmt)
+    if state is None:
+        message = encode({**fields, "time": current_time}, fmt)
+    else:
+        message = prepend_fields(state, fmt, fields)
+    
+    if fmt == "msgpack":
+        await websocket.send_bytes(message)
+    else:
+        await websocket.send_text(message.decode("utf-8"))
+
+
 @app.websocket("/ws/simulation")
 async def websocket_simulation(websocket: WebSocket):
     """
     WebSocket模擬推送
     客戶端可控制播放/暫停/速度
+    以 {"command": "format", "value": "json" | "columnar" | "msgpack"} 選擇格式後，
+    每次推送會附帶該時間點的檢修廠狀態（msgpack 以二進位訊息傳送）
     """
     await manager.connect(websocket)
     
@@ -72,6 +93,7 @@ async def websocket_simulation(websocket: WebSocket):
         is_playing = False
         speed = 1  # 1x, 2x, 4x
         max_time = 2000  # 預設最大時間（分鐘）
+        state_format = None  # 推送狀態的格式（None: 只推送時間）
         
         while True:
             # 接收客戶端指令
@@ -93,20 +115,27 @@ async def websocket_simulation(websocket: WebSocket):
                     speed = data.get("value", 1)
                 elif data.get("command") == "set_max_time":
                     max_time = data.get("value", 2000)
+                elif data.get("command") == "format":
+                    value = data.get("value")
+                    if value not in FORMATS:
+                        await websocket.send_json({"type": "error", "message": f"不支援的格式: {value}"})
+                    else:
+                        state_format = value
             
             except asyncio.TimeoutError:
                 pass
             
             # 推送當前狀態
             if is_playing:
-                # 這裡需要從simulator獲取狀態
-                # 簡化處理：先推送時間
-                await websocket.send_json({
-                    "type": "state_update",
-                    "time": current_time,
-                    "is_playing": is_playing,
-                    "speed": speed
-                })
+                if state_format is None:
+                    await websocket.send_json({
+                        "type": "state_update",
+                        "time": current_time,
+                        "is_playing": is_playing,
+                        "speed": speed
+                    })
+                else:
+                    await send_state(websocket, state_format, current_time, is_playing, speed)
                 
                 # 時間前進
                 current_time += 10 * speed  # 每次前進10分鐘 * 速度
@@ -2,6 +2,7 @@ from .vehicle import VehicleMaster
 from .batch import Batch, Order
 from .station import Station, Stage, Workstation
 from .schedule import VehicleInstance, StageSchedule
+from .planning import CapacityPlan, AssignmentResult
 
 __all__ = [
     'VehicleMaster',
@@ -12,4 +13,6 @@ __all__ = [
     'Workstation',
     'VehicleInstance',
     'StageSchedule',
+    'CapacityPlan',
+    'AssignmentResult',
 ]
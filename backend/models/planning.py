@@ -0,0 +1,49 @@
+from pydantic import BaseModel
+from typing import Dict, List
+
+
+# 產能規劃與檢修廠分配最佳化的結果模型（不依賴求解器，API 載入時不需載入模擬器）
+
+
+class StationCapacity(BaseModel):
+    """單一檢修廠的產能規劃結果"""
+    station_name: str
+    workstation_config: List[int]       # 規劃後各關卡工位數
+    total_workstations: int
+    current_config: List[int] = []      # 排程器擴展後的工位配置
+    current_total: int = 0
+    feasible: bool                      # 是否所有批次都能準時完成
+    total_tardiness: int = 0            # 規劃配置下的總延遲（分鐘）
+    makespan: int = 0
+    evaluations: int = 0
+
+
+class CapacityPlan(BaseModel):
+    """產能規劃結果"""
+    stations: List[StationCapacity]
+    feasible: bool
+    evaluations: int
+    elapsed_ms: float
+    evaluations_per_second: float
+
+
+class MakespanBounds(BaseModel):
+    """總完工時間下界（各項取最大值即為下界）"""
+    batch_bound: int            # 單一批次在最多工位下獨立完成的時間
+    workload_bound: int         # 各關卡總工作量平均分給所有可用工位
+    candidate_set_bound: int    # 只能分配到偏好檢修廠的批次，其工作量平均分給偏好檢修廠
+    lower_bound: int
+
+
+class AssignmentResult(BaseModel):
+    """檢修廠分配最佳化結果"""
+    greedy_makespan: int
+    best_makespan: int
+    bounds: MakespanBounds
+    optimal: bool                   # 搜尋完成或達到下界
+    greedy_gap: float               # (貪婪 - 最佳) / 最佳
+    greedy_bound_gap: float         # (貪婪 - 下界) / 下界
+    best_bound_gap: float           # (最佳 - 下界) / 下界
+    nodes: int
+    elapsed_ms: float
+    assignment: Dict[str, str]      # batch_id → 檢修廠
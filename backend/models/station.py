@@ -10,36 +10,16 @@ class StationStatus(str, Enum):
     RUNNING = "running"  # 運行中
 
 
-class WorkstationStatus(str, Enum):
-    """工位狀態"""
-    IDLE = "idle"    # 空閒
-    BUSY = "busy"    # 忙碌
-
-
 class Workstation(BaseModel):
-    """工位模型"""
+    """
+    工位模型（只描述配置）
+    模擬期間的工位可用時間記錄在 simulator.evaluator.StationTimeline，
+    某時間點的工位狀態由 FlowShopSimulator.get_state_at_time 依排程記錄計算
+    """
     workstation_id: str  # 格式: {station}_{stage}_{ws}
     station_name: str
     stage_number: int  # 1-5
     ws_number: int  # 工位編號
-    current_vehicle: Optional[str] = None
-    start_time: Optional[int] = None
-    finish_time: Optional[int] = None
-    status: WorkstationStatus = WorkstationStatus.IDLE
-    
-    def is_available(self, time: int) -> bool:
-        """檢查工位在指定時間是否可用"""
-        if self.status == WorkstationStatus.IDLE:
-            return True
-        if self.finish_time and time >= self.finish_time:
-            return True
-        return False
-    
-    def get_available_time(self) -> int:
-        """獲取工位最早可用時間"""
-        if self.status == WorkstationStatus.IDLE:
-            return 0
-        return self.finish_time if self.finish_time else 0
 
 
 class Stage(BaseModel):
@@ -63,19 +43,16 @@ class Stage(BaseModel):
             for i in range(self.workstation_count)
         ]
     
-    def find_earliest_available_workstation(self, time: int = 0) -> Optional[Workstation]:
-        """找到最早可用的工位"""
-        available = []
-        for ws in self.workstations:
-            if ws.is_available(time):
-                available.append(ws)
-        
-        if not available:
-            # 所有工位都忙碌，找最早完成的
-            return min(self.workstations, key=lambda x: x.get_available_time())
-        
-        # 找到最早可用的（已經空閒的優先）
-        return min(available, key=lambda x: x.get_available_time())
+    def ensure_workstations(self, count: int):
+        """工位不足 count 個時補上新工位（編號接續）"""
+        for i in range(len(self.workstations), count):
+            self.workstations.append(Workstation(
+                workstation_id=f"{self.station_name}_{self.stage_number}_{i}",
+                station_name=self.station_name,
+                stage_number=self.stage_number,
+                ws_number=i
+            ))
+        self.workstation_count = max(self.workstation_count, count)
 
 
 class Station(BaseModel):
@@ -125,21 +102,3 @@ class Station(BaseModel):
                 return stage
         return None
     
-    def calculate_utilization(self, total_time: int) -> float:
-        """計算利用率"""
-        if total_time == 0:
-            return 0.0
-        
-        total_busy_time = 0
-        total_capacity = 0
-        
-        for stage in self.stages:
-            for ws in stage.workstations:
-                total_capacity += total_time
-                if ws.finish_time:
-                    total_busy_time += (ws.finish_time - (ws.start_time or 0))
-        
-        if total_capacity == 0:
-            return 0.0
-        
-        return total_busy_time / total_capacity
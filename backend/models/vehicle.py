@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import List, Optional
 
 
@@ -10,6 +10,9 @@ class VehicleMaster(BaseModel):
     preferred_stations: List[str]  # 偏好的2個檢修廠
     system: Optional[str] = None  # 車系: 日系/韓系/陸系/歐系/美系（可選）
     
+    # 工位配置快取（由目錄快照預先計算或首次計算後保存）
+    _workstations: Optional[List[int]] = PrivateAttr(default=None)
+    
     def model_post_init(self, __context):
         """初始化後自動推斷車系"""
         if not self.system:
@@ -64,6 +67,9 @@ class VehicleMaster(BaseModel):
         - RAV4 [20,10,30,50,60] → 分數 [1/3, 1/6, 1/2, 5/6, 1] → LCM=6 → [2,1,3,5,6]
         - CAMRY [21,16,31,52,61] → 分數 [21/61, 16/61, ...] → LCM=61 → 縮放後合理數值
         """
+        if self._workstations is not None:
+            return list(self._workstations)
+        
         from fractions import Fraction
         from math import lcm, gcd
         from functools import reduce
@@ -95,7 +101,8 @@ class VehicleMaster(BaseModel):
                 scale_factor = 20 / max_workstation
                 workstations = [max(1, round(w * scale_factor)) for w in workstations]
         
-        return workstations
+        self._workstations = workstations
+        return list(workstations)
     
     def calculate_setup_time(self) -> int:
         """
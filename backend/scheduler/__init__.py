@@ -1,3 +1,12 @@
-from .greedy_scheduler import GreedyScheduler
+# 子模組於首次存取時才載入: 匯入 scheduler.greedy_scheduler 等不會連帶載入換線排序與模擬器
+__all__ = ['GreedyScheduler', 'ChangeoverSequencer']
 
-__all__ = ['GreedyScheduler']
+
+def __getattr__(name):
+    if name == 'GreedyScheduler':
+        from .greedy_scheduler import GreedyScheduler
+        return GreedyScheduler
+    if name == 'ChangeoverSequencer':
+        from .sequencer import ChangeoverSequencer
+        return ChangeoverSequencer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,298 @@
+import time
+from typing import List, Dict, Tuple, Optional
+from models.batch import Batch
+from models.vehicle import VehicleMaster
+from models.planning import MakespanBounds, AssignmentResult
+from data_loader import get_vehicle_master
+from scheduler.greedy_scheduler import GreedyScheduler
+from scheduler.dispatch import DispatchRule
+from scheduler.clock import SimulationClock
+from simulator.evaluator import StationTimeline, BatchPlan, build_batch_plans, evaluate_station
+
+
+class _Item:
+    """搜尋用的批次資料"""
+
+    __slots__ = ("plan", "config", "candidates")
+
+    def __init__(self, plan: BatchPlan, config: List[int], candidates: Tuple[int, ...]):
+        self.plan = plan
+        self.config = config
+        self.candidates = candidates
+
+
+def _water_level(available: List[int], work: int) -> int:
+    """
+    注水水位: 工作量 work 分給可用時間為 available 的工位，
+    接收工作的工位中最晚完成者不早於此時間
+    """
+    level = -(-(sum(available) + work) // len(available))
+    if level >= max(available):
+        return level
+    available = sorted(available)
+    total = 0
+    for count, free in enumerate(available, 1):
+        total += free
+        level = -(-(total + work) // count)
+        if count == len(available) or level <= available[count]:
+            return level
+    return 0
+
+
+class AssignmentSolver:
+    """
+    檢修廠分配的分支定界求解器（適用數十個批次以內的工單）
+
+    批次順序固定為排程器的派工順序，只搜尋每個批次分配到哪個候選檢修廠，
+    目標為最小化總完工時間（makespan）。
+    檢修廠工位配置為分配批次配置的逐關卡最大值，工位越多完成時間不會越晚，
+    因此節點下界以「每個檢修廠使用所有可能分配批次的最大配置」的放寬問題計算:
+    1. 已分配部分的模擬完成時間
+    2. 剩餘批次各自獨立完成的時間
+    3. 各關卡剩餘工作量以注水方式填入剩餘批次可分配檢修廠的工位（工位只能在目前可用時間後開工），
+       注水水位加上剩餘批次的最短後續關卡時間
+    以貪婪排程結果為初始解；所有檢修廠中尚未分配批次且候選關係相同者視為對稱，只展開一個。
+    找到達到根節點下界的解或超過時間 / 節點上限時停止
+    """
+
+    def __init__(self,
+                 vehicles_master: Dict[Tuple[str, str], VehicleMaster],
+                 station_names: Optional[List[str]] = None,
+                 dispatch_rule: DispatchRule = DispatchRule.PRIORITY,
+                 clock: Optional[SimulationClock] = None,
+                 time_limit: float = 10.0,
+                 node_limit: int = 500000):
+        self.vehicles_master = vehicles_master
+        self.station_names = station_names
+        self.dispatch_rule = dispatch_rule
+        self.clock = clock
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+
+    def solve(self, batches: List[Batch]) -> AssignmentResult:
+        started = time.perf_counter()
+
+        # 貪婪解（初始上界）與派工順序
+        greedy = GreedyScheduler(self.vehicles_master, self.station_names,
+                                 dispatch_rule=self.dispatch_rule, clock=self.clock)
+        ordered = greedy.assign_batches_to_stations([b.model_copy() for b in batches])
+        greedy_makespan = 0
+        for station_name, plans in build_batch_plans(ordered, self.vehicles_master).items():
+            finish_times = evaluate_station(plans, greedy.stations[station_name].workstation_config)
+            greedy_makespan = max(greedy_makespan, max(finish_times.values()))
+
+        self._stations = list(greedy.stations)
+        self._items = self._build_items(greedy, ordered)
+        self._station_configs = self._max_station_configs()
+        bounds = self._root_bounds()
+
+        self._best = greedy_makespan
+        self._best_assignment = [self._stations.index(b.assigned_station) for b in ordered]
+        self._nodes = 0
+        self._deadline = started + self.time_limit
+        self._stopped = False
+        self._target = bounds.lower_bound
+        if self._items and self._best > self._target:
+            self._search()
+
+        best = self._best
+        lower = bounds.lower_bound
+        return AssignmentResult(
+            greedy_makespan=greedy_makespan,
+            best_makespan=best,
+            bounds=bounds,
+            optimal=not self._stopped or best <= lower,
+            greedy_gap=round((greedy_makespan - best) / best, 4) if best else 0.0,
+            greedy_bound_gap=round((greedy_makespan - lower) / lower, 4) if lower else 0.0,
+            best_bound_gap=round((best - lower) / lower, 4) if lower else 0.0,
+            nodes=self._nodes,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+            assignment={
+                item.plan.batch_id: self._stations[s]
+                for item, s in zip(self._items, self._best_assignment)
+            }
+        )
+
+    def _build_items(self, greedy: GreedyScheduler, ordered: List[Batch]) -> List[_Item]:
+        positions = {name: i for i, name in enumerate(self._stations)}
+        items = []
+        for batch in ordered:
+            vehicle = get_vehicle_master(self.vehicles_master, batch.manufacturer, batch.model)
+            config, setup_time = greedy._get_vehicle_plan(vehicle)
+            # 候選檢修廠與貪婪排程器相同: 存在的偏好檢修廠，皆不存在時為所有檢修廠
+            candidates = tuple(dict.fromkeys(
+                positions[name] for name in vehicle.preferred_stations if name in positions
+            )) or tuple(range(len(self._stations)))
+            plan = BatchPlan(batch.batch_id, (batch.start_time or 0) + setup_time,
+                             vehicle.inspection_times, batch.quantity)
+            items.append(_Item(plan, config, candidates))
+        return items
+
+    def _max_station_configs(self) -> List[List[int]]:
+        """各檢修廠可能的最大工位配置（所有可分配批次配置的逐關卡最大值）"""
+        stage_count = max((len(item.config) for item in self._items), default=0)
+        configs = [[0] * stage_count for _ in self._stations]
+        for item in self._items:
+            for s in item.candidates:
+                configs[s] = [max(a, b) for a, b in zip(configs[s], item.config)]
+        return configs
+
+    def _root_bounds(self) -> MakespanBounds:
+        items = self._items
+        if not items:
+            return MakespanBounds(batch_bound=0, workload_bound=0, candidate_set_bound=0, lower_bound=0)
+
+        # 1. 單一批次下界（最大配置下獨立完成），同時作為剩餘批次下界的後綴最大值
+        self._suffix_batch_bound = [0] * (len(items) + 1)
+        for i in range(len(items) - 1, -1, -1):
+            item = items[i]
+            config = [max(self._station_configs[s][k] for s in item.candidates)
+                      for k in range(len(item.config))]
+            alone = evaluate_station([item.plan], config)[item.plan.batch_id]
+            self._suffix_batch_bound[i] = max(self._suffix_batch_bound[i + 1], alone)
+        batch_bound = self._suffix_batch_bound[0]
+
+        # 2. 工作量下界（所有檢修廠）與 3. 候選集合下界（只能到偏好檢修廠的批次）
+        workload_bound = self._workload_bound(items, range(len(self._stations)))
+        candidate_set_bound = 0
+        for candidates in {item.candidates for item in items}:
+            members = [item for item in items if set(item.candidates) <= set(candidates)]
+            candidate_set_bound = max(candidate_set_bound, self._workload_bound(members, candidates))
+
+        return MakespanBounds(
+            batch_bound=batch_bound,
+            workload_bound=workload_bound,
+            candidate_set_bound=candidate_set_bound,
+            lower_bound=max(batch_bound, workload_bound, candidate_set_bound)
+        )
+
+    def _workload_bound(self, items: List[_Item], stations) -> int:
+        """
+        每個關卡: 最早可開始時間 + 總工作量 / 工位總數 + 最短後續關卡時間
+        （最早可開始時間 = 最早就緒時間 + 最短前段關卡時間）
+        """
+        if not items:
+            return 0
+        bound = 0
+        stage_count = len(items[0].plan.stage_times)
+        for k in range(stage_count):
+            capacity = sum(self._station_configs[s][k] for s in stations)
+            if capacity == 0:
+                continue
+            work = sum(item.plan.quantity * item.plan.stage_times[k] for item in items)
+            head = min(item.plan.ready_time + sum(item.plan.stage_times[:k]) for item in items)
+            tail = min(sum(item.plan.stage_times[k + 1:]) for item in items)
+            bound = max(bound, head + -(-work // capacity) + tail)
+        return bound
+
+    def _search(self):
+        """深度優先分支定界（放寬問題上的增量模擬）"""
+        items = self._items
+        station_count = len(self._stations)
+        stage_count = len(self._station_configs[0])
+        timelines = [StationTimeline(config) for config in self._station_configs]
+        finish = [0] * station_count
+        assignment = [0] * len(items)
+        assigned_counts = [0] * station_count
+
+        # 剩餘批次（後綴）的工作量、最早可開始時間、最短後續關卡時間與可分配檢修廠
+        remaining_work = [[0] * stage_count for _ in range(len(items) + 1)]
+        min_head = [[0] * stage_count for _ in range(len(items) + 1)]
+        min_tail = [[0] * stage_count for _ in range(len(items) + 1)]
+        eligible: List[Tuple[int, ...]] = [()] * (len(items) + 1)
+        for i in range(len(items) - 1, -1, -1):
+            plan = items[i].plan
+            last = i == len(items) - 1
+            for k in range(stage_count):
+                head = plan.ready_time + sum(plan.stage_times[:k])
+                tail = sum(plan.stage_times[k + 1:])
+                remaining_work[i][k] = remaining_work[i + 1][k] + plan.quantity * plan.stage_times[k]
+                min_head[i][k] = head if last else min(min_head[i + 1][k], head)
+                min_tail[i][k] = tail if last else min(min_tail[i + 1][k], tail)
+            eligible[i] = tuple(sorted(set(eligible[i + 1]) | set(items[i].candidates)))
+
+        # 對稱: 候選關係相同的檢修廠（尚未分配批次時可互換）
+        signatures = [
+            tuple(s in item.candidates for item in items) for s in range(station_count)
+        ]
+
+        def node_bound(i: int) -> int:
+            """
+            放寬問題的下界: 已分配部分的完成時間、剩餘批次單獨完成時間、
+            各關卡剩餘工作量的注水水位加上最短後續關卡時間
+            （只計入剩餘批次可分配檢修廠的工位；工位佔用中的已分配車輛由已分配完成時間涵蓋）
+            """
+            bound = max(max(finish), self._suffix_batch_bound[i])
+            if i < len(items):
+                for k in range(stage_count):
+                    head = min_head[i][k]
+                    available = [max(free, head) for s in eligible[i] for free, _ in timelines[s].heaps[k]]
+                    if available:
+                        level = _water_level(available, remaining_work[i][k])
+                        bound = max(bound, level + min_tail[i][k])
+            return bound
+
+        def leaf_makespan() -> int:
+            """實際配置（分配批次配置的逐關卡最大值）下的總完工時間"""
+            makespan = 0
+            for s in range(station_count):
+                members = [item for item, a in zip(items, assignment) if a == s]
+                if not members:
+                    continue
+                config = [max(values) for values in zip(*(item.config for item in members))]
+                finish_times = evaluate_station([item.plan for item in members], config)
+                makespan = max(makespan, max(finish_times.values()))
+                if makespan >= self._best:
+                    break
+            return makespan
+
+        def dfs(i: int):
+            if self._best <= self._target:
+                return
+            self._nodes += 1
+            if self._nodes >= self.node_limit or (self._nodes & 255 == 0 and time.perf_counter() > self._deadline):
+                self._stopped = True
+                return
+            if i == len(items):
+                makespan = leaf_makespan()
+                if makespan < self._best:
+                    self._best = makespan
+                    self._best_assignment = list(assignment)
+                return
+
+            plan = items[i].plan
+            children = []
+            tried_empty = set()
+            for s in items[i].candidates:
+                if assigned_counts[s] == 0:
+                    if signatures[s] in tried_empty:
+                        continue
+                    tried_empty.add(signatures[s])
+                timeline = timelines[s]
+                before = timeline.snapshot()
+                batch_finish = plan.ready_time
+                for _ in range(plan.quantity):
+                    batch_finish = max(batch_finish, timeline.schedule_vehicle(plan.stage_times, plan.ready_time))
+                previous_finish = finish[s]
+                finish[s] = max(previous_finish, batch_finish)
+                bound = node_bound(i + 1)
+                if bound < self._best:
+                    children.append((bound, s, timeline.heaps, finish[s]))
+                finish[s] = previous_finish
+                timeline.heaps = before
+
+            # 下界較小的分支先搜尋
+            children.sort(key=lambda child: child[:2])
+            for bound, s, heaps, station_finish in children:
+                if bound >= self._best or self._stopped:
+                    break
+                timeline = timelines[s]
+                before_heaps, before_finish = timeline.heaps, finish[s]
+                timeline.heaps, finish[s] = heaps, station_finish
+                assignment[i] = s
+                assigned_counts[s] += 1
+                dfs(i + 1)
+                assigned_counts[s] -= 1
+                timeline.heaps, finish[s] = before_heaps, before_finish
+
+        dfs(0)
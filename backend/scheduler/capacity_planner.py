@@ -0,0 +1,133 @@
+import time
+from typing import List, Dict, Tuple, Optional
+from models.batch import Batch
+from models.vehicle import VehicleMaster
+from models.station import Station
+from models.planning import StationCapacity, CapacityPlan
+from scheduler.clock import SimulationClock
+from simulator.evaluator import BatchPlan, build_batch_plans, evaluate_station
+
+
+class CapacityPlanner:
+    """
+    產能規劃器
+    為每個檢修廠找出能讓所有批次在交期前完成的最少工位配置
+
+    各檢修廠的工位互不共用，因此逐廠獨立求解:
+    1. 由每關卡 1 個工位開始，每次加一個工位到「邊際延遲改善最大」的關卡
+       （無改善時加到負載 / 工位數最大的瓶頸關卡），直到準時或達上限
+    2. 再對每個關卡以二分搜尋找出仍可準時（或延遲不增加）的最少工位數
+    每個候選配置以 evaluate_station 快速模擬評估
+    """
+
+    def __init__(self,
+                 vehicles_master: Dict[Tuple[str, str], VehicleMaster],
+                 clock: SimulationClock,
+                 max_workstations: int = 20):
+        self.vehicles_master = vehicles_master
+        self.clock = clock
+        self.max_workstations = max_workstations
+
+    def plan(self,
+             batches: List[Batch],
+             stations: Optional[Dict[str, Station]] = None) -> CapacityPlan:
+        """
+        規劃已分配批次所需的工位配置
+        batches: 已分配檢修廠的批次（依模擬順序）
+        stations: 排程器的檢修廠，用於比較現有配置
+        """
+        started = time.perf_counter()
+        due_times = {b.batch_id: self.clock.to_minutes(b.due_date) for b in batches}
+        plans = build_batch_plans(batches, self.vehicles_master, due_times)
+
+        results = []
+        for station_name, station_plans in plans.items():
+            result = self._plan_station(station_name, station_plans)
+            station = (stations or {}).get(station_name)
+            if station is not None and station.workstation_config:
+                result.current_config = list(station.workstation_config)
+                result.current_total = sum(station.workstation_config)
+            results.append(result)
+
+        elapsed = time.perf_counter() - started
+        evaluations = sum(r.evaluations for r in results)
+        return CapacityPlan(
+            stations=results,
+            feasible=all(r.feasible for r in results),
+            evaluations=evaluations,
+            elapsed_ms=round(elapsed * 1000, 2),
+            evaluations_per_second=round(evaluations / elapsed, 1) if elapsed > 0 else 0.0
+        )
+
+    def _plan_station(self, station_name: str, plans: List[BatchPlan]) -> StationCapacity:
+        """單一檢修廠的工位規劃"""
+        stage_count = len(plans[0].stage_times)
+        evaluations = 0
+
+        def tardiness(config: List[int]) -> int:
+            nonlocal evaluations
+            evaluations += 1
+            finish_times = evaluate_station(plans, config)
+            return sum(
+                max(0, finish_times[p.batch_id] - p.due_time)
+                for p in plans if p.due_time is not None
+            )
+
+        # 各關卡工作負載，用於決定無改善時的擴充關卡
+        workload = [
+            sum(p.stage_times[i] * p.quantity for p in plans)
+            for i in range(stage_count)
+        ]
+
+        # 1. 邊際改善貪婪擴充
+        config = [1] * stage_count
+        current = tardiness(config)
+        while current > 0:
+            best_stage, best_value = None, current
+            for i in range(stage_count):
+                if config[i] >= self.max_workstations:
+                    continue
+                config[i] += 1
+                value = tardiness(config)
+                config[i] -= 1
+                if value < best_value:
+                    best_stage, best_value = i, value
+            if best_stage is None:
+                expandable = [i for i in range(stage_count) if config[i] < self.max_workstations]
+                if not expandable:
+                    break
+                best_stage = max(expandable, key=lambda i: workload[i] / config[i])
+                config[best_stage] += 1
+                current = tardiness(config)
+            else:
+                config[best_stage] += 1
+                current = best_value
+
+        # 2. 逐關卡二分搜尋可移除的工位（延遲不得超過步驟 1 的結果；
+        #    無法準時時即為達到最小延遲所需的最少工位）
+        target = current
+        for i in range(stage_count):
+            low, high = 1, config[i]
+            while low < high:
+                mid = (low + high) // 2
+                config[i] = mid
+                if tardiness(config) <= target:
+                    high = mid
+                else:
+                    low = mid + 1
+            config[i] = low
+
+        finish_times = evaluate_station(plans, config)
+        total_tardiness = sum(
+            max(0, finish_times[p.batch_id] - p.due_time)
+            for p in plans if p.due_time is not None
+        )
+        return StationCapacity(
+            station_name=station_name,
+            workstation_config=config,
+            total_workstations=sum(config),
+            feasible=total_tardiness == 0,
+            total_tardiness=total_tardiness,
+            makespan=max(finish_times.values()) if finish_times else 0,
+            evaluations=evaluations
+        )
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+from typing import Optional, Iterable
+from models.batch import Order, Batch
+
+
+class SimulationClock:
+    """
+    工單時鐘
+    在工單實際時間（datetime）與模擬時間（從 0 起算的分鐘）之間轉換
+    模擬時間 0 = 工單日期的開工時刻（預設 08:00）
+    """
+
+    DEFAULT_START_HOUR = 8
+
+    def __init__(self, origin: datetime):
+        self.origin = origin
+
+    @classmethod
+    def from_order(cls, order: Order, start_hour: int = DEFAULT_START_HOUR) -> "SimulationClock":
+        """以工單日期與開工時刻建立時鐘"""
+        return cls.from_date(order.order_date, start_hour)
+
+    @classmethod
+    def from_date(cls, order_date: str, start_hour: int = DEFAULT_START_HOUR) -> "SimulationClock":
+        """以日期字串（YYYY-MM-DD）與開工時刻建立時鐘"""
+        return cls(datetime.strptime(order_date, "%Y-%m-%d") + timedelta(hours=start_hour))
+
+    @classmethod
+    def from_batches(cls, batches: Iterable[Batch],
+                     start_hour: int = DEFAULT_START_HOUR) -> "SimulationClock":
+        """
+        無工單日期時（如 NDJSON 工單），以最早交期當日的開工時刻建立時鐘
+        """
+        due_dates = [b.due_date for b in batches if b.due_date is not None]
+        if not due_dates:
+            day = datetime.combine(datetime.now().date(), datetime.min.time())
+        else:
+            earliest = min(due_dates)
+            day = datetime.combine(earliest.date(), datetime.min.time())
+        return cls(day + timedelta(hours=start_hour))
+
+    def to_minutes(self, moment: Optional[datetime]) -> Optional[int]:
+        """實際時間 → 模擬分鐘（None 表示無交期）"""
+        if moment is None:
+            return None
+        if moment.tzinfo is not None and self.origin.tzinfo is None:
+            moment = moment.replace(tzinfo=None)
+        return int((moment - self.origin).total_seconds() // 60)
+
+    def to_datetime(self, minutes: int) -> datetime:
+        """模擬分鐘 → 實際時間"""
+        return self.origin + timedelta(minutes=minutes)
@@ -0,0 +1,166 @@
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Iterable, Optional
+from models.batch import Batch
+from models.vehicle import VehicleMaster
+from data_loader import get_vehicle_master
+from scheduler.greedy_scheduler import GreedyScheduler
+from scheduler.dispatch import DispatchRule
+from scheduler.clock import SimulationClock
+
+
+def station_clusters(candidate_keys: Iterable[Tuple[str, ...]]) -> List[Tuple[str, ...]]:
+    """
+    以 union-find 合併有共同檢修廠的候選集合
+    返回: 互不相交的檢修廠群組（群組間的批次分配互不影響）
+    """
+    parent: Dict[str, str] = {}
+
+    def find(name: str) -> str:
+        root = parent.setdefault(name, name)
+        while root != parent[root]:
+            root = parent[root]
+        while parent[name] != root:
+            parent[name], name = root, parent[name]
+        return root
+
+    for key in candidate_keys:
+        first = find(key[0])
+        for name in key[1:]:
+            root = find(name)
+            if root != first:
+                parent[root] = first
+
+    clusters: Dict[str, List[str]] = {}
+    for name in parent:
+        clusters.setdefault(find(name), []).append(name)
+    return [tuple(names) for names in clusters.values()]
+
+
+def assign_cluster(keys: List[Tuple[str, ...]], counts: Dict[str, int]) -> List[str]:
+    """
+    依派工順序決定一個檢修廠群組內每個批次的檢修廠
+    與 GreedyScheduler._select_best_station 相同: 候選檢修廠中已分配批次數最少者（同數取候選順位較前者）；
+    只需批次數，不建立 pydantic 物件，可於其他行程執行
+    counts: 群組內各檢修廠目前已分配的批次數
+    """
+    counts = dict(counts)
+    heaps: Dict[Tuple[str, ...], List[Tuple[int, int, str]]] = {}
+    selected = []
+    for key in keys:
+        heap = heaps.get(key)
+        if heap is None:
+            heap = [(counts[name], position, name) for position, name in enumerate(key)]
+            heapq.heapify(heap)
+            heaps[key] = heap
+        while True:
+            total_batches, position, name = heap[0]
+            current = counts[name]
+            if total_batches == current:
+                break
+            heapq.heapreplace(heap, (current, position, name))
+        counts[name] = current + 1
+        selected.append(name)
+    return selected
+
+
+class DecomposedScheduler(GreedyScheduler):
+    """
+    分解式批次分配（大型工單）
+    1. 依派工規則排序所有批次（與 GreedyScheduler 相同）
+    2. 以 union-find 將候選檢修廠集合有重疊的批次合併為群組，群組之間不共用檢修廠
+    3. 各群組只依批次數決定分配（群組數 ≥ 2 且批次數達 parallel_threshold 時以多個行程平行計算）
+    4. 合併結果: 依派工順序寫入批次欄位，每個檢修廠的統計與工位配置只更新一次
+    分配結果與 GreedyScheduler.assign_batches_to_stations 完全相同
+    """
+
+    def __init__(self,
+                 vehicles_master: Dict[Tuple[str, str], VehicleMaster],
+                 station_names: Optional[List[str]] = None,
+                 dispatch_rule: DispatchRule = DispatchRule.PRIORITY,
+                 clock: Optional[SimulationClock] = None,
+                 workers: Optional[int] = None,
+                 parallel_threshold: int = 50000):
+        super().__init__(vehicles_master, station_names, dispatch_rule=dispatch_rule, clock=clock)
+        self.workers = workers or os.cpu_count() or 1
+        self.parallel_threshold = parallel_threshold
+        self.clusters: List[Tuple[str, ...]] = []
+
+    def assign_batches_to_stations(self, batches: List[Batch]) -> List[Batch]:
+        sorted_batches = self._sort_batches(batches)
+
+        # 車型 → (車輛主數據, 候選檢修廠)
+        vehicles: Dict[Tuple[str, str], Tuple[VehicleMaster, Tuple[str, ...]]] = {}
+        keys = []
+        for batch in sorted_batches:
+            entry = vehicles.get((batch.manufacturer, batch.model))
+            if entry is None:
+                vehicle = get_vehicle_master(self.vehicles_master, batch.manufacturer, batch.model)
+                entry = vehicles[(batch.manufacturer, batch.model)] = (vehicle, self._candidate_key(vehicle))
+            keys.append(entry[1])
+
+        # 分群: 各群組的批次（保持派工順序）
+        self.clusters = station_clusters(dict.fromkeys(keys))
+        cluster_of = {name: i for i, cluster in enumerate(self.clusters) for name in cluster}
+        members: List[List[int]] = [[] for _ in self.clusters]
+        for i, key in enumerate(keys):
+            members[cluster_of[key[0]]].append(i)
+
+        jobs = [
+            ([keys[i] for i in indices], {name: self.stations[name].total_batches for name in cluster})
+            for cluster, indices in zip(self.clusters, members)
+        ]
+        if len(jobs) > 1 and self.workers > 1 and len(sorted_batches) >= self.parallel_threshold:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+                results = list(pool.map(assign_cluster, *zip(*jobs)))
+        else:
+            results = [assign_cluster(cluster_keys, counts) for cluster_keys, counts in jobs]
+
+        selected: List[Optional[str]] = [None] * len(sorted_batches)
+        for indices, names in zip(members, results):
+            for i, name in zip(indices, names):
+                selected[i] = name
+
+        self._apply(sorted_batches, selected, vehicles)
+        return sorted_batches
+
+    def _apply(self, batches: List[Batch], selected: List[str], vehicles: Dict):
+        """寫入批次分配與估算完成時間，並一次更新各檢修廠的統計與工位配置"""
+        stats: Dict[str, Dict] = {}
+        for batch, station_name in zip(batches, selected):
+            vehicle = vehicles[(batch.manufacturer, batch.model)][0]
+            workstation_config, setup_time = self._get_vehicle_plan(vehicle)
+            batch.assigned_station = station_name
+            batch.setup_time = setup_time
+            batch.start_time = 0
+            batch.finish_time = setup_time + self._estimate_process_time(
+                vehicle, batch.quantity, workstation_config
+            )
+
+            station = stats.get(station_name)
+            if station is None:
+                station = stats[station_name] = {
+                    "first_config": workstation_config, "models": set(),
+                    "batches": 0, "vehicles": 0, "finish": 0, "last": None,
+                }
+            station["models"].add((batch.manufacturer, batch.model))
+            station["batches"] += 1
+            station["vehicles"] += batch.quantity
+            station["finish"] = max(station["finish"], batch.finish_time)
+            station["last"] = batch.batch_id
+
+        for station_name, station_stats in stats.items():
+            station = self.stations[station_name]
+            station.next_available_time = max(station.next_available_time, station_stats["finish"])
+            station.total_batches += station_stats["batches"]
+            station.total_vehicles += station_stats["vehicles"]
+            station.current_batch = station_stats["last"]
+            if not station.stages:
+                station.initialize_stages(station_stats["first_config"])
+            # 工位配置: 分配車型配置的逐關卡最大值（與逐批次擴展的結果相同）
+            configs = [self._get_vehicle_plan(vehicles[key][0])[0] for key in station_stats["models"]]
+            self._expand_station_workstations(station, [max(counts) for counts in zip(*configs)])
+
+        # 負載 heap 以最新批次數重建
+        self._candidate_heaps = {}
@@ -0,0 +1,71 @@
+import math
+from datetime import datetime
+from enum import Enum
+from typing import List, Dict, Optional
+from models.batch import Batch
+
+
+class DispatchRule(str, Enum):
+    """派工規則"""
+    PRIORITY = "priority"  # 優先級 → 交期（預設規則）
+    EDD = "edd"            # 最早交期優先 (Earliest Due Date)
+    ATC = "atc"            # 加權延遲成本 (Apparent Tardiness Cost)
+    SLACK = "slack"        # 最小寬裕時間 (交期 - 處理時間)
+
+
+PRIORITY_ORDER = {"high": 0, "normal": 1, "low": 2}
+# ATC 權重: 優先級越高權重越大
+PRIORITY_WEIGHT = {"high": 3.0, "normal": 2.0, "low": 1.0}
+# ATC 前瞻參數 K（越大越接近 WSPT，越小越接近 EDD）
+ATC_LOOKAHEAD = 2.0
+
+
+def dispatch_order(batches: List[Batch],
+                   rule: DispatchRule,
+                   processing_times: Dict[str, int],
+                   due_times: Dict[str, Optional[int]],
+                   current_time: int = 0) -> List[Batch]:
+    """
+    依派工規則排序批次
+    processing_times: {batch_id: 預估處理時間（分鐘）}
+    due_times: {batch_id: 交期模擬分鐘，None 表示無交期}
+    """
+    if rule == DispatchRule.PRIORITY:
+        return sorted(
+            batches,
+            key=lambda b: (
+                PRIORITY_ORDER.get(b.priority, 1),
+                # 無交期排在最後（不與 datetime 比較）
+                b.due_date is None,
+                b.due_date or datetime.min
+            )
+        )
+
+    def due(batch: Batch) -> float:
+        value = due_times.get(batch.batch_id)
+        return math.inf if value is None else value
+
+    if rule == DispatchRule.EDD:
+        return sorted(batches, key=lambda b: (due(b), PRIORITY_ORDER.get(b.priority, 1)))
+
+    if rule == DispatchRule.SLACK:
+        return sorted(
+            batches,
+            key=lambda b: (due(b) - processing_times[b.batch_id] - current_time,
+                           PRIORITY_ORDER.get(b.priority, 1))
+        )
+
+    if rule == DispatchRule.ATC:
+        if not batches:
+            return []
+        average_p = sum(processing_times[b.batch_id] for b in batches) / len(batches)
+        scale = ATC_LOOKAHEAD * max(average_p, 1.0)
+
+        def atc_index(batch: Batch) -> float:
+            p = max(processing_times[batch.batch_id], 1)
+            slack = max(due(batch) - p - current_time, 0.0)
+            return PRIORITY_WEIGHT.get(batch.priority, 2.0) / p * math.exp(-slack / scale)
+
+        return sorted(batches, key=atc_index, reverse=True)
+
+    raise ValueError(f"未知的派工規則: {rule}")
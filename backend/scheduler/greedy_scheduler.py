@@ -1,27 +1,42 @@
-from typing import List, Dict, Tuple
+import heapq
+from typing import List, Dict, Tuple, Iterable, Iterator, Optional
 from models.batch import Batch
 from models.vehicle import VehicleMaster
 from models.station import Station, Workstation
 from data_loader import get_vehicle_master
+from scheduler.dispatch import DispatchRule, dispatch_order
+from scheduler.clock import SimulationClock
+
+
+# 未提供檢修廠設定檔時使用的預設檢修廠
+DEFAULT_STATION_NAMES = [
+    "南高檢修廠",
+    "北高檢修廠", 
+    "鳳山檢修廠",
+    "楠梓檢修廠",
+    "岡山檢修廠"
+]
 
 
 class GreedyScheduler:
     """貪婪啟發式排程器"""
     
-    def __init__(self, vehicles_master: Dict[Tuple[str, str], VehicleMaster]):
+    def __init__(self,
+                 vehicles_master: Dict[Tuple[str, str], VehicleMaster],
+                 station_names: Optional[List[str]] = None,
+                 dispatch_rule: DispatchRule = DispatchRule.PRIORITY,
+                 clock: Optional[SimulationClock] = None):
         self.vehicles_master = vehicles_master
-        self.stations = self._initialize_stations()
+        self.dispatch_rule = DispatchRule(dispatch_rule)
+        self.clock = clock  # 交期換算為模擬分鐘（EDD 以外的交期規則使用）
+        self.stations = self._initialize_stations(station_names or DEFAULT_STATION_NAMES)
+        # 候選檢修廠集合 → 依負載排序的 heap [(total_batches, 候選順位, station_name)]
+        self._candidate_heaps: Dict[Tuple[str, ...], List[Tuple[int, int, str]]] = {}
+        # 車型 → (工位配置, 換線時間)，同車型只計算一次
+        self._vehicle_plans: Dict[Tuple[str, str], Tuple[List[int], int]] = {}
     
-    def _initialize_stations(self) -> Dict[str, Station]:
-        """初始化五個檢修廠"""
-        station_names = [
-            "南高檢修廠",
-            "北高檢修廠", 
-            "鳳山檢修廠",
-            "楠梓檢修廠",
-            "岡山檢修廠"
-        ]
-        
+    def _initialize_stations(self, station_names: List[str]) -> Dict[str, Station]:
+        """初始化檢修廠"""
         stations = {}
         for name in station_names:
             station = Station(station_name=name)
@@ -37,73 +52,107 @@ class GreedyScheduler:
         sorted_batches = self._sort_batches(batches)
         
         for batch in sorted_batches:
-            # 獲取車輛主數據
-            vehicle = get_vehicle_master(
-                self.vehicles_master, 
-                batch.manufacturer, 
-                batch.model
-            )
-            
-            # 計算工位配置和換線時間
-            workstation_config = vehicle.calculate_workstations()
-            setup_time = vehicle.calculate_setup_time()
-            
-            # 選擇最佳檢修廠
-            selected_station = self._select_best_station(
-                batch, 
-                vehicle, 
-                workstation_config,
-                setup_time
-            )
-            
-            # 分配批次
-            batch.assigned_station = selected_station.station_name
-            batch.setup_time = setup_time
-            batch.start_time = 0  # 修正：所有批次都可以立即開始（流水線並行）
-            
-            # 估算完成時間（粗略估計，精確時間由模擬器計算）
-            estimated_process_time = self._estimate_process_time(
-                vehicle, 
-                batch.quantity,
-                workstation_config
-            )
-            batch.finish_time = batch.start_time + setup_time + estimated_process_time
-            
-            # 更新檢修廠狀態（記錄負載，但不阻塞後續批次）
-            # next_available_time 不再影響開始時間
-            selected_station.next_available_time = max(
-                selected_station.next_available_time, 
-                batch.finish_time
-            )
-            selected_station.total_batches += 1
-            selected_station.total_vehicles += batch.quantity
-            selected_station.current_batch = batch.batch_id
-            
-            # 動態調整檢修廠工位配置
-            # 如果是第一個批次，直接初始化
-            if not selected_station.stages:
-                selected_station.initialize_stages(workstation_config)
-            else:
-                # 如果已有配置，需要擴展到所需工位數的最大值
-                self._expand_station_workstations(selected_station, workstation_config)
+            self._assign_batch(batch)
         
         return sorted_batches
     
+    def assign_batch_stream(self, batches: Iterable[Batch]) -> Iterator[Batch]:
+        """
+        串流分配批次
+        依到達順序逐一分配並立即產出；只有呼叫端逐筆處理產出的批次時記憶體才與工單大小無關
+        （串流模式無法全域排序，不套用派工規則，請於來源端依優先級排列）
+        """
+        for batch in batches:
+            self._assign_batch(batch)
+            yield batch
+    
+    def _assign_batch(self, batch: Batch, start_time: int = 0):
+        """
+        分配單一批次到檢修廠並更新檢修廠狀態
+        start_time: 批次可開始的模擬時間（線上排程為到達時間）
+        """
+        # 獲取車輛主數據
+        vehicle = get_vehicle_master(
+            self.vehicles_master, 
+            batch.manufacturer, 
+            batch.model
+        )
+        
+        # 計算工位配置和換線時間
+        workstation_config, setup_time = self._get_vehicle_plan(vehicle)
+        
+        # 選擇最佳檢修廠
+        selected_station = self._select_best_station(
+            batch, 
+            vehicle, 
+            workstation_config,
+            setup_time
+        )
+        
+        # 分配批次
+        batch.assigned_station = selected_station.station_name
+        batch.setup_time = setup_time
+        batch.start_time = start_time  # 修正：所有批次都可以立即開始（流水線並行）
+        
+        # 估算完成時間（粗略估計，精確時間由模擬器計算）
+        estimated_process_time = self._estimate_process_time(
+            vehicle, 
+            batch.quantity,
+            workstation_config
+        )
+        batch.finish_time = batch.start_time + setup_time + estimated_process_time
+        
+        # 更新檢修廠狀態（記錄負載，但不阻塞後續批次）
+        # next_available_time 不再影響開始時間
+        selected_station.next_available_time = max(
+            selected_station.next_available_time, 
+            batch.finish_time
+        )
+        selected_station.total_batches += 1
+        selected_station.total_vehicles += batch.quantity
+        selected_station.current_batch = batch.batch_id
+        
+        # 動態調整檢修廠工位配置
+        # 如果是第一個批次，直接初始化
+        if not selected_station.stages:
+            selected_station.initialize_stages(workstation_config)
+        else:
+            # 如果已有配置，需要擴展到所需工位數的最大值
+            self._expand_station_workstations(selected_station, workstation_config)
+    
+    def _get_vehicle_plan(self, vehicle: VehicleMaster) -> Tuple[List[int], int]:
+        """取得車型的工位配置與換線時間（快取）"""
+        key = (vehicle.manufacturer, vehicle.model)
+        plan = self._vehicle_plans.get(key)
+        if plan is None:
+            workstation_config = vehicle.calculate_workstations()
+            plan = (workstation_config, vehicle.calculate_setup_time())
+            self._vehicle_plans[key] = plan
+        return list(plan[0]), plan[1]
+    
     def _sort_batches(self, batches: List[Batch]) -> List[Batch]:
         """
         排序批次
-        優先級: high > normal > low
-        相同優先級: due_date 早的優先
+        預設規則 (priority):
+            優先級: high > normal > low
+            相同優先級: due_date 早的優先
+        其他規則: EDD / ATC / SLACK，見 scheduler.dispatch
         """
-        priority_order = {"high": 0, "normal": 1, "low": 2}
+        if self.dispatch_rule == DispatchRule.PRIORITY:
+            return dispatch_order(batches, self.dispatch_rule, {}, {})
         
-        return sorted(
-            batches,
-            key=lambda b: (
-                priority_order.get(b.priority, 1),
-                b.due_date if b.due_date else "9999-12-31"
+        clock = self.clock or SimulationClock.from_batches(batches)
+        processing_times = {}
+        due_times = {}
+        for batch in batches:
+            vehicle = get_vehicle_master(self.vehicles_master, batch.manufacturer, batch.model)
+            workstation_config, setup_time = self._get_vehicle_plan(vehicle)
+            processing_times[batch.batch_id] = setup_time + self._estimate_process_time(
+                vehicle, batch.quantity, workstation_config
             )
-        )
+            due_times[batch.batch_id] = clock.to_minutes(batch.due_date)
+        
+        return dispatch_order(batches, self.dispatch_rule, processing_times, due_times)
     
     def _select_best_station(self, 
                             batch: Batch, 
@@ -118,46 +167,45 @@ class GreedyScheduler:
         1. preferred_stations (偏好檢修廠)
         2. 當前可用的最早開始時間（非阻塞）
         3. 換線成本
-        """
-        candidate_stations = []
         
-        # 優先考慮偏好檢修廠
-        for station_name in vehicle.preferred_stations:
-            if station_name in self.stations:
-                candidate_stations.append(self.stations[station_name])
-        
-        # 如果偏好檢修廠為空，考慮所有檢修廠
-        if not candidate_stations:
-            candidate_stations = list(self.stations.values())
-        
-        # 計算每個候選檢修廠的得分
-        scores = {}
-        for station in candidate_stations:
-            # 基礎得分：最早可開始時間（允許立即開始，不需等待前批結束）
-            # 修正：next_available_time 應該是「下一批可進入的時間」，而非「當前批結束時間」
-            # 對於流水線系統，只要第一工站有空，新批次就可以開始
-            earliest_start = 0  # 允許立即開始（流水線特性）
-            
-            estimated_time = self._estimate_process_time(
-                vehicle, 
-                batch.quantity,
-                workstation_config
-            )
-            finish_time = earliest_start + setup_time + estimated_time
-            
-            # 偏好加成
-            preference_bonus = 1.0 if station.station_name in vehicle.preferred_stations else 1.2
-            
-            # 負載平衡：考慮檢修廠當前已分配的批次數量
-            # 傾向選擇負載較低的檢修廠
-            load_penalty = 1.0 + (station.total_batches * 0.1)
-            
-            score = finish_time * preference_bonus * load_penalty
-            scores[station.station_name] = score
+        候選檢修廠以負載排序的 heap 維護，每次選擇 O(log S)
+        """
+        heap = self._get_candidate_heap(vehicle)
         
-        # 選擇得分最低的（最優）
-        best_station_name = min(scores, key=scores.get)
-        return self.stations[best_station_name]
+        # 負載平衡：得分 = 預估完成時間 × 偏好加成 × (1 + 0.1 × 已分配批次數)
+        # 同一候選集合內預估完成時間與偏好加成相同，
+        # 得分最低者即已分配批次數最少者（同分取候選順位較前者）
+        while True:
+            total_batches, position, station_name = heap[0]
+            current = self.stations[station_name].total_batches
+            if total_batches == current:
+                return self.stations[station_name]
+            # 延遲更新：負載已變動的項目以最新批次數重新放回
+            heapq.heapreplace(heap, (current, position, station_name))
+    
+    def _get_candidate_heap(self, vehicle: VehicleMaster) -> List[Tuple[int, int, str]]:
+        """
+        取得車型候選檢修廠的負載 heap
+        候選集合: 存在的偏好檢修廠；若皆不存在則為所有檢修廠
+        相同候選集合的車型共用同一個 heap
+        """
+        key = self._candidate_key(vehicle)
+        heap = self._candidate_heaps.get(key)
+        if heap is None:
+            heap = [
+                (self.stations[name].total_batches, position, name)
+                for position, name in enumerate(key)
+            ]
+            heapq.heapify(heap)
+            self._candidate_heaps[key] = heap
+        return heap
+    
+    def _candidate_key(self, vehicle: VehicleMaster) -> Tuple[str, ...]:
+        """候選檢修廠: 存在的偏好檢修廠（依偏好順序）；若皆不存在則為所有檢修廠"""
+        key = tuple(dict.fromkeys(
+            name for name in vehicle.preferred_stations if name in self.stations
+        ))
+        return key or tuple(self.stations)
     
     def _estimate_process_time(self, 
                                vehicle: VehicleMaster, 
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+from typing import List, Dict, Tuple, Optional
+from models.batch import Order
+from models.vehicle import VehicleMaster
+from scheduler.greedy_scheduler import GreedyScheduler
+from scheduler.dispatch import DispatchRule
+from scheduler.clock import SimulationClock
+from simulator.flow_shop_simulator import FlowShopSimulator
+from simulator.schedule_index import ScheduleIndex
+
+
+class HorizonScheduler:
+    """
+    多日排程
+    依工單日期依序排程多張工單（例如 1115、1116、1117），逐日分配並模擬:
+    - 模擬時間 0 = 第一張工單日期的開工時刻，之後每張工單的批次最早於該日開工時刻開始
+    - 同一個排程器分配所有批次，檢修廠的工位配置與負載延續到隔日
+    - 每日分配後只模擬當日批次，並由前一日結束時的模擬狀態（snapshot）繼續；
+      隔日擴充的工位不會回溯影響前一日的排程
+    """
+
+    def __init__(self,
+                 vehicles_master: Dict[Tuple[str, str], VehicleMaster],
+                 station_names: Optional[List[str]] = None,
+                 dispatch_rule: DispatchRule = DispatchRule.PRIORITY,
+                 start_hour: int = SimulationClock.DEFAULT_START_HOUR):
+        self.vehicles_master = vehicles_master
+        self.station_names = station_names
+        self.dispatch_rule = dispatch_rule
+        self.start_hour = start_hour
+        self.clock: Optional[SimulationClock] = None
+        self.scheduler: Optional[GreedyScheduler] = None
+        self.simulator: Optional[FlowShopSimulator] = None
+
+    def schedule(self, orders: List[Order]) -> Dict:
+        """
+        排程多張工單
+        返回: 與 FlowShopSimulator.simulate_all_batches 相同的結果，另附每日摘要 days
+        """
+        if not orders:
+            raise ValueError("沒有工單")
+        orders = sorted(orders, key=lambda o: o.order_date)
+
+        self.clock = SimulationClock.from_order(orders[0], self.start_hour)
+        self.scheduler = GreedyScheduler(
+            self.vehicles_master, self.station_names,
+            dispatch_rule=self.dispatch_rule, clock=self.clock
+        )
+
+        # 逐日分配與模擬: 當日批次依派工規則排序，最早於當日開工時刻開始，
+        # 模擬由前一日結束時的工位可用時間繼續（當日擴充的工位由該日起可用）
+        self.simulator = FlowShopSimulator(self.vehicles_master, self.scheduler.stations)
+        state = None
+        all_batches = []
+        all_vehicles = []
+        all_schedules = []
+        day_batches = []
+        for order in orders:
+            day_start = self._day_start(order)
+            batches = self.scheduler._sort_batches(order.batches)
+            for batch in batches:
+                self.scheduler._assign_batch(batch, start_time=day_start)
+            day = self.simulator.simulate_all_batches(batches, initial_state=state)
+            state = self.simulator.snapshot()
+            all_batches.extend(batches)
+            all_vehicles.extend(day["vehicles"])
+            all_schedules.extend(day["schedules"])
+            day_batches.append((order, day_start, batches))
+
+        self.simulator.vehicle_instances = all_vehicles
+        self.simulator.schedules = all_schedules
+        self.simulator.index = ScheduleIndex(all_schedules)
+        return {
+            "vehicles": all_vehicles,
+            "schedules": all_schedules,
+            "batches": all_batches,
+            "stations": list(self.scheduler.stations.values()),
+            "days": self._day_summaries(day_batches),
+        }
+
+    def _day_start(self, order: Order) -> int:
+        """工單日期開工時刻的模擬分鐘"""
+        order_date = datetime.strptime(order.order_date, "%Y-%m-%d")
+        return self.clock.to_minutes(order_date + timedelta(hours=self.start_hour))
+
+    def _day_summaries(self, day_batches) -> List[Dict]:
+        """
+        每日摘要
+        carry_over: 當日工作延續到隔日開工時刻之後的分鐘數
+        """
+        days = []
+        for i, (order, day_start, batches) in enumerate(day_batches):
+            finish_time = max((b.finish_time for b in batches if b.finish_time is not None), default=day_start)
+            next_start = day_batches[i + 1][1] if i + 1 < len(day_batches) else None
+            days.append({
+                "order_id": order.order_id,
+                "order_date": order.order_date,
+                "day_start": day_start,
+                "batches": len(batches),
+                "vehicles": sum(b.quantity for b in batches),
+                "finish_time": finish_time,
+                "carry_over": max(0, finish_time - next_start) if next_start is not None else 0,
+            })
+        return days
@@ -0,0 +1,248 @@
+import time
+from typing import List, Dict, Tuple, Optional, Set
+from models.batch import Batch
+from models.vehicle import VehicleMaster
+from models.schedule import VehicleInstance, StageSchedule, VehicleStatus
+from data_loader import get_vehicle_master
+from scheduler.greedy_scheduler import GreedyScheduler
+from simulator.evaluator import StationTimeline
+from simulator.flow_shop_simulator import station_layout, compose_state
+from simulator.schedule_index import ScheduleIndex
+
+
+class OnlineScheduler:
+    """
+    滾動時域線上排程
+    保留檢修廠與工位的即時狀態，新批次到達時只重排尚未開始的工作
+
+    每次到達（current_time = t）:
+    1. 新批次以貪婪規則分配檢修廠，最早開始時間為到達時間
+    2. 第一關卡已在 t 之前開始的車輛視為已開工，其排程全部凍結
+    3. 由凍結排程重建各工位的可用時間
+    4. 未開工的車輛依派工規則重新模擬；尚未有車輛開工且首台車無法在 t + horizon 之前
+       開始的批次延後到下次重排（新批次到達或 advance 推進時間）
+    已有車輛開工的批次一律排入剩餘車輛，批次完成時間涵蓋整批
+    """
+
+    DEFAULT_HORIZON = 480  # 分鐘
+
+    def __init__(self,
+                 vehicles_master: Dict[Tuple[str, str], VehicleMaster],
+                 station_names: Optional[List[str]] = None,
+                 horizon: int = DEFAULT_HORIZON):
+        self.vehicles_master = vehicles_master
+        self.scheduler = GreedyScheduler(vehicles_master, station_names)
+        self.horizon = horizon
+        self.current_time = 0
+        self.batches: Dict[str, Batch] = {}
+        self.deferred: List[str] = []
+        # 車輛 → 該車各關卡排程（依關卡順序）
+        self._vehicle_rows: Dict[str, List[StageSchedule]] = {}
+        # 車輛 / 批次 → 排程記錄索引（每次重排後重建）
+        self.index = ScheduleIndex([])
+
+    @property
+    def stations(self):
+        return self.scheduler.stations
+
+    @property
+    def schedules(self) -> List[StageSchedule]:
+        return [row for rows in self._vehicle_rows.values() for row in rows]
+
+    def add_batches(self, batches: List[Batch], current_time: int) -> Dict:
+        """
+        在 current_time 加入新批次並重排未開工的工作
+        先驗證並完成重排，成功後才更新排程狀態；任何錯誤都不會留下只加入一半的批次
+        返回: 本次重排的統計資料
+        """
+        started = time.perf_counter()
+        self._check_time(current_time)
+        seen: Set[str] = set()
+        for batch in batches:
+            if batch.batch_id in self.batches or batch.batch_id in seen:
+                raise ValueError(f"批次已存在: {batch.batch_id}")
+            seen.add(batch.batch_id)
+            # 未知車型在變更任何狀態前即拒絕
+            get_vehicle_master(self.vehicles_master, batch.manufacturer, batch.model)
+
+        # 1. 分配新批次
+        new_batches = self.scheduler._sort_batches(batches)
+        for batch in new_batches:
+            self.scheduler._assign_batch(batch, start_time=current_time)
+
+        return self._replan(current_time, new_batches, started)
+
+    def advance(self, current_time: int) -> Dict:
+        """
+        時間推進到 current_time（沒有新批次到達）
+        凍結期間內開工的車輛，並重排未開工的工作與延後的批次
+        """
+        started = time.perf_counter()
+        self._check_time(current_time)
+        return self._replan(current_time, [], started)
+
+    def _check_time(self, current_time: int):
+        if current_time < self.current_time:
+            raise ValueError(f"時間不可倒退: {current_time} < {self.current_time}")
+
+    def _replan(self, current_time: int, new_batches: List[Batch], started: float) -> Dict:
+        """凍結 current_time 前已開工的車輛，重排其餘車輛；全部完成後才更新狀態"""
+        # 2. 凍結已開工車輛，其餘車輛移出排程
+        frozen_by_batch: Dict[str, Set[int]] = {}
+        vehicle_rows: Dict[str, List[StageSchedule]] = {}
+        for vehicle_id, rows in self._vehicle_rows.items():
+            if rows and rows[0].start_time < current_time:
+                sequence = int(rows[0].schedule_id.rsplit("_", 2)[-2])
+                frozen_by_batch.setdefault(rows[0].batch_id, set()).add(sequence)
+                vehicle_rows[vehicle_id] = rows
+
+        # 3. 重建工位可用時間
+        timelines = self._build_timelines(vehicle_rows)
+
+        # 4. 重排未開工的車輛
+        batches = dict(self.batches)
+        batches.update((b.batch_id, b) for b in new_batches)
+        pending = [
+            b for b in batches.values()
+            if len(frozen_by_batch.get(b.batch_id, ())) < b.quantity
+        ]
+        replanned_vehicles = 0
+        deferred = []
+        for batch in self.scheduler._sort_batches(pending):
+            planned = self._plan_batch(batch, timelines[batch.assigned_station],
+                                       frozen_by_batch.get(batch.batch_id, set()), current_time)
+            if planned is None:
+                deferred.append(batch.batch_id)
+            else:
+                vehicle_rows.update(planned)
+                replanned_vehicles += len(planned)
+
+        self.current_time = current_time
+        self.batches = batches
+        self.deferred = deferred
+        self._vehicle_rows = vehicle_rows
+        self._update_batch_finish_times()
+        self.index = ScheduleIndex(self.schedules)
+
+        return {
+            "current_time": current_time,
+            "new_batches": len(new_batches),
+            "replanned_batches": len(pending) - len(deferred),
+            "replanned_vehicles": replanned_vehicles,
+            "frozen_vehicles": sum(len(seqs) for seqs in frozen_by_batch.values()),
+            "deferred_batches": list(deferred),
+            "total_time": max(
+                (rows[-1].finish_time for rows in vehicle_rows.values() if rows),
+                default=0
+            ),
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def _build_timelines(self, vehicle_rows: Dict[str, List[StageSchedule]]) -> Dict[str, StationTimeline]:
+        """由凍結排程計算各檢修廠每個工位的可用時間"""
+        free_times = {}
+        for name, station in self.stations.items():
+            free_times[name] = {
+                stage.stage_number: [0] * len(stage.workstations) for stage in station.stages
+            }
+        for rows in vehicle_rows.values():
+            for row in rows:
+                ws_number = int(row.workstation_id.rsplit("_", 1)[1])
+                stage_free = free_times[row.station_name][row.stage_number]
+                if row.finish_time > stage_free[ws_number]:
+                    stage_free[ws_number] = row.finish_time
+        return {
+            name: StationTimeline.from_free_times(
+                [stages[number] for number in sorted(stages)]
+            )
+            for name, stages in free_times.items()
+        }
+
+    def _plan_batch(self, batch: Batch, timeline: StationTimeline, frozen: Set[int],
+                    current_time: int) -> Optional[Dict[str, List[StageSchedule]]]:
+        """
+        模擬批次中尚未開工的車輛
+        批次尚無車輛開工且首台車開始時間超出時域時，還原工位狀態並返回 None；
+        否則返回排入車輛的排程（車輛 → 各關卡排程）
+        """
+        vehicle = get_vehicle_master(self.vehicles_master, batch.manufacturer, batch.model)
+        ready_time = max(current_time, (batch.start_time or 0) + (batch.setup_time or 0))
+        snapshot = timeline.snapshot()
+
+        planned: List[Tuple[int, List[Tuple[int, int, int, int]]]] = []
+        for sequence in range(1, batch.quantity + 1):
+            if sequence in frozen:
+                continue
+            rows = timeline.assign_vehicle(vehicle.inspection_times, ready_time)
+            if not frozen and not planned and rows and rows[0][2] >= current_time + self.horizon:
+                timeline.restore(snapshot)
+                return None
+            planned.append((sequence, rows))
+
+        vehicle_rows = {}
+        for sequence, rows in planned:
+            vehicle_id = f"{batch.batch_id}_{batch.model}_{sequence}"
+            vehicle_rows[vehicle_id] = [
+                StageSchedule(
+                    schedule_id=f"SCH_{batch.batch_id}_{sequence}_{stage_number}",
+                    vehicle_id=vehicle_id,
+                    batch_id=batch.batch_id,
+                    station_name=batch.assigned_station,
+                    stage_number=stage_number,
+                    workstation_id=f"{batch.assigned_station}_{stage_number}_{ws}",
+                    start_time=start,
+                    finish_time=finish,
+                    duration=finish - start
+                )
+                for stage_number, ws, start, finish in rows
+            ]
+        return vehicle_rows
+
+    def _update_batch_finish_times(self):
+        finish_times: Dict[str, int] = {}
+        for rows in self._vehicle_rows.values():
+            if rows:
+                batch_id = rows[-1].batch_id
+                finish_times[batch_id] = max(finish_times.get(batch_id, 0), rows[-1].finish_time)
+        for batch in self.batches.values():
+            batch.finish_time = finish_times.get(batch.batch_id)
+
+    def get_state_at_time(self, time: int) -> Dict:
+        """獲取指定時間點的系統狀態"""
+        active_rows = (
+            (s.station_name, s.workstation_id, s.vehicle_id, s.batch_id)
+            for rows in self._vehicle_rows.values()
+            for s in rows
+            if s.start_time <= time < s.finish_time
+        )
+        return compose_state(time, station_layout(self.stations.values()), active_rows)
+
+    def result(self) -> Dict:
+        """目前排程結果（與 FlowShopSimulator.simulate_all_batches 格式相同）"""
+        vehicles = []
+        for vehicle_id, rows in self._vehicle_rows.items():
+            batch = self.batches[rows[0].batch_id]
+            sequence = int(vehicle_id.rsplit("_", 1)[1])
+            status = VehicleStatus.WAITING
+            if rows[-1].finish_time <= self.current_time:
+                status = VehicleStatus.COMPLETED
+            elif rows[0].start_time <= self.current_time:
+                status = VehicleStatus.IN_PROGRESS
+            vehicles.append(VehicleInstance(
+                vehicle_id=vehicle_id,
+                batch_id=batch.batch_id,
+                manufacturer=batch.manufacturer,
+                model=batch.model,
+                sequence=sequence,
+                system=batch.system,
+                current_station=batch.assigned_station,
+                status=status,
+                start_time=rows[0].start_time,
+                finish_time=rows[-1].finish_time
+            ))
+        return {
+            "vehicles": vehicles,
+            "schedules": self.schedules,
+            "batches": list(self.batches.values()),
+            "stations": list(self.stations.values())
+        }
@@ -0,0 +1,124 @@
+from typing import List, Dict, Tuple, Optional, Sequence
+from datetime import datetime
+from models.batch import Batch
+from models.vehicle import VehicleMaster
+from data_loader import get_vehicle_master
+from simulator.evaluator import build_batch_plans, evaluate_station
+
+
+class ChangeoverSequencer:
+    """
+    換線最小化批次排序
+    在各檢修廠內重新排列批次，讓相同車型相鄰以省去換線時間
+
+    規則:
+    1. 優先級類別不變（high → normal → low），只在同類別內重排
+    2. 最近鄰法: 下一批優先選擇與前一批同車型者（免換線），其次同車系
+    3. 交期保護: 只從交期不晚於「最早交期 + due_window 分鐘」的批次中挑選
+    免換線的批次沿用前一批的就緒時間（start_time = 前一批換線完成時間，setup_time = 0），
+    不會早於前一批開工；換線批次維持原本的開始時間與完整換線時間
+    """
+
+    PRIORITY_ORDER = {"high": 0, "normal": 1, "low": 2}
+
+    def __init__(self,
+                 vehicles_master: Dict[Tuple[str, str], VehicleMaster],
+                 due_window: int = 240):
+        self.vehicles_master = vehicles_master
+        self.due_window = due_window
+        self.changeovers_skipped = 0  # 排序後免換線的批次數
+        self._setup_times: Dict[Tuple[str, str], int] = {}
+
+    def makespan(self, batches: List[Batch], station_configs: Dict[str, Sequence[int]]) -> int:
+        """以目前的批次順序與換線設定模擬的總完工時間（與 FlowShopSimulator 相同）"""
+        makespan = 0
+        for station_name, plans in build_batch_plans(batches, self.vehicles_master).items():
+            finish_times = evaluate_station(plans, station_configs[station_name])
+            makespan = max(makespan, max(finish_times.values(), default=0))
+        return makespan
+
+    def sequence(self, batches: List[Batch]) -> List[Batch]:
+        """
+        重排已分配的批次並更新每批的 start_time / setup_time
+        返回: 依檢修廠分組、組內依加工順序排列的批次
+        """
+        self.changeovers_skipped = 0
+
+        by_station: Dict[str, List[Batch]] = {}
+        unassigned = []
+        for batch in batches:
+            if batch.assigned_station:
+                by_station.setdefault(batch.assigned_station, []).append(batch)
+            else:
+                unassigned.append(batch)
+
+        sequenced = []
+        for station_batches in by_station.values():
+            sequenced.extend(self._sequence_station(station_batches))
+
+        return sequenced + unassigned
+
+    def _sequence_station(self, batches: List[Batch]) -> List[Batch]:
+        """單一檢修廠內的最近鄰排序"""
+        classes: Dict[int, List[Batch]] = {}
+        for batch in batches:
+            classes.setdefault(self.PRIORITY_ORDER.get(batch.priority, 1), []).append(batch)
+
+        ordered = []
+        previous: Optional[Batch] = None
+        for priority in sorted(classes):
+            remaining = sorted(classes[priority], key=self._due_key)
+            while remaining:
+                candidates = self._due_window_candidates(remaining)
+                best = min(
+                    candidates,
+                    key=lambda b: (
+                        self._changeover_time(previous, b),
+                        previous is None or b.system != previous.system,
+                        self._due_key(b)
+                    )
+                )
+                remaining.remove(best)
+
+                best.setup_time = self._changeover_time(previous, best)
+                if best.setup_time == 0:
+                    # 免換線: 與前一批同時就緒
+                    best.start_time = (previous.start_time or 0) + previous.setup_time
+                    self.changeovers_skipped += 1
+
+                ordered.append(best)
+                previous = best
+
+        return ordered
+
+    def _due_window_candidates(self, remaining: List[Batch]) -> List[Batch]:
+        """交期在最早交期 + due_window 內的候選批次（remaining 已依交期排序）"""
+        earliest = remaining[0].due_date
+        if earliest is None:
+            return remaining
+
+        candidates = []
+        for batch in remaining:
+            if batch.due_date is None or \
+                    (batch.due_date - earliest).total_seconds() > self.due_window * 60:
+                break
+            candidates.append(batch)
+        return candidates
+
+    def _changeover_time(self, previous: Optional[Batch], batch: Batch) -> int:
+        """前一批為同車型時免換線，否則需完整換線"""
+        if previous is not None and \
+                (previous.manufacturer, previous.model) == (batch.manufacturer, batch.model):
+            return 0
+        return self._full_setup_time(batch)
+
+    def _full_setup_time(self, batch: Batch) -> int:
+        key = (batch.manufacturer, batch.model)
+        if key not in self._setup_times:
+            vehicle = get_vehicle_master(self.vehicles_master, batch.manufacturer, batch.model)
+            self._setup_times[key] = vehicle.calculate_setup_time()
+        return self._setup_times[key]
+
+    @staticmethod
+    def _due_key(batch: Batch):
+        return batch.due_date or datetime.max
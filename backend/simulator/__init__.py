@@ -1,3 +1,9 @@
-from .flow_shop_simulator import FlowShopSimulator
-
+# 子模組於首次存取時才載入: 匯入 simulator.evaluator 等不會連帶載入整個模擬器
 __all__ = ['FlowShopSimulator']
+
+
+def __getattr__(name):
+    if name == 'FlowShopSimulator':
+        from .flow_shop_simulator import FlowShopSimulator
+        return FlowShopSimulator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,220 @@
+import heapq
+from typing import List, Dict, Tuple, Optional, Sequence
+from models.batch import Batch
+from models.vehicle import VehicleMaster
+from data_loader import get_vehicle_master
+
+
+class StationTimeline:
+    """
+    檢修廠工位可用時間
+    每個關卡以 heap 維護 (可用時間, 工位編號)，取最早可用工位為 O(log W)
+    與 FlowShopSimulator 選擇工位的規則相同（同時可用時取編號較小者）
+    """
+
+    __slots__ = ("heaps",)
+
+    def __init__(self, workstation_config: Sequence[int]):
+        self.heaps: List[List[Tuple[int, int]]] = [
+            [(0, ws) for ws in range(count)] for count in workstation_config
+        ]
+
+    @classmethod
+    def from_free_times(cls, free_times: Sequence[Sequence[int]]) -> "StationTimeline":
+        """由各關卡每個工位的可用時間建立（free_times[關卡][工位編號]）"""
+        timeline = cls(())
+        timeline.heaps = []
+        for stage_free_times in free_times:
+            heap = [(available, ws) for ws, available in enumerate(stage_free_times)]
+            heapq.heapify(heap)
+            timeline.heaps.append(heap)
+        return timeline
+
+    @classmethod
+    def from_snapshot(cls, snapshot: List[List[Tuple[int, int]]]) -> "StationTimeline":
+        """由 snapshot() 的結果建立"""
+        timeline = cls(())
+        timeline.restore(snapshot)
+        return timeline
+
+    def ensure_capacity(self, workstation_config: Sequence[int]):
+        """工位配置擴展時加入新工位（時間 0 可用）"""
+        while len(self.heaps) < len(workstation_config):
+            self.heaps.append([])
+        for heap, count in zip(self.heaps, workstation_config):
+            if len(heap) < count:
+                existing = {ws for _, ws in heap}
+                for ws in range(count):
+                    if ws not in existing:
+                        heapq.heappush(heap, (0, ws))
+
+    def snapshot(self) -> List[List[Tuple[int, int]]]:
+        """複製目前的工位可用時間"""
+        return [list(heap) for heap in self.heaps]
+
+    def restore(self, snapshot: List[List[Tuple[int, int]]]):
+        """還原 snapshot() 的工位可用時間"""
+        self.heaps = [list(heap) for heap in snapshot]
+
+    def assign_vehicle(self, stage_times: Sequence[int], ready_time: int) -> List[Tuple[int, int, int, int]]:
+        """
+        安排一台車依序通過各關卡，並返回各關卡的安排
+        返回: [(關卡編號, 工位編號, 開始時間, 完成時間)]
+        """
+        rows = []
+        prev_stage_finish = ready_time
+        for stage_number, (heap, duration) in enumerate(zip(self.heaps, stage_times), 1):
+            if not heap:
+                continue
+            available, ws = heap[0]
+            start = available if available > prev_stage_finish else prev_stage_finish
+            prev_stage_finish = start + duration
+            heapq.heapreplace(heap, (prev_stage_finish, ws))
+            rows.append((stage_number, ws, start, prev_stage_finish))
+        return rows
+
+    def schedule_vehicle(self, stage_times: Sequence[int], ready_time: int) -> int:
+        """
+        安排一台車依序通過各關卡
+        返回: 車輛完成時間
+        """
+        prev_stage_finish = ready_time
+        for heap, duration in zip(self.heaps, stage_times):
+            if not heap:
+                continue
+            available, ws = heap[0]
+            start = available if available > prev_stage_finish else prev_stage_finish
+            prev_stage_finish = start + duration
+            heapq.heapreplace(heap, (prev_stage_finish, ws))
+        return prev_stage_finish
+
+
+class FlexibleStationTimeline(StationTimeline):
+    """
+    人員可於關卡間調動的檢修廠工位可用時間
+    每個工位代表一名人員（編號在檢修廠內唯一），換線時依新批次的配置重新分配:
+    多出人員的關卡釋出最早可用者，依關卡順序補到不足的關卡，
+    可用時間 = 原關卡完成手上工作的時間 + 調動時間
+    """
+
+    __slots__ = ()
+
+    def __init__(self, workstation_config: Sequence[int]):
+        super().__init__(())
+        offset = 0
+        for count in workstation_config:
+            self.heaps.append([(0, offset + ws) for ws in range(count)])
+            offset += count
+
+    def ensure_capacity(self, workstation_config: Sequence[int]):
+        """總人數增加時加入新人員（時間 0 可用，編號接續，先放在第一個關卡，由 reallocate 重新分配）"""
+        while len(self.heaps) < len(workstation_config):
+            self.heaps.append([])
+        staff = [s for heap in self.heaps for _, s in heap]
+        next_staff = max(staff, default=-1) + 1
+        for staff_id in range(next_staff, next_staff + sum(workstation_config) - len(staff)):
+            heapq.heappush(self.heaps[0], (0, staff_id))
+
+    def reallocate(self, workstation_config: Sequence[int], move_time: int = 0) -> int:
+        """
+        調整各關卡人數為 workstation_config（總人數須與目前相同）
+        返回: 調動人數
+        """
+        released = []
+        for heap, count in zip(self.heaps, workstation_config):
+            surplus = len(heap) - count
+            if surplus > 0:
+                heap.sort()
+                released.extend(heap[:surplus])
+                del heap[:surplus]  # 已排序的串列仍是 heap
+        released.sort()
+
+        moved = iter(released)
+        for heap, count in zip(self.heaps, workstation_config):
+            while len(heap) < count:
+                available, staff = next(moved)
+                heapq.heappush(heap, (available + move_time, staff))
+        return len(released)
+
+
+class BatchPlan:
+    """快速評估用的批次資料（不含 pydantic 物件）"""
+
+    __slots__ = ("batch_id", "ready_time", "stage_times", "quantity", "due_time")
+
+    def __init__(self,
+                 batch_id: str,
+                 ready_time: int,
+                 stage_times: Sequence[int],
+                 quantity: int,
+                 due_time: Optional[int] = None):
+        self.batch_id = batch_id
+        self.ready_time = ready_time    # 開始時間 + 換線時間
+        self.stage_times = stage_times
+        self.quantity = quantity
+        self.due_time = due_time        # 模擬分鐘，None 表示無交期
+
+
+def build_batch_plans(batches: List[Batch],
+                      vehicles_master: Dict[Tuple[str, str], VehicleMaster],
+                      due_times: Optional[Dict[str, Optional[int]]] = None) -> Dict[str, List[BatchPlan]]:
+    """
+    將已分配的批次轉換為各檢修廠的 BatchPlan 清單（保持模擬順序）
+    due_times: {batch_id: 交期模擬分鐘}
+    """
+    plans: Dict[str, List[BatchPlan]] = {}
+    for batch in batches:
+        if not batch.assigned_station:
+            continue
+        vehicle = get_vehicle_master(vehicles_master, batch.manufacturer, batch.model)
+        setup_time = batch.setup_time
+        if setup_time is None:
+            setup_time = vehicle.calculate_setup_time()
+        plans.setdefault(batch.assigned_station, []).append(BatchPlan(
+            batch_id=batch.batch_id,
+            ready_time=(batch.start_time or 0) + setup_time,
+            stage_times=vehicle.inspection_times,
+            quantity=batch.quantity,
+            due_time=(due_times or {}).get(batch.batch_id)
+        ))
+    return plans
+
+
+def evaluate_station(plans: List[BatchPlan], workstation_config: Sequence[int]) -> Dict[str, int]:
+    """
+    以指定工位配置快速模擬單一檢修廠
+    返回: {batch_id: 批次完成時間}
+    """
+    timeline = StationTimeline(workstation_config)
+    finish_times = {}
+    for plan in plans:
+        finish = plan.ready_time
+        for _ in range(plan.quantity):
+            vehicle_finish = timeline.schedule_vehicle(plan.stage_times, plan.ready_time)
+            if vehicle_finish > finish:
+                finish = vehicle_finish
+        finish_times[plan.batch_id] = finish
+    return finish_times
+
+
+def evaluate_station_flexible(plans: List[BatchPlan],
+                              workstation_config: Sequence[int],
+                              batch_configs: Sequence[Sequence[int]],
+                              move_time: int = 0) -> Tuple[Dict[str, int], int]:
+    """
+    人員可調動的單一檢修廠快速模擬
+    workstation_config: 初始配置（總人數）；batch_configs: 每個批次開始前調整成的配置
+    返回: ({batch_id: 批次完成時間}, 調動人次)
+    """
+    timeline = FlexibleStationTimeline(workstation_config)
+    finish_times = {}
+    moves = 0
+    for plan, config in zip(plans, batch_configs):
+        moves += timeline.reallocate(config, move_time)
+        finish = plan.ready_time
+        for _ in range(plan.quantity):
+            vehicle_finish = timeline.schedule_vehicle(plan.stage_times, plan.ready_time)
+            if vehicle_finish > finish:
+                finish = vehicle_finish
+        finish_times[plan.batch_id] = finish
+    return finish_times, moves
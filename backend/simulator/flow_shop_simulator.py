@@ -1,21 +1,45 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterable, Iterator, Optional
+import numpy as np
 from models.batch import Batch
 from models.vehicle import VehicleMaster
 from models.station import Station
 from models.schedule import VehicleInstance, StageSchedule, VehicleStatus, ScheduleStatus
 from data_loader import get_vehicle_master
+from simulator.evaluator import StationTimeline, FlexibleStationTimeline
+from simulator.schedule_index import ScheduleIndex
 
 
 class FlowShopSimulator:
-    """流水線模擬器"""
+    """
+    流水線模擬器
+    flexible_staff: 人員可於關卡間調動；各檢修廠總人數固定為工位配置的總數，
+    每個批次開始前依該車型的平衡配置（analytics.line_balancing.balance_workstations）
+    重新分配各關卡人數，調動的人員於 move_time 分鐘後到新關卡
+    """
     
     def __init__(self, 
                  vehicles_master: Dict[Tuple[str, str], VehicleMaster],
-                 stations: Dict[str, Station]):
+                 stations: Dict[str, Station],
+                 flexible_staff: bool = False,
+                 move_time: int = 0):
         self.vehicles_master = vehicles_master
         self.stations = stations
+        self.flexible_staff = flexible_staff
+        self.move_time = move_time
+        self._timeline_class = FlexibleStationTimeline if flexible_staff else StationTimeline
+        # 人員調動人次（flexible_staff）
+        self.staff_moves = 0
+        # 車型與總人數 → 平衡配置
+        self._staff_plans: Dict[Tuple[str, str, int], List[int]] = {}
+        # 檢修廠 → 人員編號 → (關卡索引, 工位編號)；檢修廠 → 各關卡工位的最後完成時間
+        self._staff_slots: Dict[str, Dict[int, Tuple[int, int]]] = {}
+        self._slot_free: Dict[str, List[List[int]]] = {}
         self.vehicle_instances: List[VehicleInstance] = []
         self.schedules: List[StageSchedule] = []
+        # 車輛 / 批次 → 排程記錄索引（模擬完成時建立）
+        self.index = ScheduleIndex([])
+        # 模擬狀態：檢修廠 → 各關卡工位可用時間
+        self._timelines: Dict[str, StationTimeline] = {}
     
     def simulate_batch(self, batch: Batch) -> Tuple[List[VehicleInstance], List[StageSchedule]]:
         """
@@ -80,83 +104,153 @@ class FlowShopSimulator:
         """
         模擬流水線生產
         每台車依序通過5個關卡
+        工位可用時間記錄在模擬狀態（StationTimeline），不修改檢修廠設定
         """
         schedules = []
         stage_times = vehicle_master.inspection_times
+        timeline, slots = self._prepare_timeline(station, vehicle_master)
         
         # 換線時間
-        setup_time = batch.setup_time or vehicle_master.calculate_setup_time()
+        setup_time = batch.setup_time
+        if setup_time is None:
+            setup_time = vehicle_master.calculate_setup_time()
         current_time = batch.start_time or 0
         
-        # 記錄每台車在每個關卡的完成時間
-        vehicle_finish_times = {v.vehicle_id: 0 for v in vehicles}
-        
         # 逐台車輛進行排程
         for vehicle in vehicles:
-            prev_stage_finish = current_time + setup_time  # 第一台車要等換線完成
-            vehicle_start_time = None
+            # 第一台車要等換線完成；每個關卡取最早可用的工位
+            # 開始時間考慮: 1) 工位可用時間 2) 前一關卡完成時間
+            rows = timeline.assign_vehicle(stage_times, current_time + setup_time)
             
-            # 依序通過5個關卡
-            for stage_num in range(1, 6):
-                stage = station.get_stage(stage_num)
-                if not stage:
-                    continue
-                
-                # 找最早可用的工位
-                workstation = stage.find_earliest_available_workstation(prev_stage_finish)
-                if not workstation:
-                    continue
-                
-                # 計算開始時間
-                # 考慮: 1) 工位可用時間 2) 前一關卡完成時間
-                ws_available = workstation.get_available_time()
-                start_time = max(ws_available, prev_stage_finish)
-                
-                # 計算完成時間
-                duration = stage_times[stage_num - 1]
-                finish_time = start_time + duration
-                
-                # 記錄車輛開始時間與狀態
-                if vehicle_start_time is None:
-                    vehicle_start_time = start_time
-                    vehicle.start_time = start_time
-                    vehicle.status = VehicleStatus.IN_PROGRESS
-                
+            for stage_num, ws_number, start_time, finish_time in rows:
+                if slots is not None:
+                    ws_number = slots[stage_num - 1][ws_number]
                 # 創建排程記錄
-                schedule = StageSchedule(
+                schedules.append(StageSchedule(
                     schedule_id=f"SCH_{batch.batch_id}_{vehicle.sequence}_{stage_num}",
                     vehicle_id=vehicle.vehicle_id,
                     batch_id=batch.batch_id,
                     station_name=station.station_name,
                     stage_number=stage_num,
-                    workstation_id=workstation.workstation_id,
+                    workstation_id=f"{station.station_name}_{stage_num}_{ws_number}",
                     start_time=start_time,
                     finish_time=finish_time,
-                    duration=duration
-                )
-                schedules.append(schedule)
-                
-                # 更新工位狀態
-                workstation.current_vehicle = vehicle.vehicle_id
-                workstation.start_time = start_time
-                workstation.finish_time = finish_time
-                workstation.status = "busy"
-                
-                # 更新下一關卡的前置時間
-                prev_stage_finish = finish_time
+                    duration=finish_time - start_time
+                ))
             
-            # 記錄車輛完成時間
-            vehicle_finish_times[vehicle.vehicle_id] = prev_stage_finish
-            vehicle.finish_time = prev_stage_finish
+            # 記錄車輛開始、完成時間與狀態
+            if rows:
+                vehicle.start_time = rows[0][2]
+                vehicle.finish_time = rows[-1][3]
+            else:
+                vehicle.finish_time = current_time + setup_time
             vehicle.status = VehicleStatus.COMPLETED
         
         return schedules
     
-    def simulate_all_batches(self, batches: List[Batch]) -> Dict:
+    def _get_timeline(self, station: Station) -> StationTimeline:
+        """
+        取得檢修廠的模擬狀態
+        首次使用時依檢修廠工位配置建立；配置擴展後補上新工位（人員）
+        """
+        if self.flexible_staff:
+            config = station.workstation_config
+        else:
+            config = [len(stage.workstations) for stage in station.stages]
+        timeline = self._timelines.get(station.station_name)
+        if timeline is None:
+            timeline = self._timeline_class(config)
+            self._timelines[station.station_name] = timeline
+        else:
+            timeline.ensure_capacity(config)
+        return timeline
+    
+    def _prepare_timeline(self,
+                          station: Station,
+                          vehicle: VehicleMaster) -> Tuple[StationTimeline, Optional[List[Dict[int, int]]]]:
+        """
+        取得批次開始前的模擬狀態
+        人員調動時先依車型的平衡配置重新分配人員，並返回各關卡人員編號 → 工位編號的對照:
+        留在原關卡的人員沿用原工位；調入的人員使用該關卡中未被佔用、
+        且前一位人員已完成工作的工位，沒有時新增工位（檢修廠佈局一併補上）
+        """
+        timeline = self._get_timeline(station)
+        if not self.flexible_staff:
+            return timeline, None
+        
+        budget = sum(station.workstation_config)
+        key = (vehicle.manufacturer, vehicle.model, budget)
+        config = self._staff_plans.get(key)
+        if config is None:
+            from analytics.line_balancing import balance_workstations
+            config = balance_workstations(np.array([vehicle.inspection_times]), budget)[0].tolist()
+            self._staff_plans[key] = config
+        
+        staff_slots = self._staff_slots.setdefault(station.station_name, {})
+        slot_free = self._slot_free.setdefault(station.station_name, [])
+        while len(slot_free) < len(timeline.heaps):
+            slot_free.append([])
+        
+        # 調動前記錄各工位目前人員的可用時間（即該工位最後一項工作的完成時間）
+        for index, heap in enumerate(timeline.heaps):
+            for available, staff in heap:
+                slot = staff_slots.get(staff)
+                if slot is not None and slot[0] == index:
+                    slot_free[index][slot[1]] = available
+        self.staff_moves += timeline.reallocate(config, self.move_time)
+        
+        slots = []
+        for index, (stage, heap) in enumerate(zip(station.stages, timeline.heaps)):
+            free = slot_free[index]
+            stage_slots = {
+                staff: staff_slots[staff][1]
+                for _, staff in heap
+                if staff in staff_slots and staff_slots[staff][0] == index
+            }
+            held = set(stage_slots.values())
+            for available, staff in sorted(heap):
+                if staff in stage_slots:
+                    continue
+                ws = next((ws for ws, done in enumerate(free) if ws not in held and done <= available), len(free))
+                if ws == len(free):
+                    free.append(available)
+                held.add(ws)
+                stage_slots[staff] = ws
+                staff_slots[staff] = (index, ws)
+            stage.ensure_workstations(len(free))
+            slots.append(stage_slots)
+        return timeline, slots
+    
+    def reset(self):
+        """清除模擬狀態（所有工位回到時間 0 可用）"""
+        self._timelines = {}
+        self.staff_moves = 0
+        self._staff_slots = {}
+        self._slot_free = {}
+    
+    def snapshot(self) -> Dict[str, List[List[Tuple[int, int]]]]:
+        """複製各檢修廠工位可用時間（多日排程以 simulate_all_batches(initial_state=...) 接續隔日）"""
+        return {name: timeline.snapshot() for name, timeline in self._timelines.items()}
+    
+    def restore(self, snapshot: Dict[str, List[List[Tuple[int, int]]]]):
+        """還原 snapshot() 的工位可用時間"""
+        self._timelines = {
+            name: self._timeline_class.from_snapshot(heaps) for name, heaps in snapshot.items()
+        }
+    
+    def simulate_all_batches(self,
+                             batches: List[Batch],
+                             initial_state: Optional[Dict[str, List[List[Tuple[int, int]]]]] = None) -> Dict:
         """
         模擬所有批次
+        每次從全部工位可用（或 initial_state）開始，可重複執行
         返回完整排程結果
         """
+        if initial_state is None:
+            self.reset()
+        else:
+            self.restore(initial_state)
+        
         all_vehicles = []
         all_schedules = []
         
@@ -168,6 +262,7 @@ class FlowShopSimulator:
         
         self.vehicle_instances = all_vehicles
         self.schedules = all_schedules
+        self.index = ScheduleIndex(all_schedules)
         
         return {
             "vehicles": all_vehicles,
@@ -176,60 +271,161 @@ class FlowShopSimulator:
             "stations": list(self.stations.values())
         }
     
+    def simulate_to_sink(self,
+                         batches: Iterable[Batch],
+                         sink,
+                         initial_state: Optional[Dict[str, List[List[Tuple[int, int]]]]] = None) -> Dict:
+        """
+        串流模擬並寫入 sink（見 simulator.sinks）
+        每筆排程記錄呼叫 sink.write，每個批次完成後呼叫 sink.finish_batch
+        返回: sink.close() 的摘要
+        """
+        if initial_state is None:
+            self.reset()
+        else:
+            self.restore(initial_state)
+        
+        try:
+            for batch in batches:
+                if not batch.assigned_station:
+                    continue
+                for schedule in self._iter_batch_schedules(batch):
+                    sink.write(schedule)
+                sink.finish_batch(batch)
+        except BaseException:
+            sink.discard()
+            raise
+        return sink.close()
+    
+    def _iter_batch_schedules(self, batch: Batch) -> Iterator[StageSchedule]:
+        """逐筆產出單一批次的排程記錄（與 simulate_batch 的記錄相同）"""
+        station = self.stations[batch.assigned_station]
+        vehicle = get_vehicle_master(self.vehicles_master, batch.manufacturer, batch.model)
+        if not station.stages:
+            station.initialize_stages(vehicle.calculate_workstations())
+        
+        timeline, slots = self._prepare_timeline(station, vehicle)
+        setup_time = batch.setup_time
+        if setup_time is None:
+            setup_time = vehicle.calculate_setup_time()
+        ready_time = (batch.start_time or 0) + setup_time
+        
+        finish = None
+        for seq in range(1, batch.quantity + 1):
+            vehicle_id = f"{batch.batch_id}_{batch.model}_{seq}"
+            for stage_num, ws_number, start_time, finish_time in timeline.assign_vehicle(
+                    vehicle.inspection_times, ready_time):
+                if slots is not None:
+                    ws_number = slots[stage_num - 1][ws_number]
+                yield StageSchedule(
+                    schedule_id=f"SCH_{batch.batch_id}_{seq}_{stage_num}",
+                    vehicle_id=vehicle_id,
+                    batch_id=batch.batch_id,
+                    station_name=station.station_name,
+                    stage_number=stage_num,
+                    workstation_id=f"{station.station_name}_{stage_num}_{ws_number}",
+                    start_time=start_time,
+                    finish_time=finish_time,
+                    duration=finish_time - start_time
+                )
+                if finish is None or finish_time > finish:
+                    finish = finish_time
+        
+        if finish is not None:
+            batch.finish_time = finish
+    
     def get_state_at_time(self, time: int) -> Dict:
         """
         獲取指定時間點的系統狀態
         用於視覺化
         """
-        state = {
-            "time": time,
-            "stations": {}
-        }
+        active_rows = (
+            (s.station_name, s.workstation_id, s.vehicle_id, s.batch_id)
+            for s in self.schedules
+            if s.start_time <= time < s.finish_time
+        )
+        return compose_state(time, station_layout(self.stations.values()), active_rows)
 
-        # 建立每個工位的狀態初始值
-        workstation_lookup: Dict[str, Dict] = {}
-        for station_name, station in self.stations.items():
-            station_state = {
-                "name": station_name,
-                "status": station.status.value if hasattr(station.status, "value") else station.status,
-                "current_batch": station.current_batch,
-                "stages": []
-            }
-            ws_map = {}
-            for stage in station.stages:
-                stage_state = {
+
+def station_layout(stations: Iterable[Station]) -> List[Dict]:
+    """
+    擷取檢修廠的靜態佈局（關卡與工位）
+    供狀態重建與排程匯出使用
+    """
+    layout = []
+    for station in stations:
+        layout.append({
+            "name": station.station_name,
+            "status": station.status.value if hasattr(station.status, "value") else station.status,
+            "current_batch": station.current_batch,
+            "stages": [
+                {
                     "stage_number": stage.stage_number,
                     "stage_name": stage.stage_name,
-                    "workstations": []
+                    "workstations": [
+                        {"workstation_id": ws.workstation_id, "ws_number": ws.ws_number}
+                        for ws in stage.workstations
+                    ]
+                }
+                for stage in station.stages
+            ]
+        })
+    return layout
+
+
+def compose_state(time: int,
+                  layout: List[Dict],
+                  active_rows: Iterable[Tuple[str, str, str, str]]) -> Dict:
+    """
+    依檢修廠佈局與指定時間點進行中的排程組成系統狀態
+    active_rows: (station_name, workstation_id, vehicle_id, batch_id)，依排程順序
+    """
+    state = {
+        "time": time,
+        "stations": {}
+    }
+
+    # 建立每個工位的狀態初始值
+    workstation_lookup: Dict[str, Dict] = {}
+    for station in layout:
+        station_state = {
+            "name": station["name"],
+            "status": station["status"],
+            "current_batch": station["current_batch"],
+            "stages": []
+        }
+        ws_map = {}
+        for stage in station["stages"]:
+            stage_state = {
+                "stage_number": stage["stage_number"],
+                "stage_name": stage["stage_name"],
+                "workstations": []
+            }
+            for ws in stage["workstations"]:
+                ws_state = {
+                    "workstation_id": ws["workstation_id"],
+                    "ws_number": ws["ws_number"],
+                    "status": "idle",
+                    "current_vehicle": None
                 }
-                for ws in stage.workstations:
-                    ws_state = {
-                        "workstation_id": ws.workstation_id,
-                        "ws_number": ws.ws_number,
-                        "status": "idle",
-                        "current_vehicle": None
-                    }
-                    stage_state["workstations"].append(ws_state)
-                    ws_map[ws.workstation_id] = ws_state
-                station_state["stages"].append(stage_state)
-            state["stations"][station_name] = station_state
-            workstation_lookup[station_name] = ws_map
+                stage_state["workstations"].append(ws_state)
+                ws_map[ws["workstation_id"]] = ws_state
+            station_state["stages"].append(stage_state)
+        state["stations"][station["name"]] = station_state
+        workstation_lookup[station["name"]] = ws_map
 
-        # 套用排程資料決定特定時間點的工位狀態
-        for schedule in self.schedules:
-            station_state = state["stations"].get(schedule.station_name)
-            if not station_state:
-                continue
-            ws_state = workstation_lookup[schedule.station_name].get(schedule.workstation_id)
-            if not ws_state:
-                continue
+    # 套用進行中的排程決定工位狀態
+    for station_name, workstation_id, vehicle_id, batch_id in active_rows:
+        station_state = state["stations"].get(station_name)
+        if not station_state:
+            continue
+        ws_state = workstation_lookup[station_name].get(workstation_id)
+        if not ws_state:
+            continue
 
-            if schedule.start_time <= time < schedule.finish_time:
-                ws_state["status"] = "busy"
-                ws_state["current_vehicle"] = schedule.vehicle_id
-                station_state["status"] = "running"
-                station_state["current_batch"] = schedule.batch_id
-            elif time >= schedule.finish_time and ws_state["status"] != "busy":
-                ws_state["status"] = "idle"
+        ws_state["status"] = "busy"
+        ws_state["current_vehicle"] = vehicle_id
+        station_state["status"] = "running"
+        station_state["current_batch"] = batch_id
 
-        return state
+    return state
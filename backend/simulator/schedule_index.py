@@ -0,0 +1,122 @@
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence
+from models.schedule import StageSchedule
+
+
+def stage_position(starts: Sequence[int], finishes: Sequence[int], stage_numbers: Sequence[int],
+                   workstation_ids: Sequence[str], time: int) -> Dict:
+    """
+    車輛在 time 的位置（各參數為該車依關卡順序的排程欄位）
+    status: waiting / in_stage / between_stages / completed
+    """
+    # 最後一個已開始的關卡
+    i = bisect_right(starts, time) - 1
+    if i < 0:
+        return {"time": time, "status": "waiting", "stage_number": None, "workstation_id": None}
+    if time < finishes[i]:
+        return {"time": time, "status": "in_stage",
+                "stage_number": stage_numbers[i], "workstation_id": workstation_ids[i]}
+    if i == len(starts) - 1:
+        return {"time": time, "status": "completed", "stage_number": None, "workstation_id": None}
+    return {"time": time, "status": "between_stages",
+            "stage_number": stage_numbers[i], "workstation_id": None}
+
+
+def completion_curve(finishes: Sequence[int]) -> List[Dict]:
+    """累積完成曲線: 每個完成時間點的累積完成車輛數（finishes 已排序）"""
+    curve = []
+    for count, finish in enumerate(finishes, 1):
+        if curve and curve[-1]["time"] == finish:
+            curve[-1]["completed"] = count
+        else:
+            curve.append({"time": finish, "completed": count})
+    return curve
+
+
+def progress_at(starts: Sequence[int], finishes: Sequence[int], time: int) -> Dict:
+    """以二分搜尋計算 time 時已完成 / 進行中 / 等待中的車輛數（starts、finishes 已排序）"""
+    completed = bisect_right(finishes, time)
+    started = bisect_right(starts, time)
+    return {
+        "time": time,
+        "completed": completed,
+        "in_progress": started - completed,
+        "waiting": len(finishes) - started,
+        "percent": round(completed / len(finishes) * 100, 1),
+    }
+
+
+class ScheduleIndex:
+    """
+    排程記錄索引
+    車輛 ID → 各關卡排程（依關卡順序），批次 ID → 車輛開始 / 完成時間（已排序）與累積完成曲線
+    查詢車輛為 O(1)，查詢批次在某時間點的完成數為 O(log n)
+    """
+
+    def __init__(self, schedules: Iterable[StageSchedule]):
+        self._vehicles: Dict[str, List[StageSchedule]] = {}
+        for s in schedules:
+            self._vehicles.setdefault(s.vehicle_id, []).append(s)
+
+        batch_starts: Dict[str, List[int]] = {}
+        batch_finishes: Dict[str, List[int]] = {}
+        self._batch_station: Dict[str, str] = {}
+        for rows in self._vehicles.values():
+            rows.sort(key=lambda s: s.stage_number)
+            batch_id = rows[0].batch_id
+            batch_starts.setdefault(batch_id, []).append(rows[0].start_time)
+            batch_finishes.setdefault(batch_id, []).append(rows[-1].finish_time)
+            self._batch_station[batch_id] = rows[0].station_name
+        for times in batch_starts.values():
+            times.sort()
+        for times in batch_finishes.values():
+            times.sort()
+        self._batch_starts = batch_starts
+        self._batch_finishes = batch_finishes
+        self._batch_curves = {batch_id: completion_curve(times) for batch_id, times in batch_finishes.items()}
+
+    def vehicle_timeline(self, vehicle_id: str, time: Optional[int] = None) -> Optional[Dict]:
+        """
+        車輛各關卡的排程；指定 time 時附上該時間點的位置
+        status: waiting / in_stage / between_stages / completed
+        """
+        rows = self._vehicles.get(vehicle_id)
+        if rows is None:
+            return None
+
+        timeline = {
+            "vehicle_id": vehicle_id,
+            "batch_id": rows[0].batch_id,
+            "station_name": rows[0].station_name,
+            "start_time": rows[0].start_time,
+            "finish_time": rows[-1].finish_time,
+            "stages": [s.model_dump() for s in rows],
+        }
+        if time is not None:
+            timeline.update(stage_position(
+                [s.start_time for s in rows], [s.finish_time for s in rows],
+                [s.stage_number for s in rows], [s.workstation_id for s in rows], time
+            ))
+        return timeline
+
+    def batch_progress(self, batch_id: str, time: Optional[int] = None) -> Optional[Dict]:
+        """
+        批次進度與累積完成曲線（每個完成時間點的累積完成車輛數）
+        指定 time 時以二分搜尋計算已完成 / 進行中 / 等待中的車輛數
+        """
+        finishes = self._batch_finishes.get(batch_id)
+        if finishes is None:
+            return None
+        starts = self._batch_starts[batch_id]
+
+        progress = {
+            "batch_id": batch_id,
+            "station_name": self._batch_station[batch_id],
+            "vehicles": len(finishes),
+            "start_time": starts[0],
+            "finish_time": finishes[-1],
+            "completion_curve": [dict(point) for point in self._batch_curves[batch_id]],
+        }
+        if time is not None:
+            progress.update(progress_at(starts, finishes, time))
+        return progress
@@ -0,0 +1,285 @@
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional
+from models.batch import Batch
+from models.station import Station
+from models.schedule import StageSchedule
+from scheduler.clock import SimulationClock
+
+
+class ScheduleSink(ABC):
+    """
+    串流模擬的輸出（FlowShopSimulator.simulate_to_sink）
+    write 接收每筆排程記錄，finish_batch 於批次模擬完成後呼叫（finish_time 已更新），
+    close 完成輸出並返回摘要；模擬失敗時呼叫 discard 放棄輸出
+    """
+
+    name = "sink"
+
+    @abstractmethod
+    def write(self, schedule: StageSchedule):
+        """接收一筆排程記錄"""
+
+    def finish_batch(self, batch: Batch):
+        pass
+
+    def close(self) -> Dict:
+        return {}
+
+    def discard(self):
+        pass
+
+
+class _FileSink(ScheduleSink):
+    """寫入暫存檔，close 時原子替換為最終檔案"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self.rows = 0
+
+    def _replace(self) -> Dict:
+        os.replace(self.tmp_path, self.path)
+        return {"file_name": self.path.name, "rows": self.rows, "size": self.path.stat().st_size}
+
+    def discard(self):
+        self.tmp_path.unlink(missing_ok=True)
+
+
+class NDJSONSink(_FileSink):
+    """每行一筆排程記錄（JSON）"""
+
+    name = "ndjson"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(self.tmp_path, "w", encoding="utf-8")
+
+    def write(self, schedule: StageSchedule):
+        self._file.write(schedule.model_dump_json())
+        self._file.write("\n")
+        self.rows += 1
+
+    def close(self) -> Dict:
+        self._file.close()
+        return self._replace()
+
+    def discard(self):
+        self._file.close()
+        super().discard()
+
+
+class SQLiteSink(_FileSink):
+    """
+    SQLite 資料庫: schedules 表（排程記錄）與 batches 表（批次分配與完成時間）
+    每累積 chunk_size 筆批次寫入，close 時建立車輛 / 批次索引
+    """
+
+    name = "sqlite"
+    COLUMNS = ("schedule_id", "vehicle_id", "batch_id", "station_name", "stage_number",
+               "workstation_id", "start_time", "finish_time", "duration")
+
+    def __init__(self, path, chunk_size: int = 5000):
+        super().__init__(path)
+        self.chunk_size = chunk_size
+        self.tmp_path.unlink(missing_ok=True)
+        self._conn = sqlite3.connect(self.tmp_path)
+        self._conn.executescript("""
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE schedules (
+                schedule_id TEXT PRIMARY KEY, vehicle_id TEXT, batch_id TEXT, station_name TEXT,
+                stage_number INTEGER, workstation_id TEXT,
+                start_time INTEGER, finish_time INTEGER, duration INTEGER
+            );
+            CREATE TABLE batches (
+                batch_id TEXT PRIMARY KEY, manufacturer TEXT, model TEXT, quantity INTEGER,
+                assigned_station TEXT, start_time INTEGER, finish_time INTEGER, due_date TEXT
+            );
+        """)
+        self._rows: List[tuple] = []
+        self._insert = f"INSERT INTO schedules VALUES ({', '.join('?' * len(self.COLUMNS))})"
+
+    def write(self, schedule: StageSchedule):
+        self._rows.append(tuple(getattr(schedule, column) for column in self.COLUMNS))
+        self.rows += 1
+        if len(self._rows) >= self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        self._conn.executemany(self._insert, self._rows)
+        self._rows.clear()
+
+    def finish_batch(self, batch: Batch):
+        self._conn.execute(
+            "INSERT INTO batches VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (batch.batch_id, batch.manufacturer, batch.model, batch.quantity, batch.assigned_station,
+             batch.start_time, batch.finish_time,
+             batch.due_date.isoformat() if batch.due_date is not None else None)
+        )
+
+    def close(self) -> Dict:
+        self._flush()
+        self._conn.execute("CREATE INDEX idx_schedules_vehicle ON schedules (vehicle_id, stage_number)")
+        self._conn.execute("CREATE INDEX idx_schedules_batch ON schedules (batch_id)")
+        self._conn.commit()
+        self._conn.close()
+        return self._replace()
+
+    def discard(self):
+        self._conn.close()
+        super().discard()
+
+
+class ColumnarSink(ScheduleSink):
+    """
+    欄式排程檔（storage.columnar 格式，可由 /api/import 載入）
+    欄位逐段寫入暫存檔；只保留字串字典與批次資料
+    stations: 檢修廠（close 時擷取最終的工位佈局）
+    """
+
+    name = "columnar"
+
+    def __init__(self, path, stations: Dict[str, Station]):
+        from storage.columnar import ScheduleColumnsWriter
+        self._writer = ScheduleColumnsWriter(path)
+        self._stations = stations
+        self._batches: List[Dict] = []
+
+    def write(self, schedule: StageSchedule):
+        self._writer.write(schedule)
+
+    def finish_batch(self, batch: Batch):
+        self._batches.append(batch.model_dump(mode="json"))
+
+    def close(self) -> Dict:
+        path = self._writer.close(self._batches, self._stations.values())
+        return {"file_name": path.name, "rows": self._writer.rows, "size": path.stat().st_size}
+
+    def discard(self):
+        self._writer.discard()
+
+
+class KPISink(ScheduleSink):
+    """
+    記憶體內 KPI 彙總（不保留記錄）
+    總完工時間、各檢修廠 / 關卡的工位忙碌分鐘、車輛平均流程時間；
+    提供 clock 時以批次交期計算準時批次數與總延遲
+    """
+
+    name = "kpi"
+
+    def __init__(self, clock: Optional[SimulationClock] = None):
+        self.clock = clock
+        self.rows = 0
+        self.vehicles = 0
+        self.makespan = 0
+        self.total_flow_time = 0
+        self.station_busy: Dict[str, int] = {}
+        self.stage_busy: Dict[int, int] = {}
+        self.station_vehicles: Dict[str, int] = {}
+        self.batches = 0
+        self.batches_with_due = 0
+        self.on_time_batches = 0
+        self.total_tardiness = 0
+        # 同一台車的記錄連續產出，只需記住目前車輛
+        self._vehicle_id: Optional[str] = None
+        self._vehicle_start = 0
+        self._vehicle_finish = 0
+
+    def write(self, schedule: StageSchedule):
+        self.rows += 1
+        if schedule.vehicle_id != self._vehicle_id:
+            self._end_vehicle()
+            self._vehicle_id = schedule.vehicle_id
+            self._vehicle_start = schedule.start_time
+            self.station_vehicles[schedule.station_name] = self.station_vehicles.get(schedule.station_name, 0) + 1
+        self._vehicle_finish = schedule.finish_time
+
+        self.station_busy[schedule.station_name] = self.station_busy.get(schedule.station_name, 0) + schedule.duration
+        self.stage_busy[schedule.stage_number] = self.stage_busy.get(schedule.stage_number, 0) + schedule.duration
+        if schedule.finish_time > self.makespan:
+            self.makespan = schedule.finish_time
+
+    def _end_vehicle(self):
+        if self._vehicle_id is not None:
+            self.vehicles += 1
+            self.total_flow_time += self._vehicle_finish - self._vehicle_start
+
+    def finish_batch(self, batch: Batch):
+        self.batches += 1
+        if self.clock is None or batch.due_date is None or batch.finish_time is None:
+            return
+        self.batches_with_due += 1
+        tardiness = max(0, batch.finish_time - self.clock.to_minutes(batch.due_date))
+        self.total_tardiness += tardiness
+        if tardiness == 0:
+            self.on_time_batches += 1
+
+    def close(self) -> Dict:
+        self._end_vehicle()
+        self._vehicle_id = None
+        summary = {
+            "rows": self.rows,
+            "batches": self.batches,
+            "vehicles": self.vehicles,
+            "makespan": self.makespan,
+            "avg_flow_time": round(self.total_flow_time / self.vehicles, 1) if self.vehicles else 0.0,
+            "station_busy": self.station_busy,
+            "station_vehicles": self.station_vehicles,
+            "stage_busy": self.stage_busy,
+        }
+        if self.clock is not None:
+            summary.update({
+                "batches_with_due": self.batches_with_due,
+                "on_time_batches": self.on_time_batches,
+                "total_tardiness": self.total_tardiness,
+            })
+        return summary
+
+
+class MultiSink(ScheduleSink):
+    """同時寫入多個 sink，close 返回 {sink.name: 摘要}"""
+
+    name = "multi"
+
+    def __init__(self, *sinks: ScheduleSink):
+        self.sinks = sinks
+
+    def write(self, schedule: StageSchedule):
+        for sink in self.sinks:
+            sink.write(schedule)
+
+    def finish_batch(self, batch: Batch):
+        for sink in self.sinks:
+            sink.finish_batch(batch)
+
+    def close(self) -> Dict:
+        """依序關閉每個 sink；任一個失敗時放棄它與其餘尚未關閉的 sink，再重新拋出原本的錯誤"""
+        summaries = {}
+        for i, sink in enumerate(self.sinks):
+            try:
+                summaries[sink.name] = sink.close()
+            except BaseException:
+                _discard_all(self.sinks[i:])
+                raise
+        return summaries
+
+    def discard(self):
+        error = _discard_all(self.sinks)
+        if error is not None:
+            raise error
+
+
+def _discard_all(sinks) -> Optional[Exception]:
+    """放棄每個 sink；個別失敗不影響其餘 sink，回傳第一個錯誤"""
+    error = None
+    for sink in sinks:
+        try:
+            sink.discard()
+        except Exception as e:
+            error = error or e
+    return error
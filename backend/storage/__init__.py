@@ -0,0 +1,4 @@
+from .columnar import write_schedule_columns, ScheduleColumns, ScheduleColumnsWriter
+from .shared_store import SharedResultStore, SharedSchedule
+
+__all__ = ['write_schedule_columns', 'ScheduleColumns', 'ScheduleColumnsWriter', 'SharedResultStore', 'SharedSchedule']
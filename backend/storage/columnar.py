@@ -0,0 +1,487 @@
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from pathlib import Path
+from typing import List, Dict, Iterable, Optional
+
+import numpy as np
+
+from models.batch import Batch
+from models.station import Station, Stage, Workstation
+from models.schedule import StageSchedule, VehicleInstance, VehicleStatus
+from simulator.flow_shop_simulator import station_layout, compose_state
+from simulator.schedule_index import stage_position, progress_at
+
+
+# 檔案格式（little-endian，所有區段 4 bytes 對齊）:
+#   header   : MAGIC | row_count | string_count | strings_size | stations_size | batches_size
+#   columns  : SCHEDULE_COLUMNS 依序各 row_count 個 int32
+#   strings  : string_count + 1 個 int32 位移 + UTF-8 字串區（補齊至 4 bytes）
+#   stations : UTF-8 JSON 檢修廠佈局與負載（補齊至 4 bytes；狀態查詢只解析此區段）
+#   batches  : UTF-8 JSON 批次資料（需要批次的端點才解析）
+MAGIC = b"SCHCOL02"
+HEADER = struct.Struct("<8sIIIII")
+# 舊版格式: 檢修廠佈局與批次合併為單一 meta JSON {"stations", "batches"}（僅供讀取）
+LEGACY_MAGIC = b"SCHCOL01"
+LEGACY_HEADER = struct.Struct("<8sIIII")
+SCHEDULE_COLUMNS = (
+    "start_time",
+    "finish_time",
+    "stage_number",
+    "sequence",
+    "vehicle",
+    "batch",
+    "station",
+    "workstation",
+)
+# 以字串字典索引儲存的欄位
+STRING_COLUMNS = ("vehicle", "batch", "station", "workstation")
+
+# 檢修廠佈局以外一併儲存的欄位（還原 /api/result 的檢修廠）
+STATION_FIELDS = ("workstation_config", "utilization", "next_available_time", "total_batches", "total_vehicles")
+
+_INT32 = np.dtype("<i4")
+
+
+def _padding(size: int) -> int:
+    return (-size) % 4
+
+
+class _StringTable:
+    """字串字典（字串 → 索引）"""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self, value: str) -> int:
+        idx = self.index.get(value)
+        if idx is None:
+            idx = len(self.strings)
+            self.index[value] = idx
+            self.strings.append(value)
+        return idx
+
+
+def write_schedule_columns(path,
+                           schedules: Iterable[StageSchedule],
+                           batches: Iterable[Batch],
+                           stations: Iterable[Station]) -> Path:
+    """
+    將排程結果匯出為欄式二進位檔
+    先寫入暫存檔再原子替換，讀取端不會看到寫一半的檔案
+    """
+    writer = ScheduleColumnsWriter(path)
+    try:
+        for s in schedules:
+            writer.write(s)
+    except BaseException:
+        writer.discard()
+        raise
+    return writer.close(batches, stations)
+
+
+class ScheduleColumnsWriter:
+    """
+    逐筆寫入欄式排程檔
+    各欄位每累積 chunk_rows 筆即以 int32 附加到欄位暫存檔，close 時串接為最終檔案；
+    記憶體只保留字串字典，不保留排程記錄
+    """
+
+    def __init__(self, path, chunk_rows: int = 65536):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.rows = 0
+        self._chunk_rows = chunk_rows
+        self._table = _StringTable()
+        self._buffers: Dict[str, List[int]] = {name: [] for name in SCHEDULE_COLUMNS}
+        self._spills = {name: tempfile.TemporaryFile(dir=self.path.parent) for name in SCHEDULE_COLUMNS}
+
+    def write(self, s: StageSchedule):
+        buffers = self._buffers
+        buffers["start_time"].append(s.start_time)
+        buffers["finish_time"].append(s.finish_time)
+        buffers["stage_number"].append(s.stage_number)
+        buffers["sequence"].append(int(s.schedule_id.rsplit("_", 2)[-2]))
+        buffers["vehicle"].append(self._table.add(s.vehicle_id))
+        buffers["batch"].append(self._table.add(s.batch_id))
+        buffers["station"].append(self._table.add(s.station_name))
+        buffers["workstation"].append(self._table.add(s.workstation_id))
+        self.rows += 1
+        if len(buffers["start_time"]) >= self._chunk_rows:
+            self._flush()
+
+    def _flush(self):
+        for name, values in self._buffers.items():
+            self._spills[name].write(np.asarray(values, dtype=_INT32).tobytes())
+            values.clear()
+
+    def close(self, batches: Iterable[Batch], stations: Iterable[Station]) -> Path:
+        """寫入字串字典、檢修廠佈局與批次資料，原子替換為最終檔案"""
+        self._flush()
+        stations = list(stations)
+        layout = station_layout(stations)
+        for entry, station in zip(layout, stations):
+            entry.update({name: getattr(station, name) for name in STATION_FIELDS})
+        stations_bytes = json.dumps(layout, ensure_ascii=False).encode("utf-8")
+        batches_bytes = json.dumps(
+            [b if isinstance(b, dict) else b.model_dump(mode="json") for b in batches],
+            ensure_ascii=False
+        ).encode("utf-8")
+
+        encoded = [value.encode("utf-8") for value in self._table.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=_INT32)
+        offsets[1:] = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+        blob = b"".join(encoded)
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, self.rows, len(encoded), len(blob),
+                                    len(stations_bytes), len(batches_bytes)))
+                for name in SCHEDULE_COLUMNS:
+                    spill = self._spills[name]
+                    spill.seek(0)
+                    shutil.copyfileobj(spill, f)
+                f.write(offsets.tobytes())
+                f.write(blob)
+                f.write(b"\0" * _padding(len(blob)))
+                f.write(stations_bytes)
+                f.write(b"\0" * _padding(len(stations_bytes)))
+                f.write(batches_bytes)
+            os.replace(tmp_path, self.path)
+        finally:
+            self.discard()
+        return self.path
+
+    def discard(self):
+        """關閉欄位暫存檔（未呼叫 close 時不產生檔案）"""
+        for spill in self._spills.values():
+            spill.close()
+
+
+class ScheduleColumns:
+    """
+    以記憶體映射讀取欄式排程檔
+    欄位直接指向映射的頁面，不需解析；多個行程可共用 page cache
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic = self._mmap[:len(MAGIC)]
+        if magic == MAGIC:
+            _, self.row_count, self.string_count, strings_size, stations_size, batches_size = \
+                HEADER.unpack_from(self._mmap, 0)
+            offset = HEADER.size
+        elif magic == LEGACY_MAGIC:
+            _, self.row_count, self.string_count, strings_size, meta_size = \
+                LEGACY_HEADER.unpack_from(self._mmap, 0)
+            offset = LEGACY_HEADER.size
+        else:
+            raise ValueError(f"不是欄式排程檔: {self.path}")
+
+        self.columns: Dict[str, np.ndarray] = {}
+        for name in SCHEDULE_COLUMNS:
+            self.columns[name] = np.frombuffer(
+                self._mmap, dtype=_INT32, count=self.row_count, offset=offset
+            )
+            offset += self.row_count * 4
+
+        self._string_offsets = np.frombuffer(
+            self._mmap, dtype=_INT32, count=self.string_count + 1, offset=offset
+        )
+        offset += (self.string_count + 1) * 4
+        self._strings_start = offset
+        offset += strings_size + _padding(strings_size)
+        if magic == MAGIC:
+            self._stations_range = (offset, offset + stations_size)
+            offset += stations_size + _padding(stations_size)
+            self._batches_range = (offset, offset + batches_size)
+            self._legacy_range = None
+        else:
+            self._legacy_range = (offset, offset + meta_size)
+        self._stations: Optional[List[Dict]] = None
+        self._batches: Optional[List[Dict]] = None
+        self._string_cache: Dict[int, str] = {}
+        self._index: Optional[ColumnarScheduleIndex] = None
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def string(self, idx: int) -> str:
+        """由字串字典索引取得字串"""
+        value = self._string_cache.get(idx)
+        if value is None:
+            start = self._strings_start + int(self._string_offsets[idx])
+            end = self._strings_start + int(self._string_offsets[idx + 1])
+            value = self._mmap[start:end].decode("utf-8")
+            self._string_cache[idx] = value
+        return value
+
+    def _load_json(self, section) -> List[Dict]:
+        start, end = section
+        return json.loads(self._mmap[start:end].decode("utf-8"))
+
+    def _load_legacy_meta(self):
+        meta = self._load_json(self._legacy_range)
+        self._stations, self._batches = meta["stations"], meta["batches"]
+
+    @property
+    def stations(self) -> List[Dict]:
+        """檢修廠佈局（首次存取時只解析佈局區段）"""
+        if self._stations is None:
+            if self._legacy_range is not None:
+                self._load_legacy_meta()
+            else:
+                self._stations = self._load_json(self._stations_range)
+        return self._stations
+
+    @property
+    def batches(self) -> List[Dict]:
+        """批次資料（model_dump(mode="json") 格式，首次存取時解析）"""
+        if self._batches is None:
+            if self._legacy_range is not None:
+                self._load_legacy_meta()
+            else:
+                self._batches = self._load_json(self._batches_range)
+        return self._batches
+
+    @property
+    def index(self) -> "ColumnarScheduleIndex":
+        """車輛 / 批次 → 排程記錄索引（首次查詢時由 int32 欄位建立）"""
+        if self._index is None:
+            self._index = ColumnarScheduleIndex(self)
+        return self._index
+
+    @property
+    def max_time(self) -> int:
+        """排程總時間"""
+        if self.row_count == 0:
+            return 0
+        return int(self.columns["finish_time"].max())
+
+    def get_state_at_time(self, time: int) -> Dict:
+        """獲取指定時間點的系統狀態（與 FlowShopSimulator 輸出相同）"""
+        active = np.flatnonzero(
+            (self.columns["start_time"] <= time) & (time < self.columns["finish_time"])
+        )
+        station = self.columns["station"]
+        workstation = self.columns["workstation"]
+        vehicle = self.columns["vehicle"]
+        batch = self.columns["batch"]
+        active_rows = (
+            (
+                self.string(int(station[i])),
+                self.string(int(workstation[i])),
+                self.string(int(vehicle[i])),
+                self.string(int(batch[i])),
+            )
+            for i in active
+        )
+        return compose_state(time, self.stations, active_rows)
+
+    def result_payload(self) -> Dict:
+        """
+        還原排程結果（/api/result 的 JSON 格式）
+        車輛由每台車的第一 / 最後一筆記錄與批次資料還原，檢修廠由佈局區段還原
+        """
+        c = self.columns
+        index = self.index
+        batches = {b["batch_id"]: b for b in self.batches}
+        vehicles = []
+        # 依記錄順序（批次、車輛序號）排列
+        for k in np.argsort(index.first_rows, kind="stable"):
+            first, last = int(index.first_rows[k]), int(index.last_rows[k])
+            batch = batches[self.string(int(c["batch"][first]))]
+            vehicles.append(VehicleInstance(
+                vehicle_id=self.string(int(c["vehicle"][first])),
+                batch_id=batch["batch_id"],
+                manufacturer=batch["manufacturer"],
+                model=batch["model"],
+                sequence=int(c["sequence"][first]),
+                system=batch["system"],
+                current_station=self.string(int(c["station"][first])),
+                status=VehicleStatus.COMPLETED,
+                start_time=int(c["start_time"][first]),
+                finish_time=int(c["finish_time"][last])
+            ).model_dump())
+        return {
+            "batches": self.batches,
+            "vehicles": vehicles,
+            "schedules": list(self.iter_schedule_dicts()),
+            "stations": [_restore_station(entry).model_dump() for entry in self.stations],
+        }
+
+    def iter_schedule_dicts(self) -> Iterable[Dict]:
+        """逐筆還原排程記錄（StageSchedule.model_dump 格式）"""
+        for i in range(self.row_count):
+            yield self.schedule_dict(i)
+
+    def schedule_dict(self, i: int) -> Dict:
+        """還原第 i 筆排程記錄（StageSchedule.model_dump 格式）"""
+        c = self.columns
+        batch_id = self.string(int(c["batch"][i]))
+        sequence = int(c["sequence"][i])
+        stage_number = int(c["stage_number"][i])
+        start_time = int(c["start_time"][i])
+        finish_time = int(c["finish_time"][i])
+        return {
+            "schedule_id": f"SCH_{batch_id}_{sequence}_{stage_number}",
+            "vehicle_id": self.string(int(c["vehicle"][i])),
+            "batch_id": batch_id,
+            "station_name": self.string(int(c["station"][i])),
+            "stage_number": stage_number,
+            "workstation_id": self.string(int(c["workstation"][i])),
+            "start_time": start_time,
+            "finish_time": finish_time,
+            "duration": finish_time - start_time,
+            "status": "scheduled",
+        }
+
+    def close(self):
+        """釋放記憶體映射"""
+        self.columns = {}
+        self._string_offsets = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # 仍有外部陣列引用映射頁面，交由垃圾回收釋放
+            pass
+
+
+def _restore_station(entry: Dict) -> Station:
+    """由佈局區段還原檢修廠（舊檔案沒有負載欄位時使用預設值）"""
+    stages = [
+        Stage(
+            station_name=entry["name"],
+            stage_number=stage["stage_number"],
+            stage_name=stage["stage_name"],
+            workstation_count=len(stage["workstations"]),
+            workstations=[
+                Workstation(station_name=entry["name"], stage_number=stage["stage_number"], **ws)
+                for ws in stage["workstations"]
+            ]
+        )
+        for stage in entry["stages"]
+    ]
+    station = Station(
+        station_name=entry["name"],
+        status=entry["status"],
+        current_batch=entry["current_batch"],
+        stages=stages,
+        **{name: entry[name] for name in STATION_FIELDS if name in entry}
+    )
+    if "workstation_config" not in entry:
+        station.workstation_config = [stage.workstation_count for stage in stages]
+    return station
+
+
+def _group_starts(codes: np.ndarray) -> np.ndarray:
+    """已排序代碼陣列中每組的起點，最後附上總長度作為結尾"""
+    if codes.size == 0:
+        return np.zeros(1, dtype=np.int64)
+    return np.r_[np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]), codes.size]
+
+
+class ColumnarScheduleIndex:
+    """
+    欄式排程檔的車輛 / 批次索引（與 ScheduleIndex 查詢結果相同）
+    直接以 int32 欄位排序建立: 記錄依 (車輛, 關卡) 排序並記錄每台車的起訖位移，
+    車輛開始 / 完成時間依批次排序並記錄每個批次的起訖位移，累積完成曲線於建立時一併計算；
+    只解碼車輛與批次字串，查詢時才還原該車的排程記錄
+    """
+
+    def __init__(self, columns: ScheduleColumns):
+        self._columns = columns
+        c = columns.columns
+
+        # 記錄依 (車輛, 關卡) 排序，_vehicle_bounds[k]:_vehicle_bounds[k+1] 為第 k 台車
+        self._rows = np.lexsort((c["stage_number"], c["vehicle"]))
+        vehicle = c["vehicle"][self._rows]
+        self._vehicle_bounds = _group_starts(vehicle)
+        # 每台車第一 / 最後一筆記錄的列號（依車輛代碼排序）
+        self.first_rows = first = self._rows[self._vehicle_bounds[:-1]]
+        self.last_rows = last = self._rows[self._vehicle_bounds[1:] - 1]
+        self._vehicle_codes = {
+            columns.string(int(code)): k for k, code in enumerate(vehicle[self._vehicle_bounds[:-1]])
+        }
+
+        # 每台車的開始 / 完成時間依批次排序，_batch_bounds[j]:_batch_bounds[j+1] 為第 j 個批次
+        vehicle_batch = c["batch"][first]
+        vehicle_start = c["start_time"][first]
+        vehicle_finish = c["finish_time"][last]
+        by_start = np.lexsort((vehicle_start, vehicle_batch))
+        by_finish = np.lexsort((vehicle_finish, vehicle_batch))
+        self._batch_starts = vehicle_start[by_start]
+        self._batch_finishes = vehicle_finish[by_finish]
+        batch = vehicle_batch[by_start]
+        self._batch_bounds = _group_starts(batch)
+        heads = self._batch_bounds[:-1]
+        self._batch_codes = {columns.string(int(code)): j for j, code in enumerate(batch[heads])}
+        self._batch_station = c["station"][first[by_start[heads]]]
+
+        # 累積完成曲線: 同批次同完成時間只保留最後一筆，completed 為批次內的名次
+        finishes = self._batch_finishes
+        group = np.repeat(np.arange(heads.size), np.diff(self._batch_bounds))
+        keep = np.ones(finishes.size, dtype=bool)
+        keep[:-1] = (finishes[1:] != finishes[:-1]) | (group[1:] != group[:-1])
+        points = np.flatnonzero(keep)
+        self._curve_time = finishes[points]
+        self._curve_completed = points - heads[group[points]] + 1
+        self._curve_bounds = np.searchsorted(group[points], np.arange(heads.size + 1))
+
+    def vehicle_timeline(self, vehicle_id: str, time: Optional[int] = None) -> Optional[Dict]:
+        """車輛各關卡的排程；指定 time 時附上該時間點的位置"""
+        k = self._vehicle_codes.get(vehicle_id)
+        if k is None:
+            return None
+
+        stages = [
+            self._columns.schedule_dict(int(i))
+            for i in self._rows[self._vehicle_bounds[k]:self._vehicle_bounds[k + 1]]
+        ]
+        timeline = {
+            "vehicle_id": vehicle_id,
+            "batch_id": stages[0]["batch_id"],
+            "station_name": stages[0]["station_name"],
+            "start_time": stages[0]["start_time"],
+            "finish_time": stages[-1]["finish_time"],
+            "stages": stages,
+        }
+        if time is not None:
+            timeline.update(stage_position(
+                [s["start_time"] for s in stages], [s["finish_time"] for s in stages],
+                [s["stage_number"] for s in stages], [s["workstation_id"] for s in stages], time
+            ))
+        return timeline
+
+    def batch_progress(self, batch_id: str, time: Optional[int] = None) -> Optional[Dict]:
+        """批次進度與累積完成曲線；指定 time 時以二分搜尋計算各狀態車輛數"""
+        j = self._batch_codes.get(batch_id)
+        if j is None:
+            return None
+        begin, end = self._batch_bounds[j], self._batch_bounds[j + 1]
+        starts = self._batch_starts[begin:end]
+        finishes = self._batch_finishes[begin:end]
+        curve = slice(self._curve_bounds[j], self._curve_bounds[j + 1])
+
+        progress = {
+            "batch_id": batch_id,
+            "station_name": self._columns.string(int(self._batch_station[j])),
+            "vehicles": int(end - begin),
+            "start_time": int(starts[0]),
+            "finish_time": int(finishes[-1]),
+            "completion_curve": [
+                {"time": t, "completed": n}
+                for t, n in zip(self._curve_time[curve].tolist(), self._curve_completed[curve].tolist())
+            ],
+        }
+        if time is not None:
+            progress.update(progress_at(starts, finishes, time))
+        return progress
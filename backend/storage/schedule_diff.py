@@ -0,0 +1,165 @@
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+
+from models.schedule import StageSchedule
+from storage.columnar import ScheduleColumns
+
+
+# 排程表欄位: 字串欄位為 object 陣列，其餘為 int64
+STRING_FIELDS = ("vehicle_id", "batch_id", "station_name", "workstation_id")
+INT_FIELDS = ("stage_number", "start_time", "finish_time")
+
+
+def schedule_table(source: Union[ScheduleColumns, Iterable[StageSchedule]]) -> Dict[str, np.ndarray]:
+    """排程記錄（欄式檔或 StageSchedule 列表）轉為欄位陣列"""
+    if isinstance(source, ScheduleColumns):
+        strings = np.array([source.string(i) for i in range(source.string_count)], dtype=object)
+        columns = source.columns
+        return {
+            "vehicle_id": strings[columns["vehicle"]],
+            "batch_id": strings[columns["batch"]],
+            "station_name": strings[columns["station"]],
+            "workstation_id": strings[columns["workstation"]],
+            "stage_number": columns["stage_number"].astype(np.int64),
+            "start_time": columns["start_time"].astype(np.int64),
+            "finish_time": columns["finish_time"].astype(np.int64),
+        }
+
+    schedules = list(source)
+    table = {
+        name: np.array([getattr(s, name) for s in schedules], dtype=object)
+        for name in STRING_FIELDS
+    }
+    for name in INT_FIELDS:
+        table[name] = np.fromiter((getattr(s, name) for s in schedules), dtype=np.int64, count=len(schedules))
+    return table
+
+
+def encode_strings(values: np.ndarray, index: Dict[str, int]) -> np.ndarray:
+    """字串編為整數碼（雜湊，線性時間）；index 可在多個陣列間共用"""
+    return np.fromiter((index.setdefault(v, len(index)) for v in values.tolist()),
+                       dtype=np.int64, count=values.size)
+
+
+def _sorted_keys(table: Dict[str, np.ndarray], codes: np.ndarray):
+    """以 (車輛, 關卡) 排序，返回 (排序後的鍵, 排序索引)"""
+    keys = codes * 64 + table["stage_number"]
+    order = np.argsort(keys, kind="stable")
+    return keys[order], order
+
+
+def _batch_finish(table: Dict[str, np.ndarray]) -> Dict[str, int]:
+    """批次完成時間（批次內最晚的關卡完成時間）"""
+    index: Dict[str, int] = {}
+    codes = encode_strings(table["batch_id"], index)
+    finish = np.full(len(index), np.iinfo(np.int64).min)
+    np.maximum.at(finish, codes, table["finish_time"])
+    return dict(zip(index, finish.tolist()))
+
+
+def diff_schedules(before: Dict[str, np.ndarray],
+                   after: Dict[str, np.ndarray],
+                   limit: Optional[int] = None) -> Dict:
+    """
+    比較兩個排程版本
+    兩邊依 (vehicle_id, stage_number) 排序後合併，只返回有變動的記錄:
+      - changes: 同一車輛關卡的檢修廠 / 工位改變或時間位移
+      - added / removed: 只存在於其中一個版本的車輛關卡
+      - batches: 完成時間或檢修廠改變的批次（finish_delta = 新 - 舊）
+    limit: 每個列表最多返回的筆數（摘要一律為完整統計）
+    """
+    # 兩邊的車輛 ID 編為共同的整數碼
+    vehicles: Dict[str, int] = {}
+    before_keys, before_order = _sorted_keys(before, encode_strings(before["vehicle_id"], vehicles))
+    after_keys, after_order = _sorted_keys(after, encode_strings(after["vehicle_id"], vehicles))
+
+    # 合併: 前版的每個鍵以 searchsorted 對到新版的位置，兩邊鍵皆已排序且不重複
+    position = np.searchsorted(after_keys, before_keys)
+    found = position < after_keys.size
+    found[found] = after_keys[position[found]] == before_keys[found]
+    ai = position[found]
+    matched_after = np.zeros(after_keys.size, dtype=bool)
+    matched_after[ai] = True
+    b = before_order[found]
+    a = after_order[ai]
+    reassigned = (before["station_name"][b] != after["station_name"][a]) | \
+                 (before["workstation_id"][b] != after["workstation_id"][a])
+    start_delta = after["start_time"][a] - before["start_time"][b]
+    finish_delta = after["finish_time"][a] - before["finish_time"][b]
+    changed = np.flatnonzero(reassigned | (start_delta != 0) | (finish_delta != 0))
+
+    removed = before_order[~found]
+    added = after_order[~matched_after]
+
+    changes = []
+    for i in changed[:limit]:
+        changes.append({
+            "vehicle_id": after["vehicle_id"][a[i]],
+            "stage_number": int(after["stage_number"][a[i]]),
+            "batch_id": after["batch_id"][a[i]],
+            "station_before": before["station_name"][b[i]],
+            "station_after": after["station_name"][a[i]],
+            "workstation_before": before["workstation_id"][b[i]],
+            "workstation_after": after["workstation_id"][a[i]],
+            "start_delta": int(start_delta[i]),
+            "finish_delta": int(finish_delta[i]),
+            "start_time": int(after["start_time"][a[i]]),
+            "finish_time": int(after["finish_time"][a[i]]),
+        })
+
+    def rows(table, indices):
+        return [
+            {
+                "vehicle_id": table["vehicle_id"][i],
+                "stage_number": int(table["stage_number"][i]),
+                "batch_id": table["batch_id"][i],
+                "station_name": table["station_name"][i],
+                "workstation_id": table["workstation_id"][i],
+                "start_time": int(table["start_time"][i]),
+                "finish_time": int(table["finish_time"][i]),
+            }
+            for i in indices[:limit]
+        ]
+
+    # 批次完成時間差
+    before_finish = _batch_finish(before)
+    after_finish = _batch_finish(after)
+    before_station = dict(zip(before["batch_id"].tolist(), before["station_name"].tolist()))
+    after_station = dict(zip(after["batch_id"].tolist(), after["station_name"].tolist()))
+    batches = []
+    for batch_id in sorted(before_finish.keys() | after_finish.keys()):
+        old, new = before_finish.get(batch_id), after_finish.get(batch_id)
+        if old == new and before_station.get(batch_id) == after_station.get(batch_id):
+            continue
+        batches.append({
+            "batch_id": batch_id,
+            "station_before": before_station.get(batch_id),
+            "station_after": after_station.get(batch_id),
+            "finish_before": old,
+            "finish_after": new,
+            "finish_delta": new - old if old is not None and new is not None else None,
+        })
+
+    makespan_before = int(before["finish_time"].max()) if before["finish_time"].size else 0
+    makespan_after = int(after["finish_time"].max()) if after["finish_time"].size else 0
+    return {
+        "summary": {
+            "rows_before": int(before["vehicle_id"].size),
+            "rows_after": int(after["vehicle_id"].size),
+            "matched": int(a.size),
+            "changed": int(changed.size),
+            "reassigned": int(reassigned.sum()),
+            "shifted": int(((start_delta != 0) | (finish_delta != 0)).sum()),
+            "added": int(added.size),
+            "removed": int(removed.size),
+            "batches_changed": len(batches),
+            "makespan_before": makespan_before,
+            "makespan_after": makespan_after,
+            "makespan_delta": makespan_after - makespan_before,
+        },
+        "changes": changes,
+        "added": rows(after, added),
+        "removed": rows(before, removed),
+        "batches": batches[:limit],
+    }
@@ -0,0 +1,159 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: 沒有 POSIX 檔案鎖，共享結果不可用
+    fcntl = None
+
+from models.batch import Batch
+from models.station import Station
+from models.schedule import StageSchedule
+from storage.columnar import write_schedule_columns, ScheduleColumns, ColumnarScheduleIndex
+
+
+# 目錄結構:
+#   index.json          : 目前版本 {"version", "columnar", "result", "clock_origin"}
+#   index.lock          : 發布時的檔案鎖（分配版本號）
+#   v{版本}.schcol      : 欄式排程檔（狀態查詢、交期分析）
+#   v{版本}.result.json : 預先序列化的 /api/result 回應
+INDEX_FILE = "index.json"
+LOCK_FILE = "index.lock"
+# 保留的舊版本數（其他 worker 可能仍映射舊檔案）
+KEEP_VERSIONS = 3
+
+
+class SharedSchedule:
+    """共享儲存中的一個排程版本（記憶體映射）"""
+
+    def __init__(self, directory: Path, index: Dict):
+        self.version: int = index["version"]
+        self.clock_origin: Optional[str] = index.get("clock_origin")
+        self.result_path = directory / index["result"]
+        self.columns = ScheduleColumns(directory / index["columnar"])
+        self._batches: Optional[List[Batch]] = None
+
+    @property
+    def batches(self) -> List[Batch]:
+        """批次資料（含分配檢修廠與完成時間，首次存取時由欄式檔的批次區段還原）"""
+        if self._batches is None:
+            self._batches = [Batch.model_validate(b) for b in self.columns.batches]
+        return self._batches
+
+    @property
+    def index(self) -> ColumnarScheduleIndex:
+        return self.columns.index
+
+    def get_state_at_time(self, time: int) -> Dict:
+        return self.columns.get_state_at_time(time)
+
+    def close(self):
+        self.columns.close()
+
+
+class SharedResultStore:
+    """
+    單機多 worker 共享的排程結果
+    計算排程的 worker 發布欄式檔與序列化後的結果，並原子替換索引檔；
+    其他 worker 查詢時只比對索引檔的 inode / mtime，版本變更才重新映射，
+    查詢直接由映射頁面（page cache 共用）或預先序列化的檔案提供，不需重算或複製整份結果
+    """
+
+    def __init__(self, directory):
+        if fcntl is None:
+            raise ImportError("共享結果需要 fcntl 檔案鎖（僅支援 POSIX 系統）")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._index_stat = None
+        self._current: Optional[SharedSchedule] = None
+
+    def publish(self,
+                schedules: Iterable[StageSchedule],
+                batches: Iterable[Batch],
+                stations: Iterable[Station],
+                result_json: bytes,
+                clock_origin: Optional[str] = None) -> int:
+        """
+        發布新版本
+        返回: 版本號（跨 worker 遞增）
+        """
+        with open(self.directory / LOCK_FILE, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                index = self._read_index()
+                version = (index["version"] if index else 0) + 1
+
+                columnar_path = self.columnar_path(version)
+                result_path = self.result_path(version)
+                write_schedule_columns(columnar_path, schedules, batches, stations)
+                tmp_path = result_path.with_name(result_path.name + ".tmp")
+                tmp_path.write_bytes(result_json)
+                os.replace(tmp_path, result_path)
+
+                self._write_index({
+                    "version": version,
+                    "columnar": columnar_path.name,
+                    "result": result_path.name,
+                    "clock_origin": clock_origin,
+                })
+                self._remove_old_versions(version)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return version
+
+    def columnar_path(self, version: int) -> Path:
+        """版本的欄式排程檔（保留最近 KEEP_VERSIONS 個版本）"""
+        return self.directory / f"v{version}.schcol"
+
+    def result_path(self, version: int) -> Path:
+        """版本的 /api/result 回應檔"""
+        return self.directory / f"v{version}.result.json"
+
+    def current(self) -> Optional[SharedSchedule]:
+        """目前版本（索引檔未變更時直接返回已映射的版本）"""
+        try:
+            stat = os.stat(self.directory / INDEX_FILE)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns)
+        if key == self._index_stat:
+            return self._current
+
+        # 讀取索引後檔案可能剛被較新的發布清除，重試一次；仍失敗時沿用已映射的版本
+        for _ in range(2):
+            index = self._read_index()
+            if index is None:
+                return None
+            if self._current is None or self._current.version != index["version"]:
+                try:
+                    shared = SharedSchedule(self.directory, index)
+                except FileNotFoundError:
+                    continue
+                if self._current is not None:
+                    self._current.close()
+                self._current = shared
+            self._index_stat = key
+            break
+        return self._current
+
+    def _read_index(self) -> Optional[Dict]:
+        try:
+            with open(self.directory / INDEX_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_index(self, index: Dict):
+        path = self.directory / INDEX_FILE
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(index), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _remove_old_versions(self, version: int):
+        """刪除過舊版本的檔案（已映射的行程仍可讀取，直到釋放映射）"""
+        for path in self.directory.glob("v*.*"):
+            number = path.name[1:].split(".", 1)[0]
+            if number.isdigit() and int(number) <= version - KEEP_VERSIONS:
+                path.unlink(missing_ok=True)
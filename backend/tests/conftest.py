@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 後端模組以 backend/ 為根目錄匯入
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
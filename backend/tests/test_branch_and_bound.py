@@ -0,0 +1,73 @@
+import itertools
+import random
+
+import pytest
+
+from models.batch import Batch
+from models.vehicle import VehicleMaster
+from scheduler.branch_and_bound import AssignmentSolver, _water_level
+from scheduler.greedy_scheduler import GreedyScheduler
+from simulator.evaluator import BatchPlan, evaluate_station
+
+STATIONS = ["甲檢修廠", "乙檢修廠", "丙檢修廠"]
+
+
+def _instance(seed: int, batch_count: int = 6):
+    rng = random.Random(seed)
+    vehicles_master = {}
+    batches = []
+    for i in range(batch_count):
+        vehicle = VehicleMaster(
+            manufacturer="TEST", model=f"M{i}",
+            inspection_times=[rng.choice([2, 5, 15, 40, 90]) for _ in range(5)],
+            preferred_stations=rng.sample(STATIONS, 2) if rng.random() < 0.3 else [],
+        )
+        vehicles_master[("TEST", f"M{i}")] = vehicle
+        batches.append(Batch(batch_id=f"B{i}", manufacturer="TEST", model=f"M{i}",
+                             quantity=rng.randint(1, 8), system="其他"))
+    return vehicles_master, batches
+
+
+def _brute_force(vehicles_master, batches) -> int:
+    """窮舉所有候選檢修廠分配（工位配置為分配批次配置的逐關卡最大值）"""
+    greedy = GreedyScheduler(vehicles_master, STATIONS)
+    ordered = greedy.assign_batches_to_stations([b.model_copy() for b in batches])
+    items = []
+    for batch in ordered:
+        vehicle = vehicles_master[(batch.manufacturer, batch.model)]
+        config, setup_time = greedy._get_vehicle_plan(vehicle)
+        candidates = [s for s, name in enumerate(STATIONS) if name in vehicle.preferred_stations] \
+            or list(range(len(STATIONS)))
+        plan = BatchPlan(batch.batch_id, setup_time, vehicle.inspection_times, batch.quantity)
+        items.append((plan, config, candidates))
+
+    best = None
+    for assignment in itertools.product(*(candidates for _, _, candidates in items)):
+        makespan = 0
+        for s in range(len(STATIONS)):
+            members = [(plan, config) for (plan, config, _), a in zip(items, assignment) if a == s]
+            if members:
+                config = [max(values) for values in zip(*(c for _, c in members))]
+                makespan = max(makespan, max(evaluate_station([p for p, _ in members], config).values()))
+        best = makespan if best is None else min(best, makespan)
+    return best
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_solver_matches_brute_force(seed):
+    vehicles_master, batches = _instance(seed)
+    result = AssignmentSolver(vehicles_master, STATIONS).solve(batches)
+    optimum = _brute_force(vehicles_master, batches)
+
+    assert result.optimal
+    assert result.best_makespan == optimum
+    assert result.bounds.lower_bound <= optimum
+    assert result.greedy_makespan >= optimum
+
+
+def test_water_level():
+    # 工作量只填入最早可用的工位
+    assert _water_level([0, 100], 20) == 20
+    assert _water_level([10, 0], 30) == 20
+    assert _water_level([0, 0, 0], 7) == 3
+    assert _water_level([5], 0) == 5
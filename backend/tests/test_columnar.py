@@ -0,0 +1,83 @@
+import json
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+
+from data_loader import DataLoader
+from models.batch import Batch
+from models.station import Station
+from scheduler.greedy_scheduler import GreedyScheduler
+from simulator.flow_shop_simulator import FlowShopSimulator
+from simulator.schedule_index import ScheduleIndex
+from storage.columnar import (
+    ScheduleColumns, write_schedule_columns, HEADER, LEGACY_HEADER, LEGACY_MAGIC, SCHEDULE_COLUMNS, _padding
+)
+from test_columnar_index import _schedules
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _station_and_batch():
+    station = Station(station_name="南高檢修廠")
+    station.initialize_stages([1, 1, 1, 1, 1])
+    batch = Batch(batch_id="B0", manufacturer="AUDI", model="Q5", quantity=1, system="歐系",
+                  assigned_station="南高檢修廠")
+    return station, batch
+
+
+def test_state_query_does_not_parse_batches(tmp_path):
+    station, batch = _station_and_batch()
+    schedules = [s for s in _schedules(0) if s.batch_id == "B0"]
+    for s in schedules:
+        s.station_name = "南高檢修廠"
+        s.workstation_id = f"南高檢修廠_{s.stage_number}_0"
+    columns = ScheduleColumns(write_schedule_columns(tmp_path / "s.schcol", schedules, [batch], [station]))
+
+    state = columns.get_state_at_time(schedules[0].start_time)
+    assert "南高檢修廠" in state["stations"]
+    assert columns._batches is None
+    assert columns.batches == [batch.model_dump(mode="json")]
+    columns.close()
+
+
+def test_reads_legacy_combined_meta(tmp_path):
+    station, batch = _station_and_batch()
+    path = write_schedule_columns(tmp_path / "s.schcol", _schedules(1), [batch], [station])
+    columns = ScheduleColumns(path)
+    stations, batches = columns.stations, columns.batches
+    columns.close()
+
+    # 改寫為舊版格式: 佈局與批次合併為單一 meta 區段
+    data = path.read_bytes()
+    _, rows, string_count, strings_size, _, _ = HEADER.unpack_from(data, 0)
+    body_end = HEADER.size + (len(SCHEDULE_COLUMNS) * rows + string_count + 1) * 4 \
+        + strings_size + _padding(strings_size)
+    meta = json.dumps({"stations": stations, "batches": batches}, ensure_ascii=False).encode("utf-8")
+    legacy = tmp_path / "legacy.schcol"
+    legacy.write_bytes(
+        LEGACY_HEADER.pack(LEGACY_MAGIC, rows, string_count, strings_size, len(meta))
+        + data[HEADER.size:body_end] + meta
+    )
+
+    columns = ScheduleColumns(legacy)
+    assert columns.stations == stations
+    assert columns.batches == batches
+    assert columns.index.batch_progress("B0") == ScheduleIndex(_schedules(1)).batch_progress("B0")
+    columns.close()
+
+
+def test_result_payload_round_trip(tmp_path):
+    loader = DataLoader(base_path=str(PROJECT_ROOT))
+    vehicles_master = loader.load_vehicles_master()
+    scheduler = GreedyScheduler(vehicles_master, loader.load_station_names())
+    batches = scheduler.assign_batches_to_stations(loader.load_order("test_orders_002.json").batches)
+    result = FlowShopSimulator(vehicles_master, scheduler.stations).simulate_all_batches(batches)
+
+    path = write_schedule_columns(tmp_path / "r.schcol", result["schedules"], result["batches"], result["stations"])
+    columns = ScheduleColumns(path)
+    expected = {
+        name: [item.model_dump() for item in result[name]]
+        for name in ("batches", "vehicles", "schedules", "stations")
+    }
+    assert jsonable_encoder(columns.result_payload()) == jsonable_encoder(expected)
+    columns.close()
@@ -0,0 +1,51 @@
+import json
+import random
+
+from models.schedule import StageSchedule
+from simulator.schedule_index import ScheduleIndex
+from storage.columnar import ScheduleColumns, write_schedule_columns
+
+
+def _schedules(seed: int):
+    """隨機排程記錄（含相同完成時間，記錄順序打亂）"""
+    rng = random.Random(seed)
+    schedules = []
+    for b in range(rng.randint(1, 6)):
+        batch_id = f"B{b}"
+        station = rng.choice(["南高檢修廠", "北高檢修廠"])
+        for sequence in range(1, rng.randint(1, 8) + 1):
+            time = rng.randint(0, 20)
+            for stage_number in range(1, 6):
+                duration = rng.randint(0, 4)
+                schedules.append(StageSchedule(
+                    schedule_id=f"SCH_{batch_id}_{sequence}_{stage_number}",
+                    vehicle_id=f"{batch_id}_Q5_{sequence}",
+                    batch_id=batch_id,
+                    station_name=station,
+                    stage_number=stage_number,
+                    workstation_id=f"{station}_{stage_number}_{rng.randint(0, 2)}",
+                    start_time=time,
+                    finish_time=time + duration,
+                    duration=duration,
+                ))
+                time += duration + rng.randint(0, 3)
+    rng.shuffle(schedules)
+    return schedules
+
+
+def test_columnar_index_matches_schedule_index(tmp_path):
+    for seed in range(10):
+        schedules = _schedules(seed)
+        expected = ScheduleIndex(schedules)
+        columns = ScheduleColumns(write_schedule_columns(tmp_path / f"{seed}.schcol", schedules, [], []))
+        index = columns.index
+
+        times = [None, 0, 3, 10, 25, 40, 100]
+        for vehicle_id in {s.vehicle_id for s in schedules} | {"missing"}:
+            for time in times:
+                assert json.loads(json.dumps(expected.vehicle_timeline(vehicle_id, time))) == \
+                    index.vehicle_timeline(vehicle_id, time)
+        for batch_id in {s.batch_id for s in schedules} | {"missing"}:
+            for time in times:
+                assert expected.batch_progress(batch_id, time) == index.batch_progress(batch_id, time)
+        columns.close()
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import numpy as np
+
+from analytics.critical_path import _chain_sums, critical_path_report, wait_causes
+from data_loader import DataLoader
+from scheduler.greedy_scheduler import GreedyScheduler
+from simulator.flow_shop_simulator import FlowShopSimulator
+from storage.schedule_diff import schedule_table
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _simulated(order_file):
+    loader = DataLoader(base_path=str(PROJECT_ROOT))
+    vehicles_master = loader.load_vehicles_master()
+    scheduler = GreedyScheduler(vehicles_master, loader.load_station_names())
+    batches = scheduler.assign_batches_to_stations(loader.load_order(order_file).batches)
+    result = FlowShopSimulator(vehicles_master, scheduler.stations).simulate_all_batches(batches)
+    return schedule_table(result["schedules"]), result["batches"]
+
+
+def test_start_is_bound_by_ready_or_workstation():
+    table, batches = _simulated("test_orders_003.json")
+    causes = wait_causes(table, batches)
+
+    start = table["start_time"]
+    np.testing.assert_array_equal(start, np.maximum(causes["ready_at"], causes["ws_free_at"]))
+    assert causes["wait_workstation"].sum() > 0
+    # pred 指向的記錄在開始時間當下完成
+    linked = causes["pred"] >= 0
+    np.testing.assert_array_equal(table["finish_time"][causes["pred"][linked]], start[linked])
+
+
+def test_chain_sums_follow_pred_to_root():
+    # 兩條鏈: 0 <- 1 <- 3 <- 4，以及 2 <- 5
+    pred = np.array([-1, 0, -1, 1, 3, 2])
+    values = np.array([[1], [2], [4], [8], [16], [32]])
+    total, count, root = _chain_sums(pred, values)
+
+    np.testing.assert_array_equal(total[:, 0], [1, 3, 4, 11, 27, 36])
+    np.testing.assert_array_equal(count, [1, 2, 1, 3, 4, 2])
+    np.testing.assert_array_equal(root, [0, 0, 2, 0, 0, 2])
+    np.testing.assert_array_equal(values[:, 0], [1, 2, 4, 8, 16, 32])
+
+
+def test_critical_path_spans_batch_finish():
+    table, batches = _simulated("test_orders_002.json")
+    report = critical_path_report(table, batches, batches[0].batch_id)
+
+    for row in report["batches"]:
+        path = row["critical_path"]
+        assert path["start_time"] + path["length"] == row["finish_time"]
+        assert sum(path["stage_time"].values()) <= path["length"]
+    steps = report["path"]
+    assert steps[-1]["finish_time"] == next(
+        row["finish_time"] for row in report["batches"] if row["batch_id"] == batches[0].batch_id
+    )
+    assert all(prev["finish_time"] == cur["start_time"] for prev, cur in zip(steps, steps[1:]))
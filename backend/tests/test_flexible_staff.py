@@ -0,0 +1,60 @@
+from pathlib import Path
+
+from data_loader import DataLoader
+from analytics.line_balancing import reallocation_report
+from scheduler.greedy_scheduler import GreedyScheduler
+from simulator.flow_shop_simulator import FlowShopSimulator
+from simulator.sinks import ScheduleSink
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _simulate(order_file, **kwargs):
+    loader = DataLoader(base_path=str(PROJECT_ROOT))
+    vehicles_master = loader.load_vehicles_master()
+    scheduler = GreedyScheduler(vehicles_master, loader.load_station_names())
+    batches = scheduler.assign_batches_to_stations(loader.load_order(order_file).batches)
+    station_configs = {name: list(st.workstation_config) for name, st in scheduler.stations.items()}
+    simulator = FlowShopSimulator(vehicles_master, scheduler.stations, flexible_staff=True, **kwargs)
+    return simulator, simulator.simulate_all_batches(batches), station_configs, vehicles_master
+
+
+def test_flexible_simulation_matches_reallocation_report():
+    simulator, result, station_configs, vehicles_master = _simulate("test_orders_002.json", move_time=3)
+    report = reallocation_report(result["batches"], station_configs, vehicles_master, move_time=3)
+
+    assert simulator.staff_moves == report["summary"]["moves"]
+    for station in report["stations"]:
+        finish = max(s.finish_time for s in result["schedules"] if s.station_name == station["station_name"])
+        assert finish == station["flexible_makespan"]
+
+
+def test_flexible_simulation_keeps_workstations_exclusive():
+    simulator, result, _, _ = _simulate("test_orders_003.json", move_time=5)
+    assert simulator.staff_moves > 0
+
+    layout = {
+        ws.workstation_id
+        for station in result["stations"] for stage in station.stages for ws in stage.workstations
+    }
+    by_workstation = {}
+    for s in result["schedules"]:
+        assert s.workstation_id in layout
+        by_workstation.setdefault(s.workstation_id, []).append((s.start_time, s.finish_time))
+    for rows in by_workstation.values():
+        rows.sort()
+        assert all(prev[1] <= cur[0] for prev, cur in zip(rows, rows[1:]))
+
+
+def test_flexible_stream_matches_simulate_all_batches():
+    simulator, result, _, _ = _simulate("test_orders_001.json", move_time=2)
+    expected = {s.schedule_id: (s.workstation_id, s.start_time, s.finish_time) for s in result["schedules"]}
+
+    rows = {}
+
+    class _Collect(ScheduleSink):
+        def write(self, schedule):
+            rows[schedule.schedule_id] = (schedule.workstation_id, schedule.start_time, schedule.finish_time)
+
+    simulator.simulate_to_sink(result["batches"], _Collect())
+    assert rows == expected
@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from data_loader import DataLoader
+from models.batch import Batch, Order
+from scheduler.horizon_scheduler import HorizonScheduler
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _order(order_date: str, model: str, quantity: int) -> Order:
+    batch = Batch(batch_id=f"{order_date}_{model}", manufacturer="TOYOTA", model=model,
+                  quantity=quantity, system="日系")
+    return Order(order_id=order_date, order_date=order_date, description="", batches=[batch],
+                 total_batches=1, total_vehicles=quantity)
+
+
+def _rows(result, batch_id):
+    return [
+        (s.vehicle_id, s.stage_number, s.workstation_id, s.start_time, s.finish_time)
+        for s in result["schedules"] if s.batch_id == batch_id
+    ]
+
+
+def test_later_day_expansion_does_not_change_earlier_day():
+    vehicles_master = DataLoader(base_path=str(PROJECT_ROOT)).load_vehicles_master()
+    stations = ["鳳山檢修廠"]
+
+    # 第一天的 RAV4 工位較少，第二天的 CAMRY 擴充同一檢修廠的工位
+    alone = HorizonScheduler(vehicles_master, stations).schedule([_order("2025-11-15", "RAV4", 30)])
+    horizon = HorizonScheduler(vehicles_master, stations)
+    result = horizon.schedule([_order("2025-11-15", "RAV4", 30), _order("2025-11-16", "CAMRY", 10)])
+
+    # 第二天擴充了第一關卡的工位（RAV4: 2，CAMRY: 8）
+    assert len(alone["stations"][0].stages[0].workstations) == 2
+    assert len(horizon.scheduler.stations["鳳山檢修廠"].stages[0].workstations) == 8
+    assert _rows(result, "2025-11-15_RAV4") == _rows(alone, "2025-11-15_RAV4")
+    assert result["days"][0]["finish_time"] == alone["days"][0]["finish_time"]
+    # 第二天的批次可使用擴充後的工位
+    assert any(
+        s.stage_number == 1 and int(s.workstation_id.rsplit("_", 1)[1]) >= 2
+        for s in result["schedules"] if s.batch_id == "2025-11-16_CAMRY"
+    )
@@ -0,0 +1,95 @@
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from data_loader import DataLoader
+from models.batch import Batch
+from scheduler.online_scheduler import OnlineScheduler
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DUE = datetime(2025, 11, 15, 18, 0)
+
+
+@pytest.fixture(scope="module")
+def vehicles_master():
+    return DataLoader(base_path=str(PROJECT_ROOT)).load_vehicles_master()
+
+
+def _batch(batch_id: str, quantity: int) -> Batch:
+    return Batch(batch_id=batch_id, manufacturer="AUDI", model="Q5", quantity=quantity,
+                 system="歐系", due_date=DUE)
+
+
+def _vehicle_counts(online: OnlineScheduler):
+    counts = {}
+    for schedule in online.schedules:
+        if schedule.stage_number == 1:
+            counts[schedule.batch_id] = counts.get(schedule.batch_id, 0) + 1
+    return counts
+
+
+def _batch_finish(online: OnlineScheduler, batch_id: str) -> int:
+    return max(s.finish_time for s in online.schedules if s.batch_id == batch_id)
+
+
+def test_partially_started_batch_is_never_deferred(vehicles_master):
+    online = OnlineScheduler(vehicles_master, ["鳳山檢修廠"])
+    online.add_batches([_batch("A", 40)], 0)
+    first_start = min(s.start_time for s in online.schedules)
+
+    # 時域為 0: 所有未開工的工作都超出時域
+    online.horizon = 0
+    stats = online.add_batches([_batch("B", 5)], first_start + 1)
+
+    assert 0 < stats["frozen_vehicles"] < 40
+    assert stats["deferred_batches"] == ["B"]
+    assert _vehicle_counts(online) == {"A": 40}
+    assert online.batches["A"].finish_time == _batch_finish(online, "A")
+
+
+def test_advance_plans_deferred_batches(vehicles_master):
+    online = OnlineScheduler(vehicles_master, ["鳳山檢修廠"], horizon=0)
+    stats = online.add_batches([_batch("A", 5)], 0)
+    assert stats["deferred_batches"] == ["A"]
+    assert online.batches["A"].finish_time is None
+
+    online.horizon = OnlineScheduler.DEFAULT_HORIZON
+    stats = online.advance(30)
+    assert stats["new_batches"] == 0
+    assert stats["deferred_batches"] == []
+    assert _vehicle_counts(online) == {"A": 5}
+    assert min(s.start_time for s in online.schedules) >= 30
+    assert online.batches["A"].finish_time == _batch_finish(online, "A")
+
+    with pytest.raises(ValueError):
+        online.advance(10)
+
+
+def test_undated_batch_sorts_after_dated_batches(vehicles_master):
+    online = OnlineScheduler(vehicles_master, ["鳳山檢修廠"])
+    online.add_batches([_batch("A", 3)], 0)
+    undated = Batch(batch_id="U", manufacturer="AUDI", model="Q5", quantity=2, system="歐系")
+    online.add_batches([undated, _batch("B", 2)], 10)
+
+    assert _vehicle_counts(online) == {"A": 3, "B": 2, "U": 2}
+    online.advance(20)
+
+
+def test_failed_add_leaves_state_unchanged(vehicles_master):
+    online = OnlineScheduler(vehicles_master, ["鳳山檢修廠"])
+    online.add_batches([_batch("A", 3)], 0)
+    schedules = online.schedules
+
+    unknown = Batch(batch_id="X", manufacturer="AUDI", model="不存在", quantity=1, system="歐系")
+    with pytest.raises(ValueError):
+        online.add_batches([_batch("B", 2), unknown], 10)
+    with pytest.raises(ValueError):
+        online.add_batches([_batch("C", 1), _batch("C", 1)], 10)
+
+    assert set(online.batches) == {"A"}
+    assert online.current_time == 0
+    assert online.schedules == schedules
+    stats = online.advance(min(s.start_time for s in schedules) + 1)
+    assert stats["frozen_vehicles"] > 0
+    assert _vehicle_counts(online) == {"A": 3}
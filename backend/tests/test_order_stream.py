@@ -0,0 +1,63 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+import data_loader
+from data_loader import DataLoader, _iter_json_array_items
+from scheduler.greedy_scheduler import GreedyScheduler
+from simulator.flow_shop_simulator import FlowShopSimulator
+from simulator.sinks import ScheduleSink
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+@pytest.mark.parametrize("read_size", [1, 7, 64 * 1024])
+def test_incremental_parser_matches_json_load(monkeypatch, read_size):
+    monkeypatch.setattr(data_loader, "STREAM_READ_SIZE", read_size)
+    document = {
+        "note": "含 [括號] 與 \"batches\": [1] 的字串",
+        "meta": {"batches": ["巢狀的同名鍵不採用"]},
+        "batches": [{"batch_id": "B1", "tags": ["a]", "{b"]}, {"batch_id": "B\"2", "n": 3}],
+        "after": [],
+    }
+    text = json.dumps(document, ensure_ascii=False, indent=1)
+    assert list(_iter_json_array_items(io.StringIO(text), "batches")) == document["batches"]
+
+
+def test_incremental_parser_rejects_missing_array():
+    with pytest.raises(ValueError):
+        list(_iter_json_array_items(io.StringIO('{"order_id": "X", "items": []}'), "batches"))
+    with pytest.raises(ValueError):
+        list(_iter_json_array_items(io.StringIO('{"batches": [{"batch_id": "B1"}'), "batches"))
+
+
+class _RecordingSink(ScheduleSink):
+    def __init__(self, log):
+        self.log = log
+
+    def write(self, schedule):
+        pass
+
+    def finish_batch(self, batch):
+        self.log.append(("simulated", batch.batch_id))
+
+
+def test_stream_pipeline_pulls_one_batch_at_a_time():
+    loader = DataLoader(base_path=str(PROJECT_ROOT))
+    vehicles_master = loader.load_vehicles_master()
+    log = []
+
+    def source():
+        for batch in loader.iter_order_batches("test_orders_001.json", chunk_size=1):
+            log.append(("read", batch.batch_id))
+            yield batch
+
+    scheduler = GreedyScheduler(vehicles_master, loader.load_station_names())
+    simulator = FlowShopSimulator(vehicles_master, scheduler.stations)
+    simulator.simulate_to_sink(scheduler.assign_batch_stream(source()), _RecordingSink(log))
+
+    order = loader.load_order("test_orders_001.json")
+    # 每個批次模擬完成後才讀取下一個批次
+    assert log == [(event, b.batch_id) for b in order.batches for event in ("read", "simulated")]
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+from analytics import robustness
+from data_loader import DataLoader
+from scheduler.clock import SimulationClock
+from scheduler.greedy_scheduler import GreedyScheduler
+from simulator.flow_shop_simulator import FlowShopSimulator
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _report(**kwargs):
+    loader = DataLoader(base_path=str(PROJECT_ROOT))
+    vehicles_master = loader.load_vehicles_master()
+    order = loader.load_order("test_orders_002.json")
+    scheduler = GreedyScheduler(vehicles_master, loader.load_station_names())
+    batches = scheduler.assign_batches_to_stations(order.batches)
+    FlowShopSimulator(vehicles_master, scheduler.stations).simulate_all_batches(batches)
+    station_configs = {name: st.workstation_config for name, st in scheduler.stations.items()}
+    return robustness.robustness_report(batches, station_configs, vehicles_master,
+                                        SimulationClock.from_order(order), **kwargs)
+
+
+def test_chunked_sampling_matches_single_pass(monkeypatch):
+    expected = _report(replications=50, cv=0.2, seed=7)
+    monkeypatch.setattr(robustness, "SAMPLE_CHUNK_SIZE", 1)
+    assert _report(replications=50, cv=0.2, seed=7) == expected
+
+
+def test_zero_variation_matches_simulation():
+    report = _report(replications=3, cv=0.0)
+    assert report["makespan"]["p99"] == report["makespan"]["deterministic"]
+    for row in report["batches"]:
+        assert row["p50"] == row["finish_time"]
@@ -0,0 +1,47 @@
+import random
+
+import numpy as np
+
+from storage.schedule_diff import diff_schedules
+
+
+def _table(rng: random.Random, vehicles):
+    rows = [(v, stage) for v in vehicles for stage in range(1, 6) if rng.random() < 0.9]
+    rng.shuffle(rows)
+    table = {
+        "vehicle_id": np.array([v for v, _ in rows], dtype=object),
+        "batch_id": np.array([v.split("_")[0] for v, _ in rows], dtype=object),
+        "station_name": np.array([rng.choice("AB") for _ in rows], dtype=object),
+        "workstation_id": np.array([rng.choice("xyz") for _ in rows], dtype=object),
+        "stage_number": np.array([stage for _, stage in rows], dtype=np.int64),
+        "start_time": np.array([rng.randint(0, 3) for _ in rows], dtype=np.int64),
+    }
+    table["finish_time"] = table["start_time"] + 2
+    return table
+
+
+def _records(table):
+    return {
+        (v, int(stage)): (station, ws, int(start), int(finish))
+        for v, stage, station, ws, start, finish in zip(
+            table["vehicle_id"], table["stage_number"], table["station_name"],
+            table["workstation_id"], table["start_time"], table["finish_time"]
+        )
+    }
+
+
+def test_merge_matches_dict_reference():
+    for seed in range(100):
+        rng = random.Random(seed)
+        vehicles = [f"B{rng.randint(0, 3)}_{i}" for i in range(rng.randint(0, 30))]
+        before = _table(rng, rng.sample(vehicles, rng.randint(0, len(vehicles))))
+        after = _table(rng, rng.sample(vehicles, rng.randint(0, len(vehicles))))
+        result = diff_schedules(before, after)
+
+        old, new = _records(before), _records(after)
+        matched = old.keys() & new.keys()
+        changed = {key for key in matched if old[key] != new[key]}
+        assert result["summary"]["matched"] == len(matched)
+        assert {(c["vehicle_id"], c["stage_number"]) for c in result["changes"]} == changed
+        assert {(r["vehicle_id"], r["stage_number"]) for r in result["added"]} == new.keys() - old.keys()
+        assert {(r["vehicle_id"], r["stage_number"]) for r in result["removed"]} == old.keys() - new.keys()
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from data_loader import DataLoader
+from models.batch import Batch
+from scheduler.greedy_scheduler import GreedyScheduler
+from scheduler.sequencer import ChangeoverSequencer
+from simulator.flow_shop_simulator import FlowShopSimulator
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _batch(batch_id: str, quantity: int) -> Batch:
+    return Batch(batch_id=batch_id, manufacturer="AUDI", model="Q5", quantity=quantity, system="歐系")
+
+
+def test_same_model_follower_waits_for_predecessor_setup():
+    vehicles_master = DataLoader(base_path=str(PROJECT_ROOT)).load_vehicles_master()
+    scheduler = GreedyScheduler(vehicles_master, ["鳳山檢修廠"])
+    batches = scheduler.assign_batches_to_stations([_batch("B1", 6), _batch("B2", 6)])
+    setup_time = batches[0].setup_time
+
+    sequencer = ChangeoverSequencer(vehicles_master)
+    batches = sequencer.sequence(batches)
+    first, second = batches
+    assert sequencer.changeovers_skipped == 1
+    assert (second.start_time, second.setup_time) == (setup_time, 0)
+
+    result = FlowShopSimulator(vehicles_master, scheduler.stations).simulate_all_batches(batches)
+    starts = {}
+    for schedule in result["schedules"]:
+        starts[schedule.batch_id] = min(starts.get(schedule.batch_id, schedule.start_time), schedule.start_time)
+    # 免換線的批次不會在前一批換線完成前開工
+    assert starts[first.batch_id] == setup_time
+    assert starts[second.batch_id] >= setup_time
+    assert second.finish_time >= first.finish_time
@@ -0,0 +1,43 @@
+import pytest
+
+from simulator.sinks import MultiSink, NDJSONSink, ScheduleSink
+from test_columnar_index import _schedules
+
+
+class _FailingSink(ScheduleSink):
+    name = "failing"
+
+    def __init__(self):
+        self.discarded = False
+
+    def write(self, schedule):
+        pass
+
+    def close(self):
+        raise OSError("disk full")
+
+    def discard(self):
+        self.discarded = True
+
+
+def test_schedule_sink_requires_write():
+    with pytest.raises(TypeError):
+        ScheduleSink()
+
+
+def test_multi_sink_discards_remaining_sinks_when_close_fails(tmp_path):
+    first = NDJSONSink(tmp_path / "first.ndjson")
+    failing = _FailingSink()
+    last = NDJSONSink(tmp_path / "last.ndjson")
+    sink = MultiSink(first, failing, last)
+    for schedule in _schedules(0):
+        sink.write(schedule)
+
+    with pytest.raises(OSError, match="disk full"):
+        sink.close()
+
+    assert (tmp_path / "first.ndjson").exists()
+    assert failing.discarded
+    assert last._file.closed
+    assert not (tmp_path / "last.ndjson").exists()
+    assert not last.tmp_path.exists()
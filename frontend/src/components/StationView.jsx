@@ -178,13 +178,10 @@ const StationView = () => {
     );
   };
 
-  const stationNames = [
-    '南高檢修廠',
-    '北高檢修廠',
-    '鳳山檢修廠',
-    '楠梓檢修廠',
-    '岡山檢修廠',
-  ];
+  // 檢修廠清單取自後端排程結果的設定，尚未載入時改用當前狀態中的檢修廠
+  const stationNames = stations.length > 0
+    ? stations.map(s => s.station_name)
+    : Object.keys(currentState?.stations || {});
 
   return (
     <div style={{ padding: '16px' }}>